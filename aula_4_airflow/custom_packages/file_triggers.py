@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+from airflow.models import Variable
+from airflow.sensors.base import BaseSensorOperator
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+from custom_packages.file_watch import checksum_arquivo, esperar_alteracao
+
+# -------------------------------
+# Sensor de arquivo deferrable (inotify + checksum)
+# -------------------------------
+# O FileSensor em mode='poke' ocupa um slot de worker durante toda a espera e só
+# percebe o arquivo no próximo poke. Aqui o sensor confere o arquivo uma vez e,
+# se não houver novidade, se "adia" (defer): o worker é liberado e a espera passa
+# para o processo triggerer, que observa o DIRETÓRIO com inotify (Linux) e acorda
+# a task assim que o arquivo é fechado após escrita ou renomeado para o lugar.
+# Sem inotify (outro SO, sistema de arquivos de rede) o trigger cai para stat()
+# periódico (ver file_watch.py). A novidade é medida pelo sha256 do conteúdo: o
+# último checksum processado fica numa Variable, então reescrever o mesmo conteúdo
+# não dispara nada.
+#
+# O evento do trigger e o XCom levam só o caminho e o checksum, nunca o conteúdo
+# (que pode ser grande). A task que usa o arquivo relê com ler_texto_verificado:
+# se ele mudou de novo depois da detecção, ela falha em vez de executar outra versão.
+#
+# O triggerer importa o trigger pelo caminho "custom_packages.file_triggers", então
+# o $AIRFLOW_HOME precisa estar no PYTHONPATH do triggerer (como já está nas DAGs).
+
+class ArquivoAlteradoTrigger(BaseTrigger):
+    """
+    Dispara quando `filepath` existe com checksum diferente de `checksum_anterior`.
+
+    Args:
+        filepath (str): caminho absoluto do arquivo.
+        checksum_anterior (str): sha256 do último conteúdo processado (None = nenhum).
+        poll_interval (float): intervalo do stat() quando não há inotify, e da
+            verificação de segurança quando há (eventos perdidos em NFS, etc.).
+    """
+
+    def __init__(self, filepath, checksum_anterior=None, poll_interval=5.0):
+        super().__init__()
+        self.filepath = filepath
+        self.checksum_anterior = checksum_anterior
+        self.poll_interval = poll_interval
+
+    def serialize(self):
+        return (
+            "custom_packages.file_triggers.ArquivoAlteradoTrigger",
+            {
+                "filepath": self.filepath,
+                "checksum_anterior": self.checksum_anterior,
+                "poll_interval": self.poll_interval,
+            },
+        )
+
+    async def run(self):
+        checksum, _conteudo, origem = await esperar_alteracao(
+            self.filepath, self.checksum_anterior, self.poll_interval, logger=self.log)
+        self.log.info("Arquivo %s alterado (%s): sha256=%s", self.filepath, origem, checksum)
+        yield TriggerEvent({"status": "alterado", "filepath": self.filepath, "checksum": checksum,
+                            "origem": origem})
+
+
+class ArquivoAlteradoSensor(BaseSensorOperator):
+    """
+    Espera `filepath` aparecer ou mudar de conteúdo, sem ocupar worker durante a espera.
+
+    O checksum encontrado é devolvido como XCom (return_value); quem usa o arquivo o
+    relê com file_watch.ler_texto_verificado(filepath, checksum). Depois de processar
+    o conteúdo, a DAG grava o checksum na Variable `variavel_checksum` (ver
+    registrar_checksum) para que a próxima execução só acorde com um conteúdo novo.
+
+    Args:
+        filepath (str): caminho absoluto do arquivo monitorado.
+        variavel_checksum (str): Variable com o sha256 do último conteúdo processado.
+        poll_interval (float): ver ArquivoAlteradoTrigger.
+        deferrable (bool): False volta ao comportamento de sensor comum (poke/reschedule).
+    """
+
+    template_fields = ("filepath",)
+
+    def __init__(self, *, filepath, variavel_checksum, poll_interval=5.0, deferrable=True, **kwargs):
+        kwargs.setdefault("poke_interval", poll_interval)
+        super().__init__(**kwargs)
+        self.filepath = filepath
+        self.variavel_checksum = variavel_checksum
+        self.poll_interval = poll_interval
+        self.deferrable = deferrable
+
+    def _checksum_anterior(self):
+        return Variable.get(self.variavel_checksum, default_var=None)
+
+    def poke(self, context):
+        checksum = checksum_arquivo(self.filepath)
+        if checksum is not None and checksum != self._checksum_anterior():
+            context["ti"].xcom_push(key="return_value", value=checksum)
+            return True
+        return False
+
+    def execute(self, context):
+        if not self.deferrable:
+            return super().execute(context)
+
+        anterior = self._checksum_anterior()
+        checksum = checksum_arquivo(self.filepath)
+        if checksum is not None and checksum != anterior:
+            self.log.info("Arquivo %s já está disponível (sha256=%s)", self.filepath, checksum)
+            return checksum
+
+        self.defer(
+            trigger=ArquivoAlteradoTrigger(self.filepath, anterior, self.poll_interval),
+            method_name="execute_complete",
+            timeout=timedelta(seconds=self.timeout),
+        )
+
+    def execute_complete(self, context, event=None):
+        self.log.info("Retomado pelo trigger (%s): sha256=%s", event["origem"], event["checksum"])
+        return event["checksum"]
+
+
+def registrar_checksum(variavel_checksum, checksum):
+    """Grava o checksum processado; chamado depois que o arquivo foi usado com sucesso."""
+    Variable.set(variavel_checksum, checksum)
+    print(f"Checksum registrado em '{variavel_checksum}': {checksum}")
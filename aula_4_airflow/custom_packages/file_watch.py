@@ -0,0 +1,161 @@
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import struct
+import sys
+
+# -------------------------------
+# Espera por conteúdo novo num arquivo (inotify + checksum)
+# -------------------------------
+# Parte sem Airflow do sensor de file_triggers.py. O diretório é observado com
+# inotify (Linux) só para IN_CLOSE_WRITE e IN_MOVED_TO: o arquivo é lido quando o
+# escritor o fecha ou quando é renomeado para o lugar, nunca no meio da escrita.
+# A verificação periódica com stat() (sem inotify, ou como segurança quando
+# eventos se perdem, ex.: NFS) só lê o arquivo depois que tamanho e mtime ficaram
+# parados por um intervalo inteiro.
+#
+# O checksum devolvido é o do conteúdo lido. Quem for usar o arquivo depois (outra
+# task, outro processo) relê com ler_texto_verificado, que confere esse checksum:
+# o que é usado é exatamente a versão detectada, ou nada.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+_EVENTO_INOTIFY = struct.Struct('iIII')   # wd, mask, cookie, len (seguido do nome)
+
+log = logging.getLogger(__name__)
+
+
+def ler_arquivo(caminho, bloco=1024 * 1024):
+    """(conteúdo em bytes, sha256) do arquivo, ou (None, None) se ele não existir."""
+    try:
+        h = hashlib.sha256()
+        partes = []
+        with open(caminho, 'rb') as f:
+            for parte in iter(lambda: f.read(bloco), b''):
+                h.update(parte)
+                partes.append(parte)
+        return b''.join(partes), h.hexdigest()
+    except FileNotFoundError:
+        return None, None
+
+
+def checksum_arquivo(caminho):
+    """sha256 do conteúdo do arquivo, ou None se ele não existir."""
+    return ler_arquivo(caminho)[1]
+
+
+def ler_texto_verificado(caminho, checksum, encoding="utf-8"):
+    """
+    Conteúdo do arquivo como texto, desde que ainda tenha o sha256 `checksum`.
+
+    Raises:
+        RuntimeError: o arquivo sumiu ou mudou depois que `checksum` foi calculado.
+        ValueError: o conteúdo não está em `encoding` (ex.: SQL salvo em Latin-1).
+    """
+    conteudo, atual = ler_arquivo(caminho)
+    if atual != checksum:
+        raise RuntimeError(f"{caminho} mudou desde a detecção (sha256 {checksum} -> {atual}); "
+                           "a próxima execução processa a versão nova.")
+    try:
+        return conteudo.decode(encoding)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"{caminho} não está em {encoding} ({e}); informe o encoding do arquivo.") from e
+
+
+def _assinatura(caminho):
+    try:
+        st = os.stat(caminho)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
+
+
+class _Inotify:
+    """inotify via ctypes, integrado ao loop asyncio com add_reader (sem threads)."""
+
+    def __init__(self, diretorio, mascara=IN_CLOSE_WRITE | IN_MOVED_TO):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        if libc.inotify_add_watch(self.fd, os.fsencode(diretorio), mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, f"inotify_add_watch falhou em {diretorio}")
+        self.fila = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(self.fd, self._ler)
+
+    def _ler(self):
+        try:
+            dados = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos < len(dados):
+            _wd, mascara, _cookie, tamanho = _EVENTO_INOTIFY.unpack_from(dados, pos)
+            pos += _EVENTO_INOTIFY.size
+            nome = dados[pos:pos + tamanho].rstrip(b'\0').decode(errors='replace')
+            pos += tamanho
+            self.fila.put_nowait((nome, mascara))
+
+    def fechar(self):
+        self.loop.remove_reader(self.fd)
+        os.close(self.fd)
+
+
+async def esperar_alteracao(filepath, checksum_anterior=None, poll_interval=5.0, usar_inotify=True, logger=log):
+    """
+    Espera `filepath` existir com checksum diferente de `checksum_anterior`.
+
+    Returns:
+        tuple: (checksum, conteúdo em bytes, origem), com origem em
+        'inicial', 'inotify', 'verificação periódica' ou 'stat'.
+    """
+    conteudo, checksum = await asyncio.to_thread(ler_arquivo, filepath)
+    if checksum is not None and checksum != checksum_anterior:
+        return checksum, conteudo, "inicial"
+
+    diretorio, nome = os.path.split(filepath)
+    inotify = None
+    if usar_inotify and sys.platform.startswith('linux') and os.path.isdir(diretorio):
+        try:
+            inotify = _Inotify(diretorio)
+        except OSError as e:
+            logger.warning("inotify indisponível (%s); usando stat() a cada %ss", e, poll_interval)
+
+    # Assinatura (mtime, tamanho) vista na última verificação e a do último conteúdo lido
+    vista = lida = _assinatura(filepath)
+    try:
+        while True:
+            if inotify is not None:
+                try:
+                    evento, _ = await asyncio.wait_for(inotify.fila.get(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    evento = None
+                if evento is not None and evento != nome:
+                    continue
+                origem = "inotify" if evento else "verificação periódica"
+            else:
+                await asyncio.sleep(poll_interval)
+                evento = None
+                origem = "stat"
+
+            if evento is None:
+                # Sem evento de fechamento: só lê depois de um intervalo sem mudanças
+                nova = _assinatura(filepath)
+                estavel = nova is not None and nova == vista
+                vista = nova
+                if not estavel or nova == lida:
+                    continue
+            lida = _assinatura(filepath)
+
+            conteudo, checksum = await asyncio.to_thread(ler_arquivo, filepath)
+            if checksum is not None and checksum != checksum_anterior:
+                return checksum, conteudo, origem
+    finally:
+        if inotify is not None:
+            inotify.fechar()
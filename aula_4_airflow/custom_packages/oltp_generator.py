@@ -0,0 +1,316 @@
+import argparse
+import os
+import time
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# Gerador sintético do OLTP da clínica
+# -------------------------------
+# Gera paciente/medico/clinica/consulta/agenda/faturamento com o mesmo schema de
+# create_table.sql, em qualquer escala, e carrega tudo com COPY em blocos (nada de
+# INSERT literal). Com a mesma semente e escala o resultado é idêntico: cada bloco
+# usa o próprio gerador, derivado de (semente, tabela, bloco).
+#
+# Escala 1 = 10 mil pacientes, 200 médicos, 30 clínicas e 100 mil consultas;
+# escala 10 = 1 milhão de consultas. As escolhas seguem distribuições assimétricas
+# como num sistema real: poucos médicos, clínicas e pacientes concentram a maior
+# parte das consultas (Zipf), cidades grandes têm mais pacientes, o valor depende
+# da especialidade e só consultas realizadas são faturadas.
+#
+# O prefixo permite carregar o mesmo dado em oltp_* (DAG create_oltp_database_dag)
+# ou bronze_* (scripts da aula 3: 2_silver e 3_gold_layer_construction).
+#
+#   python oltp_generator.py --escala 10 --prefixo bronze_ --dbname modeling
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CREATE_TABLE_SQL = os.path.join(BASE_DIR, "create_table.sql")
+
+BLOCK_ROWS = 100_000
+BASE_SIZES = {"paciente": 10_000, "medico": 200, "clinica": 30, "consulta": 100_000}
+TABLE_ORDER = ["paciente", "medico", "clinica", "consulta", "agenda", "faturamento"]
+
+DATE_START = np.datetime64("2020-01-01")
+DATE_END = np.datetime64("2025-12-31")
+
+CIDADES = [  # (cidade, UF, peso)
+    ("São Paulo", "SP", 12.0), ("Rio de Janeiro", "RJ", 6.7), ("Brasília", "DF", 3.0),
+    ("Salvador", "BA", 2.9), ("Fortaleza", "CE", 2.7), ("Belo Horizonte", "MG", 2.5),
+    ("Manaus", "AM", 2.2), ("Curitiba", "PR", 1.9), ("Recife", "PE", 1.6),
+    ("Goiânia", "GO", 1.5), ("Porto Alegre", "RS", 1.4), ("Belém", "PA", 1.3),
+    ("Campinas", "SP", 1.2), ("São Luís", "MA", 1.1), ("Maceió", "AL", 1.0),
+    ("Natal", "RN", 0.9), ("Florianópolis", "SC", 0.5), ("Vitória", "ES", 0.4),
+]
+PRIMEIROS_NOMES = {
+    "F": ["Ana", "Maria", "Fernanda", "Juliana", "Mariana", "Luciana", "Patrícia", "Beatriz",
+          "Camila", "Renata", "Paula", "Aline", "Larissa", "Gabriela", "Letícia", "Carla"],
+    "M": ["João", "Carlos", "Rafael", "Eduardo", "Rodrigo", "Felipe", "Gustavo", "Bruno",
+          "Ricardo", "Lucas", "Pedro", "Marcelo", "Thiago", "André", "Daniel", "Paulo"],
+}
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Ferreira",
+              "Alves", "Gomes", "Ribeiro", "Martins", "Carvalho", "Rocha", "Almeida", "Nunes",
+              "Mendes", "Araújo", "Castro", "Duarte", "Moreira", "Tavares", "Barbosa", "Cardoso"]
+ESPECIALIDADES = {  # especialidade -> (peso, valor mediano da consulta)
+    "Clínico Geral": (5.0, 180.0), "Pediatria": (3.0, 200.0), "Ginecologia": (2.5, 250.0),
+    "Cardiologia": (2.0, 320.0), "Ortopedia": (2.0, 300.0), "Dermatologia": (1.5, 260.0),
+    "Psiquiatria": (1.2, 380.0), "Endocrinologia": (1.0, 310.0),
+}
+NOMES_CLINICA = ["Clínica Vida", "Clínica Saúde Total", "Hospital Central", "Instituto Bem-Estar",
+                 "Santa Casa Saúde", "Clínica Popular", "Policlínica", "Centro Médico"]
+STATUS = (["Realizada", "Agendada", "Cancelada"], [0.75, 0.15, 0.10])
+FORMAS_PAGAMENTO = (["Convênio", "PIX", "Cartão Crédito", "Cartão Débito", "Dinheiro"],
+                    [0.40, 0.25, 0.20, 0.10, 0.05])
+
+
+def table_sizes(scale):
+    return {name: max(1, int(round(n * scale))) for name, n in BASE_SIZES.items()}
+
+
+_STREAMS = TABLE_ORDER + ["pesos"]
+
+def _rng(seed, stream, block=0):
+    return np.random.default_rng([seed, _STREAMS.index(stream), block])
+
+
+def _weights(values):
+    values = np.asarray(values, dtype=float)
+    return values / values.sum()
+
+
+def zipf_weights(n, s, rng):
+    """Pesos ∝ 1/rank^s, com os ranks embaralhados (os ids populares não são os primeiros)."""
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return _weights(weights[rng.permutation(n)])
+
+
+def _names(rng, sexo):
+    n = len(sexo)
+    primeiros = np.where(
+        sexo == "F",
+        np.array(PRIMEIROS_NOMES["F"], dtype=object)[rng.integers(0, 16, n)],
+        np.array(PRIMEIROS_NOMES["M"], dtype=object)[rng.integers(0, 16, n)],
+    )
+    sobrenomes = np.array(SOBRENOMES, dtype=object)
+    return primeiros + " " + sobrenomes[rng.integers(0, len(SOBRENOMES), n)] + " " + \
+        sobrenomes[rng.integers(0, len(SOBRENOMES), n)]
+
+
+# -------------------------------
+# Geração por tabela (DataFrames com as colunas de create_table.sql)
+# -------------------------------
+def gen_paciente(seed, first_id, n):
+    rng = _rng(seed, "paciente", first_id // BLOCK_ROWS)
+    sexo = rng.choice(np.array(["F", "M"], dtype=object), n, p=[0.52, 0.48])
+    idade_dias = np.clip(rng.normal(40, 19, n), 0, 95) * 365.25
+    cidades = rng.choice(len(CIDADES), n, p=_weights([c[2] for c in CIDADES]))
+    return pd.DataFrame({
+        "id": np.arange(first_id, first_id + n),
+        "nome": _names(rng, sexo),
+        "sexo": sexo,
+        "nascimento": np.datetime64("2025-12-31") - idade_dias.astype("timedelta64[D]"),
+        "cidade": np.array([c[0] for c in CIDADES], dtype=object)[cidades],
+        "estado": np.array([c[1] for c in CIDADES], dtype=object)[cidades],
+    })
+
+
+def gen_medico(seed, n):
+    rng = _rng(seed, "medico")
+    sexo = rng.choice(np.array(["F", "M"], dtype=object), n)
+    titulo = np.where(sexo == "F", "Dra. ", "Dr. ")
+    estado = np.array([c[1] for c in CIDADES], dtype=object)[
+        rng.choice(len(CIDADES), n, p=_weights([c[2] for c in CIDADES]))]
+    especialidades = list(ESPECIALIDADES)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "nome": titulo + _names(rng, sexo),
+        "especialidade": np.array(especialidades, dtype=object)[
+            rng.choice(len(especialidades), n, p=_weights([v[0] for v in ESPECIALIDADES.values()]))],
+        "crm": [f"{100000 + i}" for i in range(1, n + 1)],   # único por construção
+        "estado_crm": estado,
+    })
+
+
+def gen_clinica(seed, n):
+    rng = _rng(seed, "clinica")
+    cidades = rng.choice(len(CIDADES), n, p=_weights([c[2] for c in CIDADES]))
+    base = np.array(NOMES_CLINICA, dtype=object)[rng.integers(0, len(NOMES_CLINICA), n)]
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "nome": [f"{b} {i}" for i, b in enumerate(base, start=1)],
+        "cidade": np.array([c[0] for c in CIDADES], dtype=object)[cidades],
+        "estado": np.array([c[1] for c in CIDADES], dtype=object)[cidades],
+    })
+
+
+class ConsultaGenerator:
+    """Gera consultas em blocos, com agenda e faturamento coerentes com cada bloco."""
+
+    def __init__(self, seed, sizes, medicos):
+        self.seed = seed
+        self.sizes = sizes
+        rng = _rng(seed, "pesos")
+        # Pacientes crônicos voltam muito; a maioria aparece poucas vezes
+        self.p_paciente = zipf_weights(sizes["paciente"], 0.8, rng)
+        self.p_medico = zipf_weights(sizes["medico"], 0.7, rng)
+        self.p_clinica = zipf_weights(sizes["clinica"], 0.9, rng)
+        self.valor_medico = medicos["especialidade"].map(
+            {k: v[1] for k, v in ESPECIALIDADES.items()}).to_numpy(dtype=float)
+        self.n_dias = int((DATE_END - DATE_START).astype(int)) + 1
+
+    def block(self, index):
+        first_id = index * BLOCK_ROWS + 1
+        n = min(BLOCK_ROWS, self.sizes["consulta"] - first_id + 1)
+        rng = _rng(self.seed, "consulta", index)
+        ids = np.arange(first_id, first_id + n)
+        medico = rng.choice(self.sizes["medico"], n, p=self.p_medico)
+        data = DATE_START + rng.integers(0, self.n_dias, n).astype("timedelta64[D]")
+        valor = np.round(self.valor_medico[medico] * rng.lognormal(0, 0.25, n), 2)
+        status = rng.choice(np.array(STATUS[0], dtype=object), n, p=STATUS[1])
+
+        consulta = pd.DataFrame({
+            "id": ids,
+            "paciente_id": rng.choice(self.sizes["paciente"], n, p=self.p_paciente) + 1,
+            "medico_id": medico + 1,
+            "clinica_id": rng.choice(self.sizes["clinica"], n, p=self.p_clinica) + 1,
+            "data_consulta": data,
+            "valor": valor,
+            "status": status,
+        })
+        # Antecedência do agendamento: maioria em poucos dias, cauda longa até ~3 meses
+        antecedencia = np.minimum(rng.geometric(1 / 12, n), 90).astype("timedelta64[D]")
+        agenda = pd.DataFrame({"consulta_id": ids, "data_agendamento": data - antecedencia})
+
+        realizadas = status == "Realizada"
+        m = int(realizadas.sum())
+        forma = rng.choice(np.array(FORMAS_PAGAMENTO[0], dtype=object), m, p=FORMAS_PAGAMENTO[1])
+        # Convênio às vezes paga só parte; atraso de pagamento de 0 a 30 dias
+        cobertura = np.where(forma == "Convênio", rng.uniform(0.6, 1.0, m), 1.0)
+        faturamento = pd.DataFrame({
+            "consulta_id": ids[realizadas],
+            "valor_pago": np.round(valor[realizadas] * cobertura, 2),
+            "forma_pagamento": forma,
+            "data_pagamento": data[realizadas] + rng.integers(0, 31, m).astype("timedelta64[D]"),
+        })
+        return consulta, agenda, faturamento
+
+    def __iter__(self):
+        for index in range((self.sizes["consulta"] + BLOCK_ROWS - 1) // BLOCK_ROWS):
+            yield self.block(index)
+
+
+# -------------------------------
+# Carga com COPY
+# -------------------------------
+def copy_df(cursor, df, table_name):
+    buffer = StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="\\N", date_format="%Y-%m-%d")
+    buffer.seek(0)
+    cols = ", ".join(f'"{c}"' for c in df.columns)
+    cursor.copy_expert(f"COPY {table_name} ({cols}) FROM STDIN WITH CSV NULL '\\N'", buffer)
+
+
+def create_schema(cursor, prefix):
+    """Aplica create_table.sql trocando o prefixo oltp_ pelo informado."""
+    with open(CREATE_TABLE_SQL, encoding="utf-8") as f:
+        cursor.execute(f.read().replace("oltp_", prefix))
+
+
+def generate_oltp(conn, scale=1.0, seed=42, prefix="oltp_", truncate=True):
+    """
+    Gera e carrega o OLTP sintético numa transação. Retorna as linhas por tabela.
+
+    Args:
+        conn: conexão psycopg2 (ex.: PostgresHook(...).get_conn()).
+        scale (float): fator de escala (1 = 100 mil consultas).
+        seed (int): semente; mesma semente + escala = mesmos dados.
+        prefix (str): prefixo das tabelas (oltp_ ou bronze_).
+        truncate (bool): esvazia as tabelas antes (RESTART IDENTITY).
+    """
+    sizes = table_sizes(scale)
+    counts = dict.fromkeys(TABLE_ORDER, 0)
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        # Carga recriável: não precisa esperar o flush do WAL a cada commit
+        cursor.execute("SET LOCAL synchronous_commit = off")
+        create_schema(cursor, prefix)
+        if truncate:
+            cursor.execute("TRUNCATE " + ", ".join(f"{prefix}{t}" for t in reversed(TABLE_ORDER))
+                           + " RESTART IDENTITY")
+
+        for first_id in range(1, sizes["paciente"] + 1, BLOCK_ROWS):
+            df = gen_paciente(seed, first_id, min(BLOCK_ROWS, sizes["paciente"] - first_id + 1))
+            copy_df(cursor, df, f"{prefix}paciente")
+            counts["paciente"] += len(df)
+        medicos = gen_medico(seed, sizes["medico"])
+        copy_df(cursor, medicos, f"{prefix}medico")
+        copy_df(cursor, gen_clinica(seed, sizes["clinica"]), f"{prefix}clinica")
+        counts["medico"], counts["clinica"] = sizes["medico"], sizes["clinica"]
+
+        for consulta, agenda, faturamento in ConsultaGenerator(seed, sizes, medicos):
+            copy_df(cursor, consulta, f"{prefix}consulta")
+            copy_df(cursor, agenda, f"{prefix}agenda")
+            copy_df(cursor, faturamento, f"{prefix}faturamento")
+            counts["consulta"] += len(consulta)
+            counts["agenda"] += len(agenda)
+            counts["faturamento"] += len(faturamento)
+            print(f"  {counts['consulta']:,}/{sizes['consulta']:,} consultas "
+                  f"({counts['consulta'] / (time.perf_counter() - start):,.0f}/s)")
+
+        # Ids vieram explícitos: as sequences dos SERIAL precisam continuar depois deles
+        for table in ("paciente", "medico", "clinica", "consulta"):
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{prefix}{table}', 'id'), "
+                           f"(SELECT COALESCE(MAX(id), 1) FROM {prefix}{table}))")
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Erro na geração do OLTP sintético: {e}")
+        raise
+    finally:
+        cursor.close()
+
+    # Estatísticas atualizadas para os planos das consultas seguintes
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    for table in TABLE_ORDER:
+        cursor.execute(f"ANALYZE {prefix}{table}")
+    cursor.close()
+    conn.autocommit = autocommit
+
+    duration = time.perf_counter() - start
+    print(f"OLTP sintético carregado em {duration:.1f}s (escala {scale}, semente {seed}): "
+          + ", ".join(f"{prefix}{t}={n:,}" for t, n in counts.items()))
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gera e carrega o OLTP sintético da clínica via COPY.")
+    parser.add_argument("--escala", type=float, default=1.0, help="1 = 100 mil consultas.")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--prefixo", default="oltp_", help="oltp_ (aula 4) ou bronze_ (aula 3).")
+    parser.add_argument("--sem-truncate", action="store_true", help="Não esvazia as tabelas antes.")
+    parser.add_argument("--host", default=os.getenv("PG_HOST", "localhost"))
+    parser.add_argument("--port", default=os.getenv("PG_PORT", "5432"))
+    parser.add_argument("--dbname", default=os.getenv("PG_DB_MODELING", os.getenv("PG_DB")))
+    parser.add_argument("--user", default=os.getenv("PG_USER"))
+    parser.add_argument("--password", default=os.getenv("PG_PASS"))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import psycopg2
+
+    args = parse_args()
+    try:
+        conn = psycopg2.connect(host=args.host, port=args.port, dbname=args.dbname,
+                                user=args.user, password=args.password)
+    except Exception as e:
+        print(f"Erro ao conectar: {e}")
+        raise SystemExit(1)
+    try:
+        generate_oltp(conn, args.escala, args.semente, args.prefixo, truncate=not args.sem_truncate)
+    finally:
+        conn.close()
@@ -0,0 +1,99 @@
+"""
+Pipeline médico (bronze/silver/gold) usado pelas DAGs.
+
+Este módulo é importado pelo scheduler a cada parse da pasta de DAGs, então só
+contém o que é leve: constantes, registro de tabelas, credenciais e callbacks.
+O trabalho pesado (pandas, NumPy, psycopg2, SQLAlchemy) fica nos submódulos
+connection, layers e export, carregados só quando uma task usa uma função deles
+(ex.: plu_medical.gold_layer_construction importa layers na primeira chamada).
+"""
+import importlib
+import os
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FILES = {
+    "bronze_patients": os.path.join(BASE_DIR, "../../data/aula_2_banco_de_dados/patients.csv"),
+    "bronze_encounters": os.path.join(BASE_DIR, "../../data/aula_2_banco_de_dados/encounters.csv"),
+    "bronze_conditions": os.path.join(BASE_DIR, "../../data/aula_2_banco_de_dados/conditions.csv"),
+}
+
+# Exportação da camada gold em Parquet para consumidores analíticos
+GOLD_EXPORT_DIR = os.environ.get(
+    "GOLD_EXPORT_DIR", os.path.join(BASE_DIR, "../../data/gold_parquet")
+)
+GOLD_EXPORTS = {
+    "gold_obt_encounters": {"partition_cols": ["encounter_year", "encounterclass"]},
+    "gold_patient_summary": {"partition_cols": ["gender"]},
+}
+
+# Uma entrada por tabela de origem: bronze_<tabela> -> silver_<tabela>.
+# A DAG expande as tasks de bronze/silver sobre essa lista (dynamic task mapping).
+TABLES = [name.removeprefix("bronze_") for name in FILES]
+# Tabelas silver lidas pela camada gold: só elas bloqueiam a construção da gold
+GOLD_SOURCES = ["patients", "encounters"]
+# Fontes sem CSV: bronze_<tabela> é alimentada continuamente por um sink Kafka
+# (aula_5_kafka/scripts/sink_postgres_logs.py) e a DAG só constrói a silver.
+STREAM_TABLES = ["logs_aplicacoes"]
+
+# Retorno das etapas com skip_unchanged=True quando as entradas não mudaram
+# (ver plu_medical/fingerprints.py)
+UNCHANGED = "unchanged"
+
+CREDENTIALS_VARIABLE = "medical_db_credentials"
+CREDENTIALS_TTL_S = int(os.environ.get("PLU_CREDENTIALS_TTL_S", 300))
+
+_credentials_cache = {"value": None, "expires_at": 0.0}
+
+
+def get_credentials(ttl=CREDENTIALS_TTL_S):
+    """Credenciais da Variable do Airflow, em cache no processo por `ttl` segundos."""
+    now = time.monotonic()
+    if _credentials_cache["value"] is None or now >= _credentials_cache["expires_at"]:
+        from airflow.models import Variable
+        _credentials_cache["value"] = Variable.get(CREDENTIALS_VARIABLE, deserialize_json=True)
+        _credentials_cache["expires_at"] = now + ttl
+    return _credentials_cache["value"]
+
+
+# Nome público -> submódulo que o define (importado sob demanda)
+_LAZY = {
+    "connection": (
+        "get_conn", "get_engine", "checkout_conn", "release_conn",
+        "SESSION_SETTINGS", "POOL_MAX_CONN",
+    ),
+    "layers": (
+        "df_to_postgres", "register_gold_version", "sql_to_df",
+        "transform_patients", "transform_encounters", "transform_conditions",
+        "transform_logs_aplicacoes", "SILVER_TRANSFORMS",
+        "bronze_table_construction", "silver_table_construction",
+        "bronze_layer_construction", "silver_layer_construction", "gold_layer_construction", "GOLD_TABLES",
+    ),
+    "export": ("write_parquet_dataset", "read_gold_parquet", "export_gold_parquet"),
+}
+_LAZY_NAMES = {name: module for module, names in _LAZY.items() for name in names}
+
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value   # próximas consultas não passam mais por aqui
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_NAMES))
+
+
+def print_erro(context):
+    task_id = context.get("task_instance").task_id
+    dag_id = context.get("dag").dag_id
+    execution_date = context.get("execution_date")
+    exception = context.get("exception")
+    print("⚠️ ERRO DETECTADO ⚠️")
+    print(f"DAG: {dag_id}")
+    print(f"Task: {task_id}")
+    print(f"Data de execução: {execution_date}")
+    print(f"Exceção: {exception}")
@@ -0,0 +1,134 @@
+import os
+import threading
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+
+from . import get_credentials
+
+def get_conn(credentials):
+    """Retorna uma conexão psycopg2 pura."""
+    try:
+        return psycopg2.connect(
+            host=credentials["PG_HOST"],
+            port=credentials["PG_PORT"],
+            dbname=credentials["PG_DB"],
+            user=credentials["PG_USER"],
+            password=credentials["PG_PASS"],
+        )
+    except Exception as e:
+        print(f"Erro ao conectar: {e}")
+        return None
+
+
+# -------------------------------
+# Camada de conexão: credenciais em cache e pool por processo
+# -------------------------------
+# Cada task resolvia a Variable (ida ao banco de metadados) e abria um
+# psycopg2.connect novo; em tasks mapeadas curtas isso dominava o tempo total.
+# Agora a Variable é lida uma vez por processo a cada CREDENTIALS_TTL_S e as
+# conexões saem de um ThreadedConnectionPool do processo (a chave inclui o pid:
+# um processo filho de fork nunca reutiliza sockets do pai). Cada retirada aplica
+# os parâmetros de sessão do tipo de carga; a devolução faz RESET ALL.
+POOL_MAX_CONN = int(os.environ.get("PLU_POOL_MAX_CONN", 4))
+
+# Tabelas bronze/silver/gold são recriadas inteiras a cada execução: com
+# synchronous_commit=off uma queda do servidor pode perder só o último commit,
+# que a própria task refaz no retry. Os registros de controle (pipeline_fingerprints
+# e gold_load_version) decidem o que é pulado e quando caches expiram, então são
+# gravados com SET LOCAL synchronous_commit = on, que também torna duráveis os
+# commits assíncronos anteriores da mesma sessão (o WAL é descarregado em ordem).
+SESSION_SETTINGS = {
+    "bulk_load": {"synchronous_commit": "off", "maintenance_work_mem": "512MB", "work_mem": "64MB"},
+    "transform": {"synchronous_commit": "off", "work_mem": "256MB"},
+    "export": {"work_mem": "256MB", "default_transaction_read_only": "on"},
+}
+
+_pools = {}
+_checked_out = {}
+_lock = threading.Lock()
+
+
+def _pool_for(credentials):
+    key = (os.getpid(), credentials["PG_HOST"], str(credentials["PG_PORT"]),
+           credentials["PG_DB"], credentials["PG_USER"], credentials["PG_PASS"])
+    with _lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = pg_pool.ThreadedConnectionPool(
+                0, POOL_MAX_CONN,
+                host=credentials["PG_HOST"],
+                port=credentials["PG_PORT"],
+                dbname=credentials["PG_DB"],
+                user=credentials["PG_USER"],
+                password=credentials["PG_PASS"],
+            )
+            _pools[key] = pool
+    return pool
+
+
+def checkout_conn(credentials=None, workload="transform"):
+    """
+    Retira uma conexão do pool do processo já configurada para `workload`
+    (ver SESSION_SETTINGS). Devolva sempre com release_conn. Retorna None em erro.
+    """
+    try:
+        pool = _pool_for(credentials or get_credentials())
+        for attempt in range(2):
+            conn = pool.getconn()
+            ready = False
+            try:
+                cursor = conn.cursor()
+                for name, value in SESSION_SETTINGS[workload].items():
+                    cursor.execute("SELECT set_config(%s, %s, false)", (name, value))
+                cursor.close()
+                conn.commit()
+                ready = True
+                break
+            except psycopg2.OperationalError:
+                # Conexão do pool morreu (ex.: restart do servidor): tenta outra
+                if attempt:
+                    raise
+            finally:
+                if not ready:
+                    # Qualquer falha na configuração: a conexão volta ao pool, descartada
+                    pool.putconn(conn, close=True)
+        _checked_out[id(conn)] = pool
+        return conn
+    except Exception as e:
+        print(f"Erro ao conectar: {e}")
+        return None
+
+
+def release_conn(conn):
+    """Devolve a conexão ao pool com a sessão limpa (ou a fecha, se estiver quebrada)."""
+    pool = _checked_out.pop(id(conn), None)
+    if pool is None:
+        conn.close()
+        return
+    try:
+        conn.rollback()
+        cursor = conn.cursor()
+        cursor.execute("RESET ALL")
+        cursor.close()
+        conn.commit()
+        pool.putconn(conn)
+    except Exception:
+        pool.putconn(conn, close=True)
+
+
+_engines = {}
+
+def get_engine(credentials):
+    """Retorna engine SQLAlchemy (usado apenas para read_sql), uma por processo e banco."""
+    try:
+        url = (f"postgresql+psycopg2://{credentials['PG_USER']}:{credentials['PG_PASS']}"
+               f"@{credentials['PG_HOST']}:{credentials['PG_PORT']}/{credentials['PG_DB']}")
+        key = (os.getpid(), url)
+        if key not in _engines:
+            from sqlalchemy import create_engine
+            _engines[key] = create_engine(url, pool_pre_ping=True, echo=False)
+        return _engines[key]
+    except Exception as e:
+        print(f"Erro ao criar engine: {e}")
+        return None
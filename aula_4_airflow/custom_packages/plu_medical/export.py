@@ -0,0 +1,91 @@
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from . import GOLD_EXPORT_DIR, GOLD_EXPORTS
+from .connection import checkout_conn, release_conn
+from .layers import sql_to_df
+
+def write_parquet_dataset(df, table_name, partition_cols, export_dir=GOLD_EXPORT_DIR):
+    """
+    Grava um DataFrame como dataset Parquet particionado (estilo Hive) de forma atômica.
+
+    O dataset é escrito numa pasta versionada e só então publicado trocando o
+    symlink `<export_dir>/<table_name>` (os.replace é atômico), então leitores
+    nunca enxergam um dataset pela metade. A versão anterior (N-1) é mantida, porque
+    um leitor pode ter resolvido o symlink antes da troca e ainda estar lendo dela;
+    só as mais antigas são removidas.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    os.makedirs(export_dir, exist_ok=True)
+    version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    version_dir = os.path.join(export_dir, f".{table_name}-{version}")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    file_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        table,
+        version_dir,
+        format=file_format,
+        partitioning=partition_cols,
+        partitioning_flavor="hive",
+        file_options=file_format.make_write_options(
+            compression="zstd",
+            use_dictionary=True,     # colunas categóricas (classe, gênero, raça...) ficam compactas
+            write_statistics=True,   # min/max por row group permitem pular blocos nos filtros
+        ),
+        max_rows_per_group=128 * 1024,
+        existing_data_behavior="error",
+    )
+
+    link = os.path.join(export_dir, table_name)
+    previous = os.readlink(link) if os.path.islink(link) else None
+    tmp_link = f"{link}.tmp-{version}"
+    os.symlink(os.path.basename(version_dir), tmp_link)
+    os.replace(tmp_link, link)
+
+    keep = {os.path.basename(version_dir), previous}
+    for name in os.listdir(export_dir):
+        if name.startswith(f".{table_name}-") and name not in keep:
+            shutil.rmtree(os.path.join(export_dir, name), ignore_errors=True)
+
+    print(f"Tabela '{table_name}' exportada em Parquet ({len(df)} linhas).")
+
+
+def read_gold_parquet(table_name, columns=None, filters=None, export_dir=GOLD_EXPORT_DIR):
+    """
+    Lê um dataset gold exportado, com projeção de colunas e filtros que podam
+    partições e row groups, ex.: filters=[("encounter_year", "=", 2020)].
+    """
+    import pyarrow.parquet as pq
+
+    path = os.path.join(export_dir, table_name)
+    return pq.read_table(path, columns=columns, filters=filters, memory_map=True).to_pandas()
+
+
+def export_gold_parquet(credentials):
+
+    conn = checkout_conn(credentials, "export")
+    if conn is None:
+        raise RuntimeError("Sem conexão para exportar a camada gold.")
+
+    try:
+        for table_name, config in GOLD_EXPORTS.items():
+            print(f"Exportando '{table_name}'...")
+            df = sql_to_df(f'SELECT * FROM "{table_name}"', conn)
+
+            if "encounter_year" in config["partition_cols"] and "encounter_year" not in df.columns:
+                df["encounter_year"] = pd.to_datetime(df["encounter_start_date"], errors="coerce").dt.year.astype("Int64")
+
+            write_parquet_dataset(df, table_name, config["partition_cols"])
+        print("\nExportação Parquet concluída.")
+
+    except Exception as e:
+        print(f"Erro na exportação Parquet: {e}")
+        raise
+    finally:
+        release_conn(conn)
@@ -0,0 +1,139 @@
+import hashlib
+import os
+
+# -------------------------------
+# Impressões digitais das camadas
+# -------------------------------
+# Cada etapa (bronze_<tabela>, silver_<tabela>, gold) registra, ao terminar com
+# sucesso, a impressão digital das entradas que leu e das tabelas que gravou.
+# Na execução seguinte, se as entradas têm a mesma impressão e as saídas continuam
+# intactas, a etapa não tem nada novo a produzir e pode ser pulada.
+#
+# Impressão de tabela = contagem de linhas + soma dos primeiros 64 bits do md5 de
+# cada linha, calculadas no próprio PostgreSQL (nenhum dado trafega). A soma não
+# depende da ordem física das linhas, então um reload idêntico tem a mesma
+# impressão. Colunas de auditoria (execution_date) ficam de fora.
+# Impressão de arquivo = tamanho + sha256 do conteúdo.
+#
+# Cada tabela é varrida uma vez por execução: a impressão que `record` calcula para
+# as saídas de uma etapa é a entrada da etapa seguinte (output_fingerprint), sem
+# reler a tabela. Isso vale enquanto só o pipeline escreve nessas tabelas; se algo
+# de fora alterar uma saída, a verificação de saídas da etapa que a grava
+# (is_unchanged) percebe, refaz a etapa e registra a impressão nova.
+
+FINGERPRINT_TABLE = "pipeline_fingerprints"
+EXCLUDED_COLUMNS = ("execution_date",)
+
+
+def _ensure_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+            step TEXT NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('input', 'output')),
+            source TEXT NOT NULL,
+            row_count BIGINT NOT NULL,
+            content_hash TEXT NOT NULL,
+            run_id TEXT,
+            recorded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (step, kind, source)
+        )""")
+
+
+def file_fingerprint(path, block=1024 * 1024):
+    """(tamanho em bytes, sha256) de um arquivo de origem."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for part in iter(lambda: f.read(block), b""):
+            h.update(part)
+    return os.path.getsize(path), h.hexdigest()
+
+
+def table_fingerprint(conn, table, exclude=EXCLUDED_COLUMNS):
+    """(linhas, hash independente de ordem) da tabela, ou None se ela não existir."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT to_regclass(%s)", (f'"{table}"',))
+        if cursor.fetchone()[0] is None:
+            return None
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = %s ORDER BY ordinal_position",
+            (table,),
+        )
+        cols = [c for (c,) in cursor.fetchall() if c not in exclude]
+        row_text = "ROW(" + ", ".join(f'"{c}"' for c in cols) + ")::text"
+        cursor.execute(
+            f"SELECT count(*), COALESCE(sum(('x' || substr(md5({row_text}), 1, 16))"
+            f"::bit(64)::bigint::numeric), 0) FROM \"{table}\""
+        )
+        rows, total = cursor.fetchone()
+        return rows, hashlib.md5(f"{len(cols)}:{total}".encode()).hexdigest()
+    finally:
+        cursor.close()
+
+
+def output_fingerprint(conn, table):
+    """
+    Impressão de `table` registrada pela última etapa que a gravou, sem varrer a
+    tabela. Se nenhuma etapa registrou essa tabela ainda, calcula com table_fingerprint.
+    """
+    cursor = conn.cursor()
+    _ensure_table(cursor)
+    cursor.execute(
+        f"SELECT row_count, content_hash FROM {FINGERPRINT_TABLE} "
+        "WHERE kind = 'output' AND source = %s ORDER BY recorded_at DESC LIMIT 1",
+        (table,),
+    )
+    row = cursor.fetchone()
+    conn.commit()
+    cursor.close()
+    return tuple(row) if row else table_fingerprint(conn, table)
+
+
+def is_unchanged(conn, step, inputs):
+    """
+    True se `inputs` ({origem: (linhas, hash)}) são os mesmos da última execução
+    bem-sucedida de `step` e as tabelas que ela gravou não mudaram desde então.
+    """
+    cursor = conn.cursor()
+    _ensure_table(cursor)
+    cursor.execute(
+        f"SELECT kind, source, row_count, content_hash FROM {FINGERPRINT_TABLE} WHERE step = %s",
+        (step,),
+    )
+    recorded = {}
+    for kind, source, rows, content_hash in cursor.fetchall():
+        recorded.setdefault(kind, {})[source] = (rows, content_hash)
+    conn.commit()
+    cursor.close()
+
+    if not recorded.get("output") or recorded.get("input", {}) != dict(inputs):
+        return False
+    return all(table_fingerprint(conn, table) == tuple(fp) for table, fp in recorded["output"].items())
+
+
+def record(conn, step, inputs, outputs, run_id=None):
+    """
+    Registra as entradas lidas e as saídas gravadas por uma execução bem-sucedida de
+    `step`. Retorna {tabela: (linhas, hash)} das saídas.
+    """
+    output_fps = {table: table_fingerprint(conn, table) for table in outputs}
+    rows = [("input", source, fp) for source, fp in inputs.items()]
+    rows += [("output", table, fp) for table, fp in output_fps.items()]
+    cursor = conn.cursor()
+    # As decisões de pular etapas dependem deste registro: commit síncrono mesmo
+    # em sessões com synchronous_commit=off (ver connection.SESSION_SETTINGS)
+    cursor.execute("SET LOCAL synchronous_commit = on")
+    _ensure_table(cursor)
+    cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE step = %s", (step,))
+    for kind, source, fp in rows:
+        if fp is None:
+            continue
+        cursor.execute(
+            f"INSERT INTO {FINGERPRINT_TABLE} (step, kind, source, row_count, content_hash, run_id) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            (step, kind, source, fp[0], fp[1], run_id),
+        )
+    conn.commit()
+    cursor.close()
+    return output_fps
@@ -0,0 +1,287 @@
+import os
+import sys
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from . import BASE_DIR, FILES, GOLD_SOURCES, STREAM_TABLES, TABLES, UNCHANGED
+from . import fingerprints
+from .connection import checkout_conn, release_conn
+
+# Registro de versão da gold, compartilhado com os scripts (scripts/gold_version.py)
+sys.path.append(os.path.join(BASE_DIR, "../../scripts"))
+from gold_version import register_gold_version  # noqa: E402
+
+def df_to_postgres(df, table_name, conn, if_exists="replace", commit=True):
+    """
+    Carrega um DataFrame no PostgreSQL usando psycopg2 puro via COPY.
+    Compatível com pandas 3.x sem depender do SQLAlchemy para escrita.
+    Com commit=False a carga fica na transação aberta (quem chama faz o commit).
+    """
+    cursor = conn.cursor()
+
+    if if_exists == "replace":
+        cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+
+    # Cria a tabela com base nas colunas do DataFrame
+    cols = []
+    for col, dtype in df.dtypes.items():
+        if "int" in str(dtype):
+            pg_type = "BIGINT"
+        elif "float" in str(dtype):
+            pg_type = "DOUBLE PRECISION"
+        elif "datetime" in str(dtype):
+            pg_type = "TIMESTAMP"
+        else:
+            pg_type = "TEXT"
+        cols.append(f'"{col}" {pg_type}')
+
+    create_sql = f'CREATE TABLE IF NOT EXISTS "{table_name}" ({", ".join(cols)})'
+    cursor.execute(create_sql)
+
+    # Usa COPY para inserção rápida
+    buffer = StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY "{table_name}" FROM STDIN WITH CSV NULL \'\\N\'',
+        buffer
+    )
+
+    if commit:
+        conn.commit()
+    cursor.close()
+    print(f"Tabela '{table_name}' carregada com sucesso ({len(df)} linhas).")
+
+def sql_to_df(query, pg_conn):
+    """Lê dados via psycopg2 puro, compatível com pandas 3.x."""
+    return pd.read_sql(query, con=pg_conn)
+
+
+def transform_patients(df):
+    print("Transformando pacientes...")
+    cols = [
+        "id", "birthdate", "gender", "race", "ethnicity",
+        "first", "middle", "last", "deathdate",
+        "healthcare_expenses", "healthcare_coverage", "income"
+    ]
+    patients = df[cols].copy()
+    patients["full_name"] = (
+        patients["first"].fillna("") + " " +
+        patients["middle"].fillna("") + " " +
+        patients["last"].fillna("")
+    ).str.strip().replace(r"\s+", " ", regex=True)
+    patients["death"] = np.where(patients["deathdate"].notna(), "dead", "alive")
+    patients["coverage_minus_expenses"] = (
+        patients["healthcare_coverage"].fillna(0) - patients["healthcare_expenses"].fillna(0)
+    )
+    patients["over_expenses"] = np.where(patients["coverage_minus_expenses"] < 0, 1, 0)
+    patients["income"] = patients["income"].fillna(0)
+    return patients.drop(columns=["first", "middle", "last"])
+
+def transform_encounters(df):
+    print("Transformando encontros...")
+    cols = [
+        "id", "start", "stop", "patient", "encounterclass", "description",
+        "base_encounter_cost", "total_claim_cost", "payer_coverage", "reasondescription"
+    ]
+    encounters = df[cols].copy()
+    encounters = encounters.dropna(subset=["id", "patient"])
+    encounters["start"] = pd.to_datetime(encounters["start"], errors="coerce")
+    encounters["stop"] = pd.to_datetime(encounters["stop"], errors="coerce")
+    encounters["duration_hours"] = (
+        (encounters["stop"] - encounters["start"]).dt.total_seconds() / 3600
+    )
+    return encounters
+
+def transform_conditions(df):
+    print("Transformando condições...")
+    cols = ["start", "stop", "patient", "description"]
+    conditions = df[cols].copy()
+    conditions["condition"] = conditions["description"].str.replace(r"\s*\(.*\)", "", regex=True).str.strip()
+    conditions["condition_type"] = conditions["description"].str.extract(r"\((.*?)\)")
+    return conditions
+
+def transform_logs_aplicacoes(df):
+    print("Transformando logs de aplicações...")
+    cols = ["api", "status", "tempo_resposta_ms", "timestamp", "kafka_particao", "kafka_offset"]
+    logs = df[cols].drop_duplicates(subset=["kafka_particao", "kafka_offset"]).copy()
+    logs["timestamp"] = pd.to_datetime(logs["timestamp"], errors="coerce")
+    logs = logs.dropna(subset=["api", "timestamp"])
+    logs["data"] = logs["timestamp"].dt.strftime("%Y-%m-%d")
+    logs["erro"] = np.where(logs["status"] == "ERRO", 1, 0)
+    logs["lento"] = np.where(logs["status"] == "LENTO", 1, 0)
+    return logs
+
+SILVER_TRANSFORMS = {
+    "patients": transform_patients,
+    "encounters": transform_encounters,
+    "conditions": transform_conditions,
+    "logs_aplicacoes": transform_logs_aplicacoes,
+}
+
+
+
+def bronze_table_construction(credentials, table, skip_unchanged=False, run_id=None):
+    """
+    Carrega um CSV na tabela bronze_<table>. Falhas são propagadas (retry só desta tabela).
+    Com skip_unchanged, retorna UNCHANGED sem recarregar se o CSV e a tabela não mudaram.
+    """
+    table_name, fname = f"bronze_{table}", FILES[f"bronze_{table}"]
+
+    conn = checkout_conn(credentials, "bulk_load")
+    if conn is None:
+        raise RuntimeError(f"Sem conexão para carregar '{table_name}'.")
+
+    try:
+        inputs = {fname: fingerprints.file_fingerprint(fname)}
+        if skip_unchanged and fingerprints.is_unchanged(conn, table_name, inputs):
+            print(f"'{fname}' não mudou desde a última carga de '{table_name}'. Pulando.")
+            return UNCHANGED
+
+        print(f"Carregando '{fname}' para '{table_name}'...")
+        df = pd.read_csv(fname, low_memory=False)
+
+        if df.empty:
+            print(f"DataFrame vazio para {fname}. Pulando.")
+            return table
+
+        df['execution_date'] = datetime.today().strftime('%Y-%m-%d')
+        df_to_postgres(df, table_name, conn)
+        fingerprints.record(conn, table_name, inputs, [table_name], run_id)
+        return table
+
+    except Exception as e:
+        print(f"Erro no arquivo {fname}: {e}")
+        raise
+    finally:
+        release_conn(conn)
+
+
+def silver_table_construction(credentials, table, skip_unchanged=False, run_id=None):
+    """
+    Lê bronze_<table>, aplica a transformação registrada e grava silver_<table>.
+    Com skip_unchanged, retorna UNCHANGED se bronze_<table> é a mesma da última construção.
+    """
+    conn = checkout_conn(credentials, "transform")
+    if conn is None:
+        raise RuntimeError(f"Sem conexão para construir 'silver_{table}'.")
+
+    try:
+        inputs = {f"bronze_{table}": fingerprints.output_fingerprint(conn, f"bronze_{table}")}
+        if table in STREAM_TABLES and inputs[f"bronze_{table}"] is None:
+            print(f"'bronze_{table}' ainda não existe (o sink de streaming não rodou). Pulando.")
+            return UNCHANGED
+        if skip_unchanged and fingerprints.is_unchanged(conn, f"silver_{table}", inputs):
+            print(f"'bronze_{table}' não mudou desde a última construção de 'silver_{table}'. Pulando.")
+            return UNCHANGED
+
+        print(f"Lendo 'bronze_{table}'...")
+        df = sql_to_df(f'SELECT * FROM "bronze_{table}"', conn)
+        df.columns = df.columns.str.strip().str.lower()
+
+        df_to_postgres(SILVER_TRANSFORMS[table](df), f"silver_{table}", conn)
+        fingerprints.record(conn, f"silver_{table}", inputs, [f"silver_{table}"], run_id)
+        return table
+
+    except Exception as e:
+        print(f"Erro na tarefa silver ({table}): {e}")
+        raise
+    finally:
+        release_conn(conn)
+
+
+def bronze_layer_construction(credentials):
+    """Camada bronze inteira numa chamada (scripts e execuções manuais)."""
+    for table in TABLES:
+        try:
+            bronze_table_construction(credentials, table)
+        except Exception:
+            continue
+    print("\nCarga bronze concluída.")
+
+
+def silver_layer_construction(credentials):
+    """Camada silver inteira numa chamada (scripts e execuções manuais)."""
+    for table in TABLES + STREAM_TABLES:
+        try:
+            silver_table_construction(credentials, table)
+        except Exception:
+            continue
+    print("\nCamada silver concluída.")
+
+
+GOLD_TABLES = ["gold_obt_encounters", "gold_patient_summary"]
+
+
+def gold_layer_construction(credentials, skip_unchanged=False, run_id=None):
+    """
+    Constrói a OBT e o resumo por paciente a partir das silver em GOLD_SOURCES.
+    Com skip_unchanged, retorna UNCHANGED se essas silver são as mesmas da última
+    construção (e aí não registra nova versão da gold: caches continuam válidos).
+    Falhas são propagadas, como nas etapas bronze e silver.
+    """
+
+    def create_one_big_table(patients_df, encounters_df):
+        print("Criando OBT...")
+        obt = encounters_df.merge(
+            patients_df, left_on="patient", right_on="id",
+            how="left", suffixes=("_encounter", "_patient")
+        )
+        obt = obt.rename(columns={
+            "id_encounter": "encounter_id",
+            "patient": "patient_id",
+            "start": "encounter_start_date",
+            "stop": "encounter_end_date",
+            "description": "encounter_description",
+            "id_patient": "patient_original_id"
+        })
+        cols = [
+            "encounter_id", "patient_id", "encounter_start_date", "encounter_end_date",
+            "encounterclass", "encounter_description", "duration_hours",
+            "total_claim_cost", "payer_coverage", "gender", "race", "ethnicity", "full_name"
+        ]
+        return obt[cols]
+
+    def create_patient_summary(patients_df, encounters_df):
+        print("Criando resumo por paciente...")
+        agg = encounters_df.groupby('patient').agg(
+            total_encounters=('id', 'count'),
+            total_claim_cost=('total_claim_cost', 'sum'),
+            avg_encounter_duration_hours=('duration_hours', 'mean')
+        ).reset_index().rename(columns={'patient': 'id'})
+        summary = patients_df.merge(agg, on='id', how='left')
+        return summary.rename(columns={'id': 'patient_id'}).fillna(0)
+
+    conn = checkout_conn(credentials, "transform")
+    if conn is None:
+        raise RuntimeError("Sem conexão para construir a camada gold.")
+
+    try:
+        inputs = {f"silver_{t}": fingerprints.output_fingerprint(conn, f"silver_{t}") for t in GOLD_SOURCES}
+        if skip_unchanged and fingerprints.is_unchanged(conn, "gold", inputs):
+            print("Camada silver não mudou desde a última construção da gold. Pulando.")
+            return UNCHANGED
+
+        print("\nLendo camada silver...")
+        patients = sql_to_df("SELECT * FROM silver_patients", conn)
+        encounters = sql_to_df("SELECT * FROM silver_encounters", conn)
+        print("\nExtração silver concluída.")
+
+        obt_df = create_one_big_table(patients, encounters)
+        summary_df = create_patient_summary(patients, encounters)
+
+        print("\nCarregando camada gold...")
+        df_to_postgres(obt_df, "gold_obt_encounters", conn)
+        df_to_postgres(summary_df, "gold_patient_summary", conn)
+        register_gold_version(conn, "new_pipeline_dag")
+        fingerprints.record(conn, "gold", inputs, GOLD_TABLES, run_id)
+        print("\nCamada gold concluída.")
+
+    except Exception as e:
+        print(f"Erro na tarefa gold: {e}")
+        raise
+    finally:
+        release_conn(conn)
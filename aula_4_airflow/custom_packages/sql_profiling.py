@@ -0,0 +1,263 @@
+import hashlib
+import json
+import re
+import time
+
+import sqlparse
+from airflow.providers.common.sql.operators.sql import SQLExecuteQueryOperator
+
+# -------------------------------
+# Perfil de execução dos arquivos SQL das DAGs
+# -------------------------------
+# O SQLExecuteQueryOperator executa create_table.sql, insert_into.sql e
+# query_to_run.sql sem deixar rastro de quanto cada comando levou. Este operador
+# faz o mesmo trabalho (mesmo conn_id, mesmo arquivo templado, mesma transação),
+# mas separa o arquivo em comandos com sqlparse e registra, para cada um:
+# duração, linhas afetadas e, para SELECT e CREATE TABLE ... AS, o plano real
+# (EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)).
+#
+# A captura de planos é opcional (capture_plans=False por padrão). Os CTAS (ex.:
+# insight_one) rodam DENTRO do EXPLAIN ANALYZE, então são executados uma única vez
+# e o plano é o da própria carga. SELECTs puros rodam normalmente e o EXPLAIN
+# ANALYZE é feito depois num SAVEPOINT desfeito: a consulta roda duas vezes, e a
+# segunda só é segura dentro de transação. Com autocommit, efeitos colaterais da
+# segunda execução (funções voláteis, DML em CTE) seriam reais, então a captura de
+# planos de SELECT é recusada.
+#
+# Tudo vai para a tabela de histórico (sql_profile_history, no mesmo banco). Cada
+# comando é identificado pelo hash do texto normalizado e comparado com a mediana
+# das últimas execuções do mesmo comando na mesma task: acima de
+# `regression_factor` x a mediana (e com pelo menos `regression_min_delta_ms` de
+# diferença, para ignorar ruído em comandos de milissegundos) a linha é marcada
+# como regressão e aparece no log da task.
+
+HISTORY_TABLE = "sql_profile_history"
+
+_CTAS = re.compile(r"^\s*CREATE\s+(?:(?:GLOBAL|LOCAL)\s+)?(?:TEMP(?:ORARY)?\s+|UNLOGGED\s+)?TABLE\b.*?\bAS\s*\(?\s*(?:SELECT|WITH)\b",
+                   re.IGNORECASE | re.DOTALL)
+
+
+def split_statements(sql):
+    """Lista de comandos do arquivo, sem comentários soltos nem comandos vazios."""
+    if isinstance(sql, (list, tuple)):
+        sql = ";\n".join(sql)
+    statements = []
+    for statement in sqlparse.split(sql):
+        if sqlparse.format(statement, strip_comments=True).strip().rstrip(";").strip():
+            statements.append(statement.strip().rstrip(";"))
+    return statements
+
+
+def statement_kind(statement):
+    """'CTAS', 'SELECT', 'INSERT', 'CREATE', 'DROP'... (UNKNOWN se o sqlparse não souber)."""
+    if _CTAS.match(sqlparse.format(statement, strip_comments=True)):
+        return "CTAS"
+    return sqlparse.parse(statement)[0].get_type()
+
+
+def statement_hash(statement):
+    """Identidade estável do comando: ignora comentários, espaços e caixa das palavras-chave."""
+    normalized = sqlparse.format(statement, strip_comments=True, keyword_case="upper")
+    normalized = " ".join(normalized.split())
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def _plan_totals(plan):
+    """Linhas e buffers do nó raiz de um EXPLAIN (FORMAT JSON)."""
+    root = plan[0]["Plan"]
+    return {
+        "rows": int(root.get("Actual Rows", 0) * root.get("Actual Loops", 1)),
+        "shared_hit_blocks": root.get("Shared Hit Blocks"),
+        "shared_read_blocks": root.get("Shared Read Blocks"),
+        "planning_ms": plan[0].get("Planning Time"),
+        "execution_ms": plan[0].get("Execution Time"),
+    }
+
+
+class ProfiledSQLExecuteQueryOperator(SQLExecuteQueryOperator):
+    """
+    SQLExecuteQueryOperator que mede cada comando do SQL e grava o histórico.
+
+    Args:
+        capture_plans (bool): captura EXPLAIN (ANALYZE, BUFFERS) de SELECT e CTAS.
+            SELECTs rodam uma segunda vez para isso; exige autocommit=False se houver SELECT.
+        history_table (str): tabela de histórico (criada se não existir).
+        baseline_runs (int): execuções anteriores usadas na mediana de referência.
+        regression_factor (float): razão duração / mediana que marca regressão.
+        regression_min_delta_ms (float): diferença mínima, em ms, para marcar regressão.
+        fail_on_regression (bool): falha a task (depois de gravar o histórico) se houver regressão.
+
+    conn_id, sql, autocommit e os argumentos de BaseOperator são os do
+    SQLExecuteQueryOperator. Diferenças em relação a ele:
+
+    - o SQL é sempre separado em comandos (sqlparse) e os resultados não passam
+      por um handler: handler, return_last e split_statements são recusados;
+    - parameters só é aceito quando o SQL tem um único comando (não há como saber
+      a qual dos comandos separados os parâmetros pertencem);
+    - o retorno (XCom) não são as linhas das consultas, e sim uma lista com o
+      resumo de cada comando: index, kind, hash, duration_ms, rows, baseline_ms,
+      regression e, com plano, shared_hit_blocks/shared_read_blocks.
+    """
+
+    _UNSUPPORTED = ("handler", "return_last", "split_statements")
+
+    def __init__(self, *, capture_plans=False, history_table=HISTORY_TABLE, baseline_runs=5,
+                 regression_factor=1.5, regression_min_delta_ms=50.0, fail_on_regression=False, **kwargs):
+        unsupported = [name for name in self._UNSUPPORTED if name in kwargs]
+        if unsupported:
+            raise TypeError(f"{type(self).__name__} não aceita {', '.join(unsupported)}: "
+                            "o SQL é sempre separado em comandos e o retorno é o perfil de cada um.")
+        super().__init__(**kwargs)
+        self.capture_plans = capture_plans
+        self.history_table = history_table
+        self.baseline_runs = baseline_runs
+        self.regression_factor = regression_factor
+        self.regression_min_delta_ms = regression_min_delta_ms
+        self.fail_on_regression = fail_on_regression
+
+    # -------------------------------
+    # Execução
+    # -------------------------------
+    def _run_statement(self, cursor, index, statement):
+        kind = statement_kind(statement)
+        profile = {"index": index, "kind": kind, "hash": statement_hash(statement),
+                   "statement": statement, "plan": None}
+        explain = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+        start = time.perf_counter()
+        if self.capture_plans and kind == "CTAS":
+            cursor.execute(explain + statement, self.parameters)
+            profile["plan"] = cursor.fetchone()[0]
+        else:
+            cursor.execute(statement, self.parameters)
+        profile["duration_ms"] = (time.perf_counter() - start) * 1000
+        profile["rows"] = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+
+        if self.capture_plans and kind == "SELECT":
+            # Em transação, o savepoint isola qualquer efeito da segunda execução
+            if not self.autocommit:
+                cursor.execute("SAVEPOINT sql_profiling")
+            cursor.execute(explain + statement, self.parameters)
+            profile["plan"] = cursor.fetchone()[0]
+            if not self.autocommit:
+                cursor.execute("ROLLBACK TO SAVEPOINT sql_profiling")
+
+        if profile["plan"] is not None:
+            if isinstance(profile["plan"], str):
+                profile["plan"] = json.loads(profile["plan"])
+            totals = _plan_totals(profile["plan"])
+            if kind == "CTAS":
+                profile["rows"] = totals["rows"]
+            profile.update({k: totals[k] for k in ("shared_hit_blocks", "shared_read_blocks")})
+        return profile
+
+    def execute(self, context):
+        statements = split_statements(self.sql)
+        if self.parameters and len(statements) > 1:
+            raise ValueError(f"parameters só é aceito com um único comando; o SQL tem {len(statements)}.")
+        if self.capture_plans and self.autocommit and any(statement_kind(st) == "SELECT" for st in statements):
+            raise ValueError("capture_plans com autocommit=True executaria os SELECTs de novo fora de "
+                             "transação (sem SAVEPOINT para desfazer efeitos); use autocommit=False.")
+        conn = self.get_db_hook().get_conn()
+        profiles = []
+        try:
+            conn.autocommit = bool(self.autocommit)
+            cursor = conn.cursor()
+            try:
+                for index, statement in enumerate(statements):
+                    profiles.append(self._run_statement(cursor, index, statement))
+                commit_start = time.perf_counter()
+                if not self.autocommit:
+                    conn.commit()
+                commit_ms = (time.perf_counter() - commit_start) * 1000
+            except Exception:
+                conn.rollback()
+                self.log.error("Falha no comando %d de %d (transação desfeita).", len(profiles) + 1, len(statements))
+                self._log_profiles(profiles)
+                raise
+            finally:
+                cursor.close()
+
+            conn.autocommit = False
+            self._flag_and_store(conn, context, profiles)
+        finally:
+            conn.close()
+
+        self._log_profiles(profiles)
+        self.log.info("Commit: %.1f ms", commit_ms)
+        regressions = [p for p in profiles if p["regression"]]
+        if regressions and self.fail_on_regression:
+            raise RuntimeError(f"{len(regressions)} comando(s) com regressão de tempo: "
+                               + ", ".join(f"#{p['index']} ({p['kind']})" for p in regressions))
+        return [{k: v for k, v in p.items() if k not in ("plan", "statement")} for p in profiles]
+
+    # -------------------------------
+    # Histórico e regressões
+    # -------------------------------
+    def _flag_and_store(self, conn, context, profiles):
+        dag_id, task_id = self.dag_id, self.task_id
+        run_id = context["run_id"] if context else None
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.history_table} (
+                id BIGSERIAL PRIMARY KEY,
+                dag_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                run_id TEXT,
+                statement_index INT NOT NULL,
+                statement_hash TEXT NOT NULL,
+                statement_kind TEXT,
+                statement_text TEXT,
+                duration_ms DOUBLE PRECISION NOT NULL,
+                rows_affected BIGINT,
+                shared_hit_blocks BIGINT,
+                shared_read_blocks BIGINT,
+                plan JSONB,
+                baseline_ms DOUBLE PRECISION,
+                regression BOOLEAN NOT NULL DEFAULT FALSE,
+                recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )""")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.history_table}_lookup_idx "
+                       f"ON {self.history_table} (dag_id, task_id, statement_hash, recorded_at DESC)")
+
+        for p in profiles:
+            # Mediana das últimas execuções do mesmo comando (antes de gravar a atual)
+            cursor.execute(f"""
+                SELECT percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms)
+                FROM (
+                    SELECT duration_ms FROM {self.history_table}
+                    WHERE dag_id = %s AND task_id = %s AND statement_hash = %s
+                    ORDER BY recorded_at DESC
+                    LIMIT %s
+                ) recentes""", (dag_id, task_id, p["hash"], self.baseline_runs))
+            baseline = cursor.fetchone()[0]
+            p["baseline_ms"] = baseline
+            p["regression"] = bool(
+                baseline is not None
+                and p["duration_ms"] > baseline * self.regression_factor
+                and p["duration_ms"] - baseline >= self.regression_min_delta_ms
+            )
+            cursor.execute(f"""
+                INSERT INTO {self.history_table} (
+                    dag_id, task_id, run_id, statement_index, statement_hash, statement_kind,
+                    statement_text, duration_ms, rows_affected, shared_hit_blocks,
+                    shared_read_blocks, plan, baseline_ms, regression
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""", (
+                dag_id, task_id, run_id, p["index"], p["hash"], p["kind"], p["statement"],
+                p["duration_ms"], p["rows"], p.get("shared_hit_blocks"), p.get("shared_read_blocks"),
+                json.dumps(p["plan"]) if p["plan"] is not None else None, baseline, p["regression"],
+            ))
+        conn.commit()
+        cursor.close()
+
+    def _log_profiles(self, profiles):
+        for p in profiles:
+            first_line = " ".join(p["statement"].split())[:70]
+            line = f"#{p['index']:<3} {p['kind']:<8} {p['duration_ms']:>10.1f} ms  linhas={p['rows']}"
+            if p.get("shared_hit_blocks") is not None:
+                line += f"  buffers hit/read={p['shared_hit_blocks']}/{p['shared_read_blocks']}"
+            if p.get("baseline_ms") is not None:
+                line += f"  mediana={p['baseline_ms']:.1f} ms"
+            if p.get("regression"):
+                line += "  ⚠️ REGRESSÃO"
+            self.log.info("%s  %s", line, first_line)
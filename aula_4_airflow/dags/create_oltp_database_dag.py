@@ -1,11 +1,16 @@
-from airflow.decorators import dag
+from airflow.decorators import dag, task
+from airflow.models.param import Param
 from airflow.providers.standard.operators.empty import EmptyOperator
-from airflow.providers.common.sql.operators.sql import SQLExecuteQueryOperator
 from datetime import datetime, timedelta
 import os
+import sys
 
 # Caminho do AIRFLOW_HOME
 AIRFLOW_HOME = os.environ.get("AIRFLOW_HOME")
+sys.path.append(AIRFLOW_HOME)
+
+# Mesmo SQLExecuteQueryOperator, com tempo/plano por comando gravados em sql_profile_history
+from custom_packages.sql_profiling import ProfiledSQLExecuteQueryOperator
 
 # Caminho onde estão os arquivos SQL
 TEMPLATE_PATH = os.path.join(AIRFLOW_HOME, "custom_packages")
@@ -24,6 +29,12 @@ DEFAULT_ARGS = {
     dagrun_timeout=timedelta(hours=1),
     max_active_runs=1,
     template_searchpath=TEMPLATE_PATH,  # IMPORTANTE: sem lista
+    params={
+        # "estatico": insert_into.sql (poucas linhas); "sintetico": oltp_generator via COPY
+        "modo_carga": Param("estatico", enum=["estatico", "sintetico"]),
+        "escala": Param(1.0, type="number", minimum=0.01),  # 1 = 100 mil consultas
+        "semente": Param(42, type="integer"),
+    },
 )
 def oltp_medallion_pipeline():
 
@@ -31,25 +42,49 @@ def oltp_medallion_pipeline():
         task_id="start_pipeline"
     )
 
-    create_oltp_structure = SQLExecuteQueryOperator(
+    create_oltp_structure = ProfiledSQLExecuteQueryOperator(
         task_id="create_oltp_structure",
         conn_id="postgres_oltp_conn",
         sql="create_table.sql",
         autocommit=False, # Persiste no banco após todo o arquivo ser executado no banco
+        capture_plans=True,  # EXPLAIN ANALYZE dentro da transação (SELECTs via SAVEPOINT)
     )
 
-    insert_oltp_data = SQLExecuteQueryOperator(
+    insert_oltp_data = ProfiledSQLExecuteQueryOperator(
         task_id="insert_oltp_data",
         conn_id="postgres_oltp_conn",
         sql="insert_into.sql",
         autocommit=False, # Persiste no banco após todo o arquivo ser executado no banco
+        capture_plans=True,  # EXPLAIN ANALYZE dentro da transação (SELECTs via SAVEPOINT)
     )
 
+    # Escolhe a carga pelo parâmetro da execução (Trigger DAG w/ config)
+    @task.branch()
+    def choose_load_mode(params=None):
+        if params["modo_carga"] == "sintetico":
+            return "generate_oltp_data"
+        return "insert_oltp_data"
+
+    @task()
+    def generate_oltp_data(params=None):
+        # Imports dentro da task: numpy/pandas não entram no parse da DAG
+        from airflow.providers.postgres.hooks.postgres import PostgresHook
+        from custom_packages.oltp_generator import generate_oltp
+
+        conn = PostgresHook(postgres_conn_id="postgres_oltp_conn").get_conn()
+        try:
+            return generate_oltp(conn, scale=params["escala"], seed=params["semente"])
+        finally:
+            conn.close()
+
     end_pipeline = EmptyOperator(
-        task_id="end_pipeline"
+        task_id="end_pipeline",
+        trigger_rule="none_failed_min_one_success",  # um dos ramos é sempre pulado
     )
 
-    start_pipeline >> create_oltp_structure >> insert_oltp_data >> end_pipeline
+    load_mode = choose_load_mode()
+    start_pipeline >> create_oltp_structure >> load_mode
+    load_mode >> [insert_oltp_data, generate_oltp_data()] >> end_pipeline
 
 
 dag_instance = oltp_medallion_pipeline()
\ No newline at end of file
@@ -1,9 +1,9 @@
-from airflow.decorators import dag, task
+from airflow.decorators import dag, task, task_group
 from airflow.operators.empty import EmptyOperator
+from airflow.exceptions import AirflowSkipException
 from datetime import datetime, timedelta
 import os
 import sys
-from airflow.models import Variable
 
 AIRFLOW_HOME = os.environ.get("AIRFLOW_HOME")
 sys.path.append(AIRFLOW_HOME)
@@ -32,28 +32,72 @@ def new_pipeline():
 
     start_pipeline = EmptyOperator(task_id='start_pipeline')
 
-    @task()
-    def bronze_layer_construction():
-        credentials = Variable.get("medical_db_credentials", deserialize_json=True)
-        plu_medical.bronze_layer_construction(credentials)
+    # Bronze e silver são expandidas por tabela (dynamic task mapping sobre
+    # plu_medical.TABLES): cada tabela tem suas próprias tasks e retries, e as
+    # instâncias se espalham pelos workers do pool.
+    #
+    # Cada etapa compara a impressão digital das suas entradas (CSV, bronze ou
+    # silver) com a da última execução bem-sucedida (tabela pipeline_fingerprints)
+    # e fica "skipped" se nada mudou. Silver e gold usam trigger_rule="none_failed"
+    # para fazer a própria verificação mesmo quando a etapa anterior foi pulada;
+    # a exportação segue o padrão (all_success) e só roda se a gold foi refeita.
+    def skip_if_unchanged(result, step):
+        if result == plu_medical.UNCHANGED:
+            raise AirflowSkipException(f"{step}: entradas iguais às da última execução.")
+        return result
 
     @task()
-    def silver_layer_construction():
-        credentials = Variable.get("medical_db_credentials", deserialize_json=True)
-        plu_medical.silver_layer_construction(credentials)
+    def bronze_table_construction(table, run_id=None):
+        credentials = plu_medical.get_credentials()  # cache por processo (TTL)
+        return skip_if_unchanged(plu_medical.bronze_table_construction(
+            credentials, table, skip_unchanged=True, run_id=run_id), f"bronze_{table}")
+
+    @task(trigger_rule="none_failed")
+    def silver_table_construction(table, run_id=None):
+        credentials = plu_medical.get_credentials()  # cache por processo (TTL)
+        return skip_if_unchanged(plu_medical.silver_table_construction(
+            credentials, table, skip_unchanged=True, run_id=run_id), f"silver_{table}")
+
+    # Dentro do grupo mapeado, silver[i] espera apenas bronze[i]: uma falha em
+    # 'conditions' não reprocessa nem bloqueia 'encounters'. A dependência é
+    # explícita (e não via XCom) para que um bronze pulado não pule o silver.
+    @task_group()
+    def table_layers(table):
+        bronze = bronze_table_construction(table)
+        silver = silver_table_construction(table)
+        bronze >> silver
+        return silver
+
+    @task(trigger_rule="none_failed")
+    def gold_layer_construction(run_id=None):
+        credentials = plu_medical.get_credentials()  # cache por processo (TTL)
+        skip_if_unchanged(plu_medical.gold_layer_construction(
+            credentials, skip_unchanged=True, run_id=run_id), "gold")
 
     @task()
-    def gold_layer_construction():
-        credentials = Variable.get("medical_db_credentials", deserialize_json=True)
-        plu_medical.gold_layer_construction(credentials)
+    def export_gold_parquet():
+        credentials = plu_medical.get_credentials()  # cache por processo (TTL)
+        plu_medical.export_gold_parquet(credentials)
 
-    end_pipeline = EmptyOperator(task_id='end_pipeline')
+    end_pipeline = EmptyOperator(task_id='end_pipeline', trigger_rule='none_failed')
 
-    bronze = bronze_layer_construction()
-    silver = silver_layer_construction()
+    # A gold só depende das tabelas que lê (plu_medical.GOLD_SOURCES)
+    gold_sources = table_layers.override(group_id="gold_source_tables").expand(
+        table=plu_medical.GOLD_SOURCES
+    )
+    other_tables = table_layers.override(group_id="other_tables").expand(
+        table=[t for t in plu_medical.TABLES if t not in plu_medical.GOLD_SOURCES]
+    )
+    # Fontes de streaming (bronze carregada pelo sink Kafka): só a etapa silver
+    stream_tables = silver_table_construction.override(task_id="stream_silver_tables").expand(
+        table=plu_medical.STREAM_TABLES
+    )
     gold = gold_layer_construction()
+    export = export_gold_parquet()
 
-    start_pipeline >> bronze >> silver >> gold >> end_pipeline
+    start_pipeline >> [gold_sources, other_tables, stream_tables]
+    gold_sources >> gold >> export >> end_pipeline
+    [other_tables, stream_tables] >> end_pipeline
 
 # Instancia a DAG no escopo global
 dag_instance = new_pipeline()
\ No newline at end of file
@@ -1,9 +1,8 @@
-from airflow.decorators import dag
+from airflow.decorators import dag, task
 from airflow.providers.standard.operators.empty import EmptyOperator
-from airflow.providers.common.sql.operators.sql import SQLExecuteQueryOperator
-from airflow.sensors.filesystem import FileSensor
 from datetime import datetime, timedelta
 import os
+import sys
 
 # Argumentos padrão
 DEFAULT_ARGS = {
@@ -14,8 +13,23 @@ DEFAULT_ARGS = {
 # --- CONFIGURAÇÃO ESPECÍFICA DE CAMINHOS ---
 # O Airflow JÁ ESTÁ configurado para procurar templates aqui:
 AIRFLOW_HOME = os.environ.get("AIRFLOW_HOME")
+sys.path.append(AIRFLOW_HOME)
+
+from custom_packages.file_triggers import ArquivoAlteradoSensor, registrar_checksum
+from custom_packages.file_watch import ler_texto_verificado
+from custom_packages.sql_profiling import ProfiledSQLExecuteQueryOperator
+
 MONITORED_DIR = os.path.join(AIRFLOW_HOME, "custom_packages")
 SQL_FILE_TO_MONITOR = 'query_to_run.sql' # Nome do arquivo que a DAG vai esperar
+CHECKSUM_VARIABLE = 'sql_file_monitor_checksum' # sha256 da última versão executada
+SQL_FILE_ENCODING = 'utf-8' # Encoding do arquivo monitorado
+SQL_FILE_PATH = os.path.join(MONITORED_DIR, SQL_FILE_TO_MONITOR)
+
+
+def carregar_sql_detectado(context):
+    """Lê o SQL na própria task e confere que é a versão cujo checksum o sensor devolveu."""
+    checksum = context["ti"].xcom_pull(task_ids="wait_for_new_query_file")
+    context["task"].sql = ler_texto_verificado(SQL_FILE_PATH, checksum, SQL_FILE_ENCODING)
 
 @dag(
     dag_id='sql_file_monitor_pipeline',
@@ -31,27 +45,41 @@ def sql_file_monitor_pipeline():
 
     start = EmptyOperator(task_id='start_pipeline')
 
-    # 1. TAREFA SENSOR: Espera que o arquivo 'query_to_run.sql' exista
-    # O FileSensor precisa do caminho absoluto para verificar o Sistema de Arquivos (FS)
-    wait_for_file = FileSensor(
+    # 1. TAREFA SENSOR: Espera que 'query_to_run.sql' apareça ou mude de conteúdo
+    # Deferrable: enquanto espera, a task sai do worker e quem observa o diretório
+    # (inotify, ou stat() como alternativa) é o triggerer. A mudança é detectada
+    # pelo checksum do conteúdo, comparado com o da última execução (Variable).
+    wait_for_file = ArquivoAlteradoSensor(
         task_id='wait_for_new_query_file',
-        # Monta o caminho absoluto do arquivo a ser monitorado
-        filepath=os.path.join(MONITORED_DIR, SQL_FILE_TO_MONITOR), 
-        fs_conn_id='fs_default', # Usa a conexão padrão do FileSystem
-        poke_interval=30,        # Verifica a cada 30 segundos (polling)
-        timeout=60 * 55,         # Tempo máximo de espera: 1 hora
-        mode='poke',
+        # Caminho absoluto do arquivo a ser monitorado
+        filepath=SQL_FILE_PATH,
+        variavel_checksum=CHECKSUM_VARIABLE,
+        poll_interval=5,         # Só usado sem inotify (e como verificação de segurança)
+        timeout=60 * 55,         # Tempo máximo de espera: 55 minutos
     )
 
-    execute_detected_query = SQLExecuteQueryOperator(
+    # 2. Executa o SQL detectado, registrando tempo e plano (EXPLAIN ANALYZE) de cada
+    # comando em sql_profile_history; regressões contra as últimas execuções vão para o log.
+    # O arquivo é lido aqui (pre_execute) e conferido com o checksum do sensor: o que
+    # roda é exatamente a versão cujo checksum será registrado; se ele mudou de novo,
+    # a task falha e a próxima execução pega a versão nova.
+    execute_detected_query = ProfiledSQLExecuteQueryOperator(
         task_id='execute_detected_query',
         conn_id='postgres_oltp_conn',
-        sql=SQL_FILE_TO_MONITOR,  # isso carrega o conteúdo do arquivo
+        sql="",  # preenchido por carregar_sql_detectado
+        pre_execute=carregar_sql_detectado,
         autocommit=False,
+        capture_plans=True,  # EXPLAIN ANALYZE dentro da transação (SELECTs via SAVEPOINT)
     )
 
+    # 3. Registra o checksum executado: a próxima execução só acorda com conteúdo novo
+    @task()
+    def store_query_checksum(checksum):
+        registrar_checksum(CHECKSUM_VARIABLE, checksum)
+
     end = EmptyOperator(task_id='end_pipeline')
 
-    start >> wait_for_file >> execute_detected_query >> end
+    checksum = store_query_checksum(wait_for_file.output)
+    start >> wait_for_file >> execute_detected_query >> checksum >> end
 
 dag_instance = sql_file_monitor_pipeline()
\ No newline at end of file
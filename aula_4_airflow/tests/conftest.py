@@ -0,0 +1,5 @@
+import os
+import sys
+
+# custom_packages é importado a partir de AIRFLOW_HOME, como nas DAGs
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# -------------------------------
+# Benchmark de parse das DAGs
+# -------------------------------
+# O scheduler (dag processor) reimporta cada arquivo da pasta de DAGs em loop;
+# tudo o que estiver no nível de módulo, inclusive imports de pandas/NumPy,
+# custa tempo e memória em cada ciclo. Aqui cada DAG é importada num processo
+# novo (como no dag processor), depois do próprio Airflow já estar carregado,
+# então o número medido é só o custo que o arquivo adiciona.
+#
+#   python tests/dag_parse_benchmark.py
+#   python tests/dag_parse_benchmark.py --repeticoes 10 dags/new_pipeline_dag.py
+
+AIRFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAGS_DIR = os.path.join(AIRFLOW_DIR, "dags")
+
+# Bibliotecas que só devem ser importadas dentro das tasks
+HEAVY_MODULES = ("pandas", "numpy", "psycopg2", "pyarrow", "sklearn")
+
+_PROBE = r"""
+import json, resource, runpy, sys, time
+import airflow
+from airflow.decorators import dag, task  # noqa: F401  (já carregados no dag processor)
+from airflow.models import Variable  # noqa: F401
+antes = set(sys.modules)
+rss_antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+inicio = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="dag_parse_probe")
+segundos = time.perf_counter() - inicio
+print(json.dumps({
+    "segundos": segundos,
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_antes,
+    "modulos": sorted({m.split(".")[0] for m in set(sys.modules) - antes}),
+}))
+"""
+
+
+def dag_files(dags_dir=DAGS_DIR):
+    return sorted(
+        os.path.join(dags_dir, f) for f in os.listdir(dags_dir)
+        if f.endswith(".py") and not f.startswith("_")
+    )
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("AIRFLOW_HOME", AIRFLOW_DIR)
+    env.setdefault("AIRFLOW__CORE__LOAD_EXAMPLES", "False")
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (AIRFLOW_DIR, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def medir(dag_file, repeticoes=3):
+    """Mediana de `repeticoes` parses do arquivo, cada um num processo novo."""
+    execucoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", _PROBE, dag_file],
+            capture_output=True, text=True, env=_env(), check=True,
+        )
+        execucoes.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return {
+        "segundos": statistics.median(e["segundos"] for e in execucoes),
+        "rss_kb": statistics.median(e["rss_kb"] for e in execucoes),
+        "modulos": execucoes[-1]["modulos"],
+        "pesados": [m for m in HEAVY_MODULES if m in execucoes[-1]["modulos"]],
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tempo e memória de parse de cada DAG.")
+    parser.add_argument("arquivos", nargs="*", help="DAGs a medir (padrão: todas em dags/).")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'DAG':<40} {'parse':>9} {'RSS extra':>11}  imports pesados")
+    for dag_file in args.arquivos or dag_files():
+        r = medir(dag_file, args.repeticoes)
+        print(f"{os.path.basename(dag_file):<40} {r['segundos'] * 1000:>7.1f}ms "
+              f"{r['rss_kb'] / 1024:>9.1f}MB  {', '.join(r['pesados']) or '-'}")
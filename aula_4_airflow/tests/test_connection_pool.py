@@ -0,0 +1,111 @@
+import psycopg2
+import pytest
+
+from custom_packages.plu_medical import connection
+
+CREDENCIAIS = {"PG_HOST": "db", "PG_PORT": 5432, "PG_DB": "medical", "PG_USER": "u", "PG_PASS": "p"}
+
+
+class _Conexao:
+    def __init__(self, falha=None):
+        self.falha = falha   # exceção lançada ao configurar a sessão
+        self.comandos = []
+        self.commits = 0
+        self.fechada = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        if self.falha is not None and sql.startswith("SELECT set_config"):
+            raise self.falha
+        self.comandos.append((sql, params))
+
+    def close(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        if self.falha is not None:
+            raise self.falha
+
+
+class _Pool:
+    def __init__(self, conexoes):
+        self.livres = list(conexoes)
+        self.devolvidas = []
+
+    def getconn(self):
+        return self.livres.pop(0)
+
+    def putconn(self, conn, close=False):
+        self.devolvidas.append((conn, close))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def criar(*conexoes):
+        p = _Pool(conexoes)
+        monkeypatch.setattr(connection, "_pool_for", lambda credentials: p)
+        return p
+    monkeypatch.setattr(connection, "_checked_out", {})
+    return criar
+
+
+def test_checkout_aplica_sessao_e_release_devolve_limpa(pool):
+    conn = _Conexao()
+    p = pool(conn)
+    assert connection.checkout_conn(CREDENCIAIS, "bulk_load") is conn
+    configurados = {params[0]: params[1] for sql, params in conn.comandos if params}
+    assert configurados == connection.SESSION_SETTINGS["bulk_load"]
+
+    connection.release_conn(conn)
+    assert conn.comandos[-1] == ("RESET ALL", None)
+    assert p.devolvidas == [(conn, False)]
+    assert connection._checked_out == {}
+
+
+def test_falha_ao_configurar_devolve_descartando(pool):
+    conn = _Conexao(falha=psycopg2.ProgrammingError("parâmetro inválido"))
+    p = pool(conn)
+    assert connection.checkout_conn(CREDENCIAIS) is None
+    assert p.devolvidas == [(conn, True)]
+    assert connection._checked_out == {}
+
+
+def test_conexao_morta_tenta_outra(pool):
+    morta, viva = _Conexao(falha=psycopg2.OperationalError("server closed")), _Conexao()
+    p = pool(morta, viva)
+    assert connection.checkout_conn(CREDENCIAIS) is viva
+    assert p.devolvidas == [(morta, True)]
+
+
+def test_duas_conexoes_mortas_desiste(pool):
+    mortas = [_Conexao(falha=psycopg2.OperationalError("server closed")) for _ in range(2)]
+    p = pool(*mortas)
+    assert connection.checkout_conn(CREDENCIAIS) is None
+    assert p.devolvidas == [(mortas[0], True), (mortas[1], True)]
+
+
+def test_release_de_conexao_quebrada_descarta(pool):
+    conn = _Conexao()
+    p = pool(conn)
+    connection.checkout_conn(CREDENCIAIS)
+    conn.falha = psycopg2.InterfaceError("connection already closed")
+    connection.release_conn(conn)
+    assert p.devolvidas == [(conn, True)]
+
+
+def test_pool_por_processo(monkeypatch):
+    criados = []
+    monkeypatch.setattr(connection.pg_pool, "ThreadedConnectionPool",
+                        lambda *args, **kwargs: criados.append(kwargs) or object())
+    monkeypatch.setattr(connection, "_pools", {})
+    a = connection._pool_for(CREDENCIAIS)
+    assert connection._pool_for(dict(CREDENCIAIS)) is a
+    # Depois de um fork o filho não reutiliza os sockets do pai
+    monkeypatch.setattr(connection.os, "getpid", lambda: -1)
+    assert connection._pool_for(CREDENCIAIS) is not a
+    assert len(criados) == 2
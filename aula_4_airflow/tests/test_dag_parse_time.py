@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+pytest.importorskip("airflow")
+
+from dag_parse_benchmark import HEAVY_MODULES, dag_files, medir
+
+# Orçamento por arquivo, além do custo do próprio Airflow (ajustável no CI)
+PARSE_BUDGET_S = float(os.environ.get("DAG_PARSE_BUDGET_S", 1.0))
+
+
+@pytest.mark.parametrize("dag_file", dag_files(), ids=os.path.basename)
+def test_dag_parse_time(dag_file):
+    result = medir(dag_file, repeticoes=3)
+
+    assert result["segundos"] <= PARSE_BUDGET_S, (
+        f"{os.path.basename(dag_file)} levou {result['segundos']:.2f}s para ser importada "
+        f"(orçamento: {PARSE_BUDGET_S:.2f}s)"
+    )
+    assert not result["pesados"], (
+        f"{os.path.basename(dag_file)} importa {', '.join(result['pesados'])} no parse; "
+        f"mova esses imports para dentro das tasks ({', '.join(HEAVY_MODULES)} são carregados sob demanda)"
+    )
@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import time
+
+import pytest
+
+from custom_packages.file_watch import checksum_arquivo, esperar_alteracao, ler_arquivo, ler_texto_verificado
+
+# Só a verificação periódica por stat() (usar_inotify=False): roda em qualquer SO
+INTERVALO = 0.05
+
+
+def _esperar(caminho, checksum_anterior=None):
+    return esperar_alteracao(str(caminho), checksum_anterior, poll_interval=INTERVALO, usar_inotify=False)
+
+
+def test_ler_arquivo(tmp_path):
+    arquivo = tmp_path / "query.sql"
+    arquivo.write_bytes(b"SELECT 1;")
+    assert ler_arquivo(arquivo) == (b"SELECT 1;", hashlib.sha256(b"SELECT 1;").hexdigest())
+    assert ler_arquivo(tmp_path / "nao_existe.sql") == (None, None)
+    assert checksum_arquivo(tmp_path / "nao_existe.sql") is None
+
+
+def test_conteudo_novo_ja_presente(tmp_path):
+    arquivo = tmp_path / "query.sql"
+    arquivo.write_bytes(b"SELECT 1;")
+    checksum, conteudo, origem = asyncio.run(_esperar(arquivo, "checksum-antigo"))
+    assert (conteudo, origem) == (b"SELECT 1;", "inicial")
+    assert checksum == hashlib.sha256(conteudo).hexdigest()
+
+
+def test_espera_ate_o_conteudo_mudar(tmp_path):
+    arquivo = tmp_path / "query.sql"
+    arquivo.write_bytes(b"SELECT 1;")
+    anterior = checksum_arquivo(arquivo)
+
+    async def cenario():
+        espera = asyncio.create_task(_esperar(arquivo, anterior))
+        await asyncio.sleep(INTERVALO * 3)
+        assert not espera.done()
+        arquivo.write_bytes(b"SELECT 2;")
+        return await asyncio.wait_for(espera, timeout=5)
+
+    checksum, conteudo, origem = asyncio.run(cenario())
+    assert (conteudo, origem) == (b"SELECT 2;", "stat")
+    assert checksum == hashlib.sha256(b"SELECT 2;").hexdigest() != anterior
+
+
+def test_arquivo_criado_depois(tmp_path):
+    arquivo = tmp_path / "query.sql"
+
+    async def cenario():
+        espera = asyncio.create_task(_esperar(arquivo))
+        await asyncio.sleep(INTERVALO * 2)
+        arquivo.write_bytes(b"SELECT 3;")
+        return await asyncio.wait_for(espera, timeout=5)
+
+    assert asyncio.run(cenario())[1] == b"SELECT 3;"
+
+
+def test_nao_le_durante_a_escrita(tmp_path):
+    arquivo = tmp_path / "query.sql"
+    arquivo.write_bytes(b"-- v1\n")
+    anterior = checksum_arquivo(arquivo)
+    linhas = [f"INSERT INTO t VALUES ({i});\n".encode() for i in range(15)]
+
+    async def escritor():
+        # Escreve aos poucos, sempre em menos de um intervalo: o arquivo nunca fica parado
+        with open(arquivo, "ab") as f:
+            for linha in linhas:
+                f.write(linha)
+                f.flush()
+                await asyncio.sleep(INTERVALO / 3)
+        return time.monotonic()
+
+    async def cenario():
+        espera = asyncio.create_task(_esperar(arquivo, anterior))
+        await asyncio.sleep(INTERVALO / 3)          # leitura inicial ainda vê só a v1
+        fim_escrita = await escritor()
+        resultado = await asyncio.wait_for(espera, timeout=5)
+        return resultado, fim_escrita, time.monotonic()
+
+    (checksum, conteudo, _), fim_escrita, detectado = asyncio.run(cenario())
+    assert conteudo == b"-- v1\n" + b"".join(linhas)
+    assert checksum == hashlib.sha256(conteudo).hexdigest()
+    assert detectado >= fim_escrita
+
+
+@pytest.mark.parametrize("conteudo", [b"", b"SELECT 1;"])
+def test_mesmo_checksum_nao_dispara(tmp_path, conteudo):
+    arquivo = tmp_path / "query.sql"
+    arquivo.write_bytes(conteudo)
+
+    async def cenario():
+        espera = asyncio.create_task(_esperar(arquivo, checksum_arquivo(arquivo)))
+        # Reescreve o mesmo conteúdo: mtime muda, checksum não
+        await asyncio.sleep(INTERVALO)
+        arquivo.write_bytes(conteudo)
+        await asyncio.sleep(INTERVALO * 4)
+        disparou = espera.done()
+        espera.cancel()
+        return disparou
+
+    assert asyncio.run(cenario()) is False
+
+
+def test_ler_texto_verificado(tmp_path):
+    arquivo = tmp_path / "query.sql"
+    arquivo.write_bytes("SELECT 'ação';".encode("latin-1"))
+    checksum = checksum_arquivo(arquivo)
+
+    assert ler_texto_verificado(arquivo, checksum, "latin-1") == "SELECT 'ação';"
+    with pytest.raises(ValueError, match="utf-8"):
+        ler_texto_verificado(arquivo, checksum)
+
+    arquivo.write_bytes(b"SELECT 2;")
+    with pytest.raises(RuntimeError, match="mudou"):
+        ler_texto_verificado(arquivo, checksum, "latin-1")
+    with pytest.raises(RuntimeError):
+        ler_texto_verificado(tmp_path / "nao_existe.sql", checksum)
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from custom_packages.plu_medical import UNCHANGED, fingerprints, layers
+
+
+class _Cursor:
+    """Cursor psycopg2 sobre SQLite: só o necessário para a tabela de controle."""
+
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SET LOCAL"):
+            return
+        self._cursor.execute(sql.replace("%s", "?").replace("NOW()", "CURRENT_TIMESTAMP"), params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class _Conexao:
+    def __init__(self):
+        self.db = sqlite3.connect(":memory:")
+
+    def cursor(self):
+        return _Cursor(self.db)
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """bronze_patients com CSV temporário; as tabelas "carregadas" ficam num dict."""
+    csv = tmp_path / "patients.csv"
+    csv.write_text("id,nome\n1,Ana\n2,Bruno\n", encoding="utf-8")
+    conn = _Conexao()
+    tabelas = {}
+
+    def carregar(df, table_name, conn, **_kwargs):
+        tabelas[table_name] = df.drop(columns="execution_date")
+
+    def impressao_tabela(conn, table):
+        df = tabelas.get(table)
+        if df is None:
+            return None
+        return len(df), str(int(pd.util.hash_pandas_object(df, index=False).sum()))
+
+    monkeypatch.setitem(layers.FILES, "bronze_patients", str(csv))
+    monkeypatch.setattr(layers, "checkout_conn", lambda *args: conn)
+    monkeypatch.setattr(layers, "release_conn", lambda conn: None)
+    monkeypatch.setattr(layers, "df_to_postgres", carregar)
+    monkeypatch.setattr(fingerprints, "table_fingerprint", impressao_tabela)
+    return csv, conn, tabelas
+
+
+def _registros(conn, step):
+    return conn.db.execute(
+        f"SELECT kind, source FROM {fingerprints.FINGERPRINT_TABLE} WHERE step = ?", (step,)
+    ).fetchall()
+
+
+def test_entrada_igual_pula_e_entrada_nova_recarrega(pipeline):
+    csv, conn, tabelas = pipeline
+    assert layers.bronze_table_construction({}, "patients", skip_unchanged=True) == "patients"
+    assert sorted(_registros(conn, "bronze_patients")) == [("input", str(csv)), ("output", "bronze_patients")]
+
+    tabelas.clear()   # se recarregasse, a tabela voltaria
+    tabelas["bronze_patients"] = pd.DataFrame({"id": [1, 2], "nome": ["Ana", "Bruno"]})
+    assert layers.bronze_table_construction({}, "patients", skip_unchanged=True) == UNCHANGED
+
+    csv.write_text("id,nome\n1,Ana\n2,Bruno\n3,Carla\n", encoding="utf-8")
+    assert layers.bronze_table_construction({}, "patients", skip_unchanged=True) == "patients"
+    assert len(tabelas["bronze_patients"]) == 3
+    assert layers.bronze_table_construction({}, "patients", skip_unchanged=True) == UNCHANGED
+
+
+def test_saida_alterada_fora_do_pipeline_recarrega(pipeline):
+    _, _, tabelas = pipeline
+    layers.bronze_table_construction({}, "patients", skip_unchanged=True)
+    tabelas["bronze_patients"] = tabelas["bronze_patients"].head(1)
+    assert layers.bronze_table_construction({}, "patients", skip_unchanged=True) == "patients"
+    assert len(tabelas["bronze_patients"]) == 2
+
+
+def test_carga_com_falha_nao_registra_impressao(pipeline, monkeypatch):
+    csv, conn, tabelas = pipeline
+
+    def falhar(df, table_name, conn, **_kwargs):
+        raise RuntimeError("COPY interrompido")
+
+    monkeypatch.setattr(layers, "df_to_postgres", falhar)
+    with pytest.raises(RuntimeError):
+        layers.bronze_table_construction({}, "patients", skip_unchanged=True)
+    assert _registros(conn, "bronze_patients") == []
+
+    # A próxima execução não pode tratar a etapa como feita
+    entradas = {str(csv): fingerprints.file_fingerprint(str(csv))}
+    assert not fingerprints.is_unchanged(conn, "bronze_patients", entradas)
+    assert "bronze_patients" not in tabelas
@@ -0,0 +1,119 @@
+import re
+from io import StringIO
+
+import pandas as pd
+import pytest
+
+from custom_packages import oltp_generator
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.comandos.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        tabela, colunas = re.match(r"COPY (\w+) \((.*?)\) FROM STDIN", sql).groups()
+        nomes = [c.strip('" ') for c in colunas.split(",")]
+        df = pd.read_csv(StringIO(buffer.read()), header=None, names=nomes, na_values=["\\N"])
+        self.conn.copias.setdefault(tabela, []).append(df)
+
+    def close(self):
+        pass
+
+
+class _Conexao:
+    """Conexão que guarda os COPY em DataFrames em vez de gravar num banco."""
+
+    def __init__(self):
+        self.autocommit = False
+        self.comandos = []
+        self.copias = {}
+        self.commits = 0
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def tabela(self, nome):
+        return pd.concat(self.copias[nome], ignore_index=True)
+
+
+def _gerar(monkeypatch, semente=7, escala=0.02):
+    # Blocos pequenos: consulta e paciente passam por vários blocos
+    monkeypatch.setattr(oltp_generator, "BLOCK_ROWS", 300)
+    conn = _Conexao()
+    counts = oltp_generator.generate_oltp(conn, scale=escala, seed=semente)
+    return conn, counts
+
+
+def test_tamanhos_e_integridade(monkeypatch):
+    conn, counts = _gerar(monkeypatch)
+    sizes = oltp_generator.table_sizes(0.02)
+    assert conn.commits == 1
+    assert len(conn.copias["oltp_consulta"]) > 1
+
+    paciente, medico, clinica = (conn.tabela(f"oltp_{t}") for t in ("paciente", "medico", "clinica"))
+    consulta, agenda, faturamento = (conn.tabela(f"oltp_{t}") for t in ("consulta", "agenda", "faturamento"))
+    for nome, df in [("paciente", paciente), ("medico", medico), ("clinica", clinica), ("consulta", consulta)]:
+        assert counts[nome] == sizes[nome] == len(df)
+        assert df["id"].tolist() == list(range(1, sizes[nome] + 1))
+    assert counts["agenda"] == len(agenda) and counts["faturamento"] == len(faturamento)
+
+    # Chaves estrangeiras e CHECKs de create_table.sql
+    assert consulta["paciente_id"].between(1, sizes["paciente"]).all()
+    assert consulta["medico_id"].between(1, sizes["medico"]).all()
+    assert consulta["clinica_id"].between(1, sizes["clinica"]).all()
+    assert set(consulta["status"]) <= set(oltp_generator.STATUS[0])
+    assert set(paciente["sexo"]) <= {"F", "M"}
+    assert medico["crm"].is_unique
+    assert set(faturamento["forma_pagamento"]) <= set(oltp_generator.FORMAS_PAGAMENTO[0])
+
+    # Agenda antes da consulta; só consultas realizadas são faturadas, nunca acima do valor
+    por_id = consulta.set_index("id")
+    assert agenda["consulta_id"].tolist() == consulta["id"].tolist()
+    assert (pd.to_datetime(agenda["data_agendamento"])
+            < pd.to_datetime(por_id.loc[agenda["consulta_id"], "data_consulta"]).to_numpy()).all()
+    realizadas = set(consulta.loc[consulta["status"] == "Realizada", "id"])
+    assert set(faturamento["consulta_id"]) == realizadas
+    assert (faturamento["valor_pago"].to_numpy()
+            <= por_id.loc[faturamento["consulta_id"], "valor"].to_numpy() + 0.01).all()
+
+
+def test_mesma_semente_mesmos_dados(monkeypatch):
+    a, _ = _gerar(monkeypatch, semente=7)
+    b, _ = _gerar(monkeypatch, semente=7)
+    c, _ = _gerar(monkeypatch, semente=8)
+    for tabela in oltp_generator.TABLE_ORDER:
+        pd.testing.assert_frame_equal(a.tabela(f"oltp_{tabela}"), b.tabela(f"oltp_{tabela}"))
+    assert not a.tabela("oltp_consulta").equals(c.tabela("oltp_consulta"))
+
+
+def test_prefixo_e_sequences(monkeypatch):
+    monkeypatch.setattr(oltp_generator, "BLOCK_ROWS", 300)
+    conn = _Conexao()
+    oltp_generator.generate_oltp(conn, scale=0.01, prefix="bronze_")
+    assert set(conn.copias) == {f"bronze_{t}" for t in oltp_generator.TABLE_ORDER}
+    ddl = next(c for c in conn.comandos if "CREATE TABLE" in c)
+    assert "oltp_" not in ddl and "bronze_consulta" in ddl
+    assert sum("setval(pg_get_serial_sequence('bronze_" in c for c in conn.comandos) == 4
+    assert conn.autocommit is False
+
+
+def test_falha_desfaz_e_propaga(monkeypatch):
+    conn = _Conexao()
+
+    def falhar(*_args):
+        raise RuntimeError("COPY interrompido")
+
+    monkeypatch.setattr(oltp_generator, "copy_df", falhar)
+    with pytest.raises(RuntimeError):
+        oltp_generator.generate_oltp(conn, scale=0.01)
+    assert conn.commits == 0
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import time
+import urllib.request
+from collections import defaultdict, deque
+
+from serde_logs import timestamp_epoch
+
+# -------------------------------
+# Enriquecimento e entrega de alertas (runtime assíncrono)
+# -------------------------------
+# HistoricoRecente guarda, por API, os logs dos últimos `janela_s` segundos e
+# responde à pergunta "o que aconteceu com essa API agora há pouco?", usada para
+# enriquecer cada alerta. EntregadorAlertas entrega o alerta enriquecido no
+# console e, opcionalmente, num webhook HTTP; a chamada HTTP roda numa thread
+# (asyncio.to_thread) para não travar o loop enquanto o destino responde.
+
+
+class HistoricoRecente:
+
+    def __init__(self, janela_s=300):
+        self.janela_s = janela_s
+        self._por_api = defaultdict(deque)   # api -> deque[(epoch, status, tempo_ms)]
+
+    def registrar(self, log):
+        fila = self._por_api[log['api']]
+        epoch = timestamp_epoch(log)
+        fila.append((epoch, log['status'], log['tempo_resposta_ms']))
+        limite = epoch - self.janela_s
+        while fila and fila[0][0] < limite:
+            fila.popleft()
+
+    def resumo(self, api):
+        fila = self._por_api.get(api, ())
+        total = len(fila)
+        erros = sum(1 for _, status, _ in fila if status == 'ERRO')
+        return {
+            'janela_s': self.janela_s,
+            'total': total,
+            'erros': erros,
+            'taxa_erro': erros / total if total else 0.0,
+            'tempo_medio_ms': sum(t for _, _, t in fila) / total if total else 0.0,
+        }
+
+
+class EntregadorAlertas:
+    """
+    Args:
+        saida: função de impressão (ex.: SaidaLimitada).
+        webhook (str): URL que recebe cada alerta via POST JSON (opcional).
+        atraso_ms (float): latência artificial, para simular um destino lento.
+        timeout_s (float): timeout da chamada HTTP.
+    """
+
+    def __init__(self, saida=print, webhook=None, atraso_ms=0, timeout_s=5):
+        self.saida = saida
+        self.webhook = webhook
+        self.atraso_ms = atraso_ms
+        self.timeout_s = timeout_s
+        self.entregues = 0
+
+    def _post(self, corpo):
+        requisicao = urllib.request.Request(
+            self.webhook, data=corpo, headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(requisicao, timeout=self.timeout_s) as resposta:
+            resposta.read()
+
+    async def entregar(self, alerta):
+        if self.atraso_ms:
+            await asyncio.sleep(self.atraso_ms / 1000)
+        if self.webhook:
+            await asyncio.to_thread(self._post, json.dumps(alerta, ensure_ascii=False).encode())
+        self.entregues += 1
+        self.saida(alerta['mensagem'] if 'contexto' not in alerta
+                   else f"{alerta['mensagem']} | contexto: {alerta['contexto']}")
+
+
+def novo_alerta(origem, mensagem, **campos):
+    return {'origem': origem, 'mensagem': mensagem, 'gerado_em': time.time(), **campos}
@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from consumidor_A_monitoramento import MonitorA
+from consumidor_B_monitoramento import MonitorB
+from janelas_latencia import AgregadorJanelas
+from logs_producer import gerar_lote
+from runtime_consumidor import RuntimeConsumidor
+from segmento_topico import FonteReplay, GravadorSegmento
+from serde_logs import SerdeLogs, desserializar
+from sink_datalake import SinkDataLake
+
+# -------------------------------
+# Benchmark dos consumidores sem broker
+# -------------------------------
+# Cada handler roda no RuntimeConsumidor de verdade, mas alimentado por uma
+# FonteReplay (segmento em arquivo) em vez do Kafka. A entrada é sempre a mesma
+# (segmento gravado com segmento_topico.py ou gerado aqui com semente fixa), então
+# os números são comparáveis entre execuções e entre versões do código.
+#
+#   python benchmark_consumidores.py                      # gera segmentos sintéticos
+#   python benchmark_consumidores.py --logs logs.kseg     # usa um segmento gravado
+#   python benchmark_consumidores.py --handlers A,C --repeticoes 5
+
+TOPICO_LOGS = 'logs.aplicacoes'
+TOPICO_CDC = 'aeroporto.public.eventos_voo'
+
+
+def _nada(*_args, **_kwargs):
+    pass
+
+
+def gerar_segmento_logs(arquivo, n, formato='binario', particoes=2, taxa=5000, semente=42):
+    """Segmento sintético de logs, chaveado por API como o produtor, a `taxa` msgs/s."""
+    serde = SerdeLogs(formato=formato)
+    apis_nomes = serde.simbolos('api')
+    particao_da_api = [zlib.crc32(a.encode()) % particoes for a in apis_nomes]
+    rng = np.random.default_rng(semente)
+    offsets = [0] * particoes
+    ts_ms = 1_760_000_000_000
+    with GravadorSegmento(arquivo, TOPICO_LOGS) as gravador:
+        for inicio in range(0, n, 10_000):
+            apis, payloads = gerar_lote(rng, min(10_000, n - inicio), serde,
+                                        len(apis_nomes), len(serde.simbolos('status')))
+            for api, payload in zip(apis, payloads):
+                p = particao_da_api[api]
+                gravador.gravar(p, offsets[p], int(ts_ms), apis_nomes[api].encode(), payload)
+                offsets[p] += 1
+                ts_ms += 1000 / taxa
+
+
+def gerar_segmento_cdc(arquivo, n, semente=42):
+    """Segmento sintético de envelopes Debezium (c/u/d) para eventos_voo."""
+    aleatorio = random.Random(semente)
+    eventos = ['embarque iniciado', 'portão alterado', 'decolagem', 'pouso', 'atraso']
+    vivos = []
+    with GravadorSegmento(arquivo, TOPICO_CDC) as gravador:
+        for i in range(n):
+            if vivos and aleatorio.random() < 0.1:
+                chave = vivos.pop(aleatorio.randrange(len(vivos)))
+                payload = {'op': 'd', 'before': {'id': chave}, 'after': None}
+            else:
+                if vivos and aleatorio.random() < 0.4:
+                    chave, op = aleatorio.choice(vivos), 'u'
+                else:
+                    chave, op = i + 1, 'c'
+                    vivos.append(chave)
+                payload = {'op': op, 'before': None, 'after': {
+                    'id': chave, 'voo_id': aleatorio.randint(1, 50),
+                    'timestamp': 1_760_000_000_000_000 + i * 1000,
+                    'evento': aleatorio.choice(eventos), 'observacoes': None,
+                }}
+            payload['source'] = {'connector': 'postgresql', 'db': 'mydb', 'schema': 'public',
+                                 'table': 'eventos_voo', 'lsn': 10_000 + i}
+            valor = json.dumps({'schema': {}, 'payload': payload}).encode()
+            gravador.gravar(0, i, 1_760_000_000_000 + i, json.dumps({'id': chave}).encode(), valor)
+
+
+class _Cronometrado:
+    """Envolve um handler medindo o tempo de cada processar_lote."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.tempos = []
+        self.registros = 0
+
+    def processar_lote(self, registros):
+        inicio = time.perf_counter()
+        self.handler.processar_lote(registros)
+        self.tempos.append(time.perf_counter() - inicio)
+        self.registros += len(registros)
+
+    def __getattr__(self, nome):
+        return getattr(self.handler, nome)
+
+
+class _AnalisarEvento:
+    """read_topic.analisar_evento como handler, com a saída descartada."""
+
+    def __init__(self):
+        from read_topic import analisar_evento
+        self.analisar_evento = analisar_evento
+        self._devnull = open(os.devnull, 'w')
+
+    def processar_lote(self, registros):
+        with contextlib.redirect_stdout(self._devnull):
+            for r in registros:
+                if r.value:
+                    self.analisar_evento(r.value)
+
+
+def _handlers(diretorio_tmp):
+    """nome -> (fábrica do handler, tópico do segmento, desserializador)."""
+    from read_topic import desserializar_envelope
+    import consumidor_D_persistencia as consumidor_d
+
+    def _consumidor_d():
+        # Mesma construção do consumidor D (parse_args + criar_handler), com data lake temporário
+        return consumidor_d.criar_handler(consumidor_d.parse_args(['--diretorio', tempfile.mkdtemp(dir=diretorio_tmp)]))
+
+    return {
+        'A': (lambda: MonitorA(AgregadorJanelas(saida=_nada)), TOPICO_LOGS, desserializar),
+        'B': (lambda: MonitorB(_nada), TOPICO_LOGS, desserializar),
+        'C': (lambda: SinkDataLake(tempfile.mkdtemp(dir=diretorio_tmp), TOPICO_LOGS), TOPICO_LOGS, desserializar),
+        'D': (_consumidor_d, TOPICO_LOGS, desserializar),
+        'evento': (_AnalisarEvento, TOPICO_CDC, desserializar_envelope),
+    }
+
+
+def medir(fabrica, fonte, max_records):
+    cronometrado = _Cronometrado(fabrica())
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        runtime = RuntimeConsumidor(fonte.topico, 'benchmark', cronometrado,
+                                    max_records=max_records, consumer=fonte)
+        inicio = time.perf_counter()
+        runtime.executar()
+        total_s = time.perf_counter() - inicio
+    tempos_ms = np.asarray(cronometrado.tempos) * 1000
+    return {
+        'msgs_s': cronometrado.registros / total_s,
+        'handler_msgs_s': cronometrado.registros / max(sum(cronometrado.tempos), 1e-9),
+        'lote_p50_ms': float(np.percentile(tempos_ms, 50)) if tempos_ms.size else float('nan'),
+        'lote_p99_ms': float(np.percentile(tempos_ms, 99)) if tempos_ms.size else float('nan'),
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark reprodutível dos handlers de consumo (sem broker).")
+    parser.add_argument('--logs', default=None, help="Segmento de logs.aplicacoes (padrão: gera um sintético).")
+    parser.add_argument('--cdc', default=None, help="Segmento do tópico CDC (padrão: gera um sintético).")
+    parser.add_argument('--mensagens', type=int, default=200_000, help="Tamanho dos segmentos sintéticos.")
+    parser.add_argument('--formato', default='binario', choices=['json', 'binario'],
+                        help="Formato dos logs no segmento sintético.")
+    parser.add_argument('--handlers', default='A,B,C,D,evento', help="Handlers a medir (A,B,C,D,evento).")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--max-records', type=int, default=1000, help="Registros por poll().")
+    parser.add_argument('--velocidade', type=float, default=None,
+                        help="Replay em tempo escalado (1.0 = tempo real); padrão: velocidade máxima.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    diretorio_tmp = tempfile.mkdtemp(prefix='bench_consumidores_')
+    try:
+        segmentos = {TOPICO_LOGS: args.logs, TOPICO_CDC: args.cdc}
+        if segmentos[TOPICO_LOGS] is None:
+            segmentos[TOPICO_LOGS] = os.path.join(diretorio_tmp, 'logs.kseg')
+            gerar_segmento_logs(segmentos[TOPICO_LOGS], args.mensagens, args.formato)
+        if segmentos[TOPICO_CDC] is None:
+            segmentos[TOPICO_CDC] = os.path.join(diretorio_tmp, 'cdc.kseg')
+            gerar_segmento_cdc(segmentos[TOPICO_CDC], args.mensagens // 10)
+
+        handlers = _handlers(diretorio_tmp)
+        print(f"{'handler':<8} {'msgs':>9} {'msgs/s':>12} {'handler msgs/s':>15} {'lote p50':>10} {'lote p99':>10}")
+        for nome in args.handlers.split(','):
+            if nome not in handlers:
+                print(f"Handler desconhecido: {nome}")
+                continue
+            fabrica, topico, desserializador = handlers[nome]
+            fonte = FonteReplay(segmentos[topico], desserializador, args.velocidade, args.max_records)
+            resultados = []
+            for _ in range(args.repeticoes):
+                fonte.reiniciar()
+                resultados.append(medir(fabrica, fonte, args.max_records))
+            # Mediana das repetições: menos sensível a ruído da máquina
+            r = {k: float(np.median([x[k] for x in resultados])) for k in resultados[0]}
+            print(f"{nome:<8} {len(fonte):>9,} {r['msgs_s']:>12,.0f} {r['handler_msgs_s']:>15,.0f} "
+                  f"{r['lote_p50_ms']:>8.2f}ms {r['lote_p99_ms']:>8.2f}ms")
+    finally:
+        shutil.rmtree(diretorio_tmp, ignore_errors=True)
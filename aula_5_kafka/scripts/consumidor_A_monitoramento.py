@@ -1,23 +1,130 @@
-from kafka import KafkaConsumer
-import json
+import asyncio
+
+from alertas_async import EntregadorAlertas, novo_alerta
+from janelas_latencia import AgregadorJanelas
+from runtime_async import adicionar_argumentos_async, runtime_async_de_args
+from runtime_consumidor import adicionar_argumentos, runtime_de_args, saida_de_args
 
-KAFKA_BROKER = 'localhost:9092'
 TOPIC = 'logs.aplicacoes'
 GROUP_ID = 'monitoramento-tempo-real'
+AUTO_OFFSET_RESET = 'latest'
+
+
+class MonitorA:
+    """
+    Monitora latência e erros por API em janelas deslizantes e emite um resumo
+    por janela, com alerta quando p95/p99 ou a taxa de erro passam dos limites.
+    """
+
+    def __init__(self, agregador):
+        self.agregador = agregador
+
+    def processar_lote(self, registros):
+        self.agregador.adicionar_lote([msg.value for msg in registros])
+
+    def ocioso(self):
+        # Sem mensagens novas as janelas continuam fechando no horário
+        self.agregador.emitir_se_devido()
+
+    def flush(self):
+        self.agregador.emitir()
+
+    def ao_revogar(self, particoes):
+        # Com o produtor particionando por API, as janelas de uma API só existem no
+        # dono da partição dela; ao perder partições o estado passa para o novo dono.
+        self.agregador.limpar()
+
+
+class MonitorAAsync:
+    """
+    Versão para o runtime assíncrono: as janelas continuam sendo calculadas no
+    loop de consumo, mas cada alerta vira uma entrega assíncrona, presa ao último
+    registro do lote (o commit só passa dele depois que o alerta foi entregue).
+    """
+
+    def __init__(self, agregador, entregador, saida):
+        self.agregador = agregador
+        self.entregador = entregador
+        self.saida = saida
+        self._alertas = []
+        self._ultimo_registro = None
+        agregador.ao_emitir = self._coletar
+
+    def _coletar(self, resumo, motivos):
+        if motivos:
+            self._alertas.append((resumo, motivos))
+        else:
+            self.saida(self.agregador.formatar(resumo, motivos))
+
+    def _trabalhos(self):
+        alertas, self._alertas = self._alertas, []
+        return [
+            (self._ultimo_registro, self.entregador.entregar(novo_alerta(
+                'A', self.agregador.formatar(resumo, motivos), resumo=resumo, motivos=motivos)))
+            for resumo, motivos in alertas
+        ]
+
+    def processar_lote(self, registros):
+        self._ultimo_registro = registros[-1]
+        self.agregador.adicionar_lote([msg.value for msg in registros])
+        return self._trabalhos()
+
+    def ocioso(self):
+        # Sem mensagens novas as janelas continuam fechando no horário; os alertas
+        # ficam presos ao último registro lido (sem registro, não há janela aberta)
+        if self._ultimo_registro is None:
+            return []
+        self.agregador.emitir_se_devido()
+        return self._trabalhos()
+
+    def flush(self):
+        if self._ultimo_registro is None:
+            return []
+        self.agregador.emitir()
+        return self._trabalhos()
+
+
+def parse_args(argv=None):
+    parser = adicionar_argumentos_async(adicionar_argumentos())
+    parser.add_argument('--janela-s', type=int, default=60, help="Tamanho da janela deslizante (s).")
+    parser.add_argument('--passo-s', type=int, default=10, help="Intervalo entre resumos (s).")
+    parser.add_argument('--limite-p95-ms', type=float, default=2000)
+    parser.add_argument('--limite-p99-ms', type=float, default=2800)
+    parser.add_argument('--limite-taxa-erro', type=float, default=0.4)
+    return parser.parse_args(argv)
+
+
+def _agregador(args, saida):
+    return AgregadorJanelas(
+        janela_s=args.janela_s,
+        passo_s=args.passo_s,
+        limite_p95_ms=args.limite_p95_ms,
+        limite_p99_ms=args.limite_p99_ms,
+        limite_taxa_erro=args.limite_taxa_erro,
+        saida=saida,
+    )
+
+
+def criar_handler(args):
+    return MonitorA(_agregador(args, saida_de_args(args)))
+
 
-consumer = KafkaConsumer(
-    TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    group_id=GROUP_ID,
-    value_deserializer=lambda m: json.loads(m.decode('utf-8')),
-    auto_offset_reset='latest'
-)
+def criar_handler_async(args):
+    saida = saida_de_args(args)
+    entregador = EntregadorAlertas(saida, webhook=args.webhook, atraso_ms=args.atraso_entrega_ms)
+    return MonitorAAsync(_agregador(args, saida), entregador, saida)
 
-print("🧩 Consumidor A (Monitoramento) iniciado.\n")
 
-for msg in consumer:
-    log = msg.value
-    if log['status'] == 'ERRO' or log['tempo_resposta_ms'] > 2000:
-        print(f"[A] 🚨 ALERTA: {log['api']} apresentou problema -> {log}")
+if __name__ == "__main__":
+    args = parse_args()
+    if args.assincrono:
+        runtime = runtime_async_de_args(args, TOPIC, GROUP_ID, criar_handler_async(args), AUTO_OFFSET_RESET)
+        print("🧩 Consumidor A (Monitoramento, asyncio) iniciado.\n")
+        try:
+            asyncio.run(runtime.executar())
+        except KeyboardInterrupt:
+            pass
     else:
-        print(f"[A] OK: {log['api']} respondeu normalmente.")
\ No newline at end of file
+        runtime = runtime_de_args(args, TOPIC, GROUP_ID, criar_handler(args), AUTO_OFFSET_RESET)
+        print("🧩 Consumidor A (Monitoramento) iniciado.\n")
+        runtime.executar()
@@ -1,21 +1,79 @@
-from kafka import KafkaConsumer
-import json
+import asyncio
+
+from alertas_async import EntregadorAlertas, HistoricoRecente, novo_alerta
+from runtime_async import adicionar_argumentos_async, runtime_async_de_args
+from runtime_consumidor import adicionar_argumentos, runtime_de_args, saida_de_args
 
-KAFKA_BROKER = 'localhost:9092'
 TOPIC = 'logs.aplicacoes'
+TOPIC_ROTEADO = 'logs.aplicacoes.erro'   # publicado pelo roteador_logs.py
 GROUP_ID = 'monitoramento-tempo-real'
+AUTO_OFFSET_RESET = 'latest'
+
+
+class MonitorB:
+    """Destaca apenas os logs com status de erro."""
+
+    def __init__(self, saida):
+        self.saida = saida
+
+    def processar_lote(self, registros):
+        for msg in registros:
+            log = msg.value
+            if log['status'] == 'ERRO':
+                self.saida(f"[B] ⚠️ ERRO crítico detectado: {log}")
+
+
+class MonitorBAsync:
+    """
+    Versão para o runtime assíncrono: cada ERRO vira um alerta enriquecido com o
+    histórico recente da API e entregue de forma assíncrona.
+    """
+
+    def __init__(self, entregador, historico):
+        self.entregador = entregador
+        self.historico = historico
+
+    async def alertar(self, log):
+        contexto = self.historico.resumo(log['api'])
+        await self.entregador.entregar(novo_alerta(
+            'B', f"[B] ⚠️ ERRO crítico detectado: {log}", log=log, contexto=contexto))
+
+    def processar_lote(self, registros):
+        trabalhos = []
+        for msg in registros:
+            log = msg.value
+            self.historico.registrar(log)
+            if log['status'] == 'ERRO':
+                trabalhos.append((msg, self.alertar(log)))
+        return trabalhos
+
+
+def parse_args(argv=None):
+    parser = adicionar_argumentos_async(adicionar_argumentos())
+    parser.add_argument('--roteado', dest='topico', action='store_const', const=TOPIC_ROTEADO, default=TOPIC,
+                        help=f"Lê só {TOPIC_ROTEADO} (requer o roteador_logs.py rodando).")
+    return parser.parse_args(argv)
+
+
+def criar_handler(args):
+    return MonitorB(saida_de_args(args))
+
 
-consumer = KafkaConsumer(
-    TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    group_id=GROUP_ID,
-    value_deserializer=lambda m: json.loads(m.decode('utf-8')),
-    auto_offset_reset='latest'
-)
+def criar_handler_async(args):
+    entregador = EntregadorAlertas(saida_de_args(args), webhook=args.webhook, atraso_ms=args.atraso_entrega_ms)
+    return MonitorBAsync(entregador, HistoricoRecente())
 
-print("🧩 Consumidor B (Monitoramento) iniciado.\n")
 
-for msg in consumer:
-    log = msg.value
-    if log['status'] == 'ERRO':
-        print(f"[B] ⚠️ ERRO crítico detectado: {log}")
\ No newline at end of file
+if __name__ == "__main__":
+    args = parse_args()
+    if args.assincrono:
+        runtime = runtime_async_de_args(args, args.topico, GROUP_ID, criar_handler_async(args), AUTO_OFFSET_RESET)
+        print("🧩 Consumidor B (Monitoramento, asyncio) iniciado.\n")
+        try:
+            asyncio.run(runtime.executar())
+        except KeyboardInterrupt:
+            pass
+    else:
+        runtime = runtime_de_args(args, args.topico, GROUP_ID, criar_handler(args), AUTO_OFFSET_RESET)
+        print("🧩 Consumidor B (Monitoramento) iniciado.\n")
+        runtime.executar()
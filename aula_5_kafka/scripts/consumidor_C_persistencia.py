@@ -1,20 +1,32 @@
-from kafka import KafkaConsumer
-import json
+import os
+
+from runtime_consumidor import adicionar_argumentos, runtime_de_args
+from sink_datalake import SinkDataLake
 
-KAFKA_BROKER = 'localhost:9092'
 TOPIC = 'logs.aplicacoes'
 GROUP_ID = 'persistencia-historica'
+AUTO_OFFSET_RESET = 'earliest'
+DATALAKE_DIR = os.path.join(os.path.dirname(__file__), '..', 'datalake')
+
+
+def parse_args(argv=None):
+    parser = adicionar_argumentos()
+    parser.add_argument('--diretorio', default=DATALAKE_DIR, help="Raiz do data lake local.")
+    parser.add_argument('--max-mb', type=float, default=64, help="Tamanho do buffer que dispara a gravação.")
+    parser.add_argument('--max-idade-s', type=float, default=60, help="Idade máxima do buffer antes da gravação.")
+    return parser.parse_args(argv)
+
 
-consumer = KafkaConsumer(
-    TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    group_id=GROUP_ID,
-    value_deserializer=lambda m: json.loads(m.decode('utf-8')),
-    auto_offset_reset='earliest'
-)
+def criar_handler(args):
+    return SinkDataLake(
+        args.diretorio, TOPIC,
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        max_idade_s=args.max_idade_s,
+    )
 
-print("🧩 Consumidor C (Persistência) iniciado.\n")
 
-for msg in consumer:
-    log = msg.value
-    print(f"[C] Armazenando log no Data Lake: {log}")
\ No newline at end of file
+if __name__ == "__main__":
+    args = parse_args()
+    runtime = runtime_de_args(args, TOPIC, GROUP_ID, criar_handler(args), AUTO_OFFSET_RESET)
+    print(f"🧩 Consumidor C (Persistência) iniciado. Armazenando no Data Lake: {args.diretorio}\n")
+    runtime.executar()
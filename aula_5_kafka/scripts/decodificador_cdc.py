@@ -0,0 +1,129 @@
+import numpy as np
+import orjson
+
+# -------------------------------
+# Decodificador enxuto de envelopes Debezium
+# -------------------------------
+# Com schemas habilitados no JsonConverter, cada mensagem é
+#
+#   {"schema":{...descrição de todos os campos...},"payload":{...}}
+#
+# e o bloco `schema` costuma ser várias vezes maior que o `payload`, além de ser
+# idêntico em todas as mensagens da mesma tabela. O decodificador guarda os bytes
+# do prefixo `{"schema":{...},"payload":` da última mensagem; se a próxima começa
+# com o mesmo prefixo (startswith, sem alocar nada), só o trecho do payload é
+# entregue ao orjson, via memoryview (sem cópia). O schema só é convertido em
+# objeto quando alguém pede (ex.: para descobrir as colunas de timestamp) e uma
+# vez por versão. Envelopes sem schema (schemas.enable=false) vão direto ao orjson.
+#
+# Os timestamps do Debezium (Timestamp/MicroTimestamp/NanoTimestamp) são inteiros
+# desde a época; converter_timestamps transforma uma coluna do lote inteiro de uma
+# vez com numpy (datetime64) em vez de um timedelta por valor.
+
+_INICIO_SCHEMA = b'{"schema":'
+_CHAVE_PAYLOAD = b'"payload":'
+
+UNIDADES_TIMESTAMP = {
+    'io.debezium.time.Timestamp': 'ms',
+    'io.debezium.time.MicroTimestamp': 'us',
+    'io.debezium.time.NanoTimestamp': 'ns',
+}
+
+
+class DecodificadorCDC:
+    """
+    Args:
+        campos (tuple): campos do payload mantidos (op, before, after, source, ts_ms...).
+        colunas (tuple): se informado, `before`/`after` ficam só com essas colunas.
+        timestamps_padrao (dict): coluna -> unidade ('ms'/'us'/'ns') usada enquanto
+            não houver schema na mensagem (envelopes sem schema).
+    """
+
+    def __init__(self, campos=('op', 'before', 'after', 'source'), colunas=None, timestamps_padrao=None):
+        self.campos = tuple(campos)
+        self.colunas = tuple(colunas) if colunas else None
+        self.timestamps_padrao = dict(timestamps_padrao or {})
+        self._prefixo = None          # bytes de '{"schema":{...},"payload":' da versão atual
+        self._schema = None
+        self._timestamps = None
+
+    def _payload_bruto(self, dados):
+        """Payload como dict, pulando o schema sempre que possível."""
+        if self._prefixo is not None and dados.startswith(self._prefixo):
+            inicio = len(self._prefixo)
+        elif dados.startswith(_INICIO_SCHEMA):
+            # Nova versão de schema (ou primeira mensagem): localiza o payload uma vez
+            posicao = dados.find(_CHAVE_PAYLOAD)
+            if posicao < 0:
+                return orjson.loads(dados).get('payload')
+            inicio = posicao + len(_CHAVE_PAYLOAD)
+            self._prefixo = bytes(dados[:inicio])
+            self._schema = self._timestamps = None
+        else:
+            valor = orjson.loads(dados)
+            return valor['payload'] if 'payload' in valor and 'schema' in valor else valor
+
+        fim = dados.rindex(b'}')
+        try:
+            return orjson.loads(memoryview(dados)[inicio:fim])
+        except orjson.JSONDecodeError:
+            # Prefixo coincidiu por acaso ou JSON fora do padrão: decodifica inteiro
+            self._prefixo = None
+            return orjson.loads(dados).get('payload')
+
+    def _projetar(self, payload):
+        if payload is None:
+            return None
+        saida = {campo: payload.get(campo) for campo in self.campos}
+        if self.colunas:
+            for campo in ('before', 'after'):
+                linha = saida.get(campo)
+                if linha:
+                    saida[campo] = {c: linha.get(c) for c in self.colunas}
+        return saida
+
+    def decodificar(self, dados):
+        """Decodifica uma mensagem (bytes); tombstones (None) continuam None."""
+        if dados is None:
+            return None
+        return self._projetar(self._payload_bruto(dados))
+
+    def decodificar_lote(self, valores):
+        return [self.decodificar(v) for v in valores]
+
+    def schema(self):
+        """Schema da versão atual, convertido só quando pedido."""
+        if self._schema is None and self._prefixo is not None:
+            # prefixo = '{"schema":' + schema + ',"payload":'
+            bruto = self._prefixo[len(_INICIO_SCHEMA):-len(_CHAVE_PAYLOAD)].rstrip().rstrip(b',')
+            self._schema = orjson.loads(bruto)
+        return self._schema
+
+    def colunas_timestamp(self):
+        """Coluna -> unidade dos timestamps do `after`, pelo schema (ou o padrão sem schema)."""
+        if self._timestamps is None:
+            schema = self.schema()
+            if schema is None:
+                return self.timestamps_padrao
+            timestamps = {}
+            for campo in schema.get('fields', []):
+                if campo.get('field') == 'after':
+                    for coluna in campo.get('fields', []):
+                        unidade = UNIDADES_TIMESTAMP.get(coluna.get('name'))
+                        if unidade:
+                            timestamps[coluna['field']] = unidade
+            self._timestamps = timestamps
+        return self._timestamps
+
+    def converter_timestamps(self, linhas, colunas=None):
+        """Converte, no lugar, as colunas de timestamp de uma lista de linhas (dicts) para datetime."""
+        colunas = self.colunas_timestamp() if colunas is None else colunas
+        for coluna, unidade in colunas.items():
+            indices = [i for i, linha in enumerate(linhas) if linha.get(coluna) is not None]
+            if not indices:
+                continue
+            valores = np.fromiter((linhas[i][coluna] for i in indices), dtype=np.int64, count=len(indices))
+            # datetime64[us] -> datetime do Python (horário "de parede", sem fuso)
+            convertidos = valores.astype(f'datetime64[{unidade}]').astype('datetime64[us]').tolist()
+            for i, valor in zip(indices, convertidos):
+                linhas[i][coluna] = valor
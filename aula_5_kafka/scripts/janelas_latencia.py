@@ -0,0 +1,193 @@
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+# -------------------------------
+# Agregação em janelas por API
+# -------------------------------
+# Cada API tem uma janela deslizante formada por sub-janelas fixas ("passos").
+# Cada sub-janela guarda um histograma de latência com buckets logarítmicos
+# (mesma ideia do HDR histogram / DDSketch): memória constante, erro relativo
+# limitado nos percentis e fusão por simples soma dos contadores. A janela
+# deslizante é a soma das últimas `janela_s / passo_s` sub-janelas; com
+# janela_s == passo_s ela vira uma janela tumbling.
+
+LIMITE_LENTO_MS = 2000
+
+
+class HistogramaLatencia:
+    """
+    Histograma logarítmico de latências em ms.
+
+    Args:
+        erro_relativo (float): erro relativo máximo dos percentis (0.01 = 1%).
+        max_ms (float): maior latência representável; acima disso cai no último bucket.
+    """
+
+    def __init__(self, erro_relativo=0.01, max_ms=120_000):
+        self.gamma = (1 + erro_relativo) / (1 - erro_relativo)
+        self._log_gamma = math.log(self.gamma)
+        self.n_buckets = int(math.ceil(math.log(max_ms) / self._log_gamma)) + 1
+        self.contagens = np.zeros(self.n_buckets, dtype=np.int64)
+
+    def adicionar(self, valores):
+        """Adiciona um array de latências de uma vez."""
+        valores = np.maximum(np.asarray(valores, dtype=np.float64), 1.0)
+        idx = np.minimum(np.ceil(np.log(valores) / self._log_gamma).astype(np.int64), self.n_buckets - 1)
+        self.contagens += np.bincount(idx, minlength=self.n_buckets)
+
+    def mesclar(self, outro):
+        self.contagens += outro.contagens
+
+    def limpar(self):
+        self.contagens[:] = 0
+
+    @property
+    def total(self):
+        return int(self.contagens.sum())
+
+    def percentis(self, qs):
+        """Percentis (0-100) estimados; NaN se o histograma estiver vazio."""
+        total = self.contagens.sum()
+        if total == 0:
+            return [float('nan')] * len(qs)
+        acumulado = np.cumsum(self.contagens)
+        idx = np.searchsorted(acumulado, np.asarray(qs) / 100.0 * total, side='left')
+        # Valor representativo do bucket i: ponto médio de (gamma^(i-1), gamma^i]
+        return (2 * self.gamma ** idx / (self.gamma + 1)).tolist()
+
+
+class _SubJanela:
+
+    def __init__(self, erro_relativo):
+        self.histograma = HistogramaLatencia(erro_relativo)
+        self.total = 0
+        self.erros = 0
+        self.lentos = 0
+
+    def limpar(self):
+        self.histograma.limpar()
+        self.total = self.erros = self.lentos = 0
+
+
+class AgregadorJanelas:
+    """
+    Mantém, por API, uma janela deslizante de latências e contadores de erro/lentidão
+    e emite um resumo por API a cada passo, com alertas por percentil e taxa de erro.
+
+    Args:
+        janela_s / passo_s: tamanho da janela e intervalo entre resumos (segundos).
+        limite_p95_ms / limite_p99_ms: alerta quando o percentil da janela passa do limite.
+        limite_taxa_erro (float): alerta quando a fração de ERRO na janela passa do limite.
+        saida: função usada para imprimir os resumos.
+        ao_emitir: função chamada com (resumo, motivos) de cada API a cada passo;
+            `motivos` vazio = sem alerta. O padrão imprime formatar(...) em `saida`.
+    """
+
+    def __init__(self, janela_s=60, passo_s=10, limite_p95_ms=2000, limite_p99_ms=2800,
+                 limite_taxa_erro=0.4, erro_relativo=0.01, saida=print, relogio=time.monotonic,
+                 ao_emitir=None):
+        if janela_s % passo_s:
+            raise ValueError("janela_s precisa ser múltiplo de passo_s")
+        self.passos_por_janela = int(janela_s // passo_s)
+        self.janela_s = janela_s
+        self.passo_s = passo_s
+        self.limite_p95_ms = limite_p95_ms
+        self.limite_p99_ms = limite_p99_ms
+        self.limite_taxa_erro = limite_taxa_erro
+        self.erro_relativo = erro_relativo
+        self.saida = saida
+        self.ao_emitir = ao_emitir or self._imprimir
+        self.relogio = relogio
+        self._por_api = {}
+        self._fim_passo = relogio() + passo_s
+
+    def _janelas(self, api):
+        janelas = self._por_api.get(api)
+        if janelas is None:
+            janelas = deque(
+                [_SubJanela(self.erro_relativo) for _ in range(self.passos_por_janela)],
+                maxlen=self.passos_por_janela,
+            )
+            self._por_api[api] = janelas
+        return janelas
+
+    def adicionar_lote(self, logs):
+        """Acumula uma lista de logs (dicts) na sub-janela corrente de cada API."""
+        self.emitir_se_devido()
+        if not logs:
+            return
+        apis = np.array([log['api'] for log in logs])
+        tempos = np.fromiter((log['tempo_resposta_ms'] for log in logs), dtype=np.float64, count=len(logs))
+        erros = np.array([log['status'] == 'ERRO' for log in logs])
+
+        for api in np.unique(apis):
+            mascara = apis == api
+            atual = self._janelas(str(api))[-1]
+            tempos_api = tempos[mascara]
+            atual.histograma.adicionar(tempos_api)
+            atual.total += int(mascara.sum())
+            atual.erros += int(erros[mascara].sum())
+            atual.lentos += int((tempos_api > LIMITE_LENTO_MS).sum())
+
+    def limpar(self):
+        """Descarta as janelas de todas as APIs (ex.: quando as partições mudam de dono)."""
+        self._por_api.clear()
+
+    def emitir_se_devido(self):
+        """Fecha os passos vencidos, emitindo um resumo por API para cada um."""
+        while self.relogio() >= self._fim_passo:
+            self.emitir()
+            for janelas in self._por_api.values():
+                # Rotaciona: a sub-janela mais antiga é reaproveitada como a nova corrente
+                mais_antiga = janelas[0]
+                mais_antiga.limpar()
+                janelas.append(mais_antiga)
+            self._fim_passo += self.passo_s
+
+    def resumo(self, api):
+        janelas = self._por_api[api]
+        hist = HistogramaLatencia(self.erro_relativo)
+        total = erros = lentos = 0
+        for sub in janelas:
+            hist.mesclar(sub.histograma)
+            total += sub.total
+            erros += sub.erros
+            lentos += sub.lentos
+        p50, p95, p99 = hist.percentis([50, 95, 99])
+        return {
+            'api': api, 'total': total, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99,
+            'taxa_erro': erros / total if total else 0.0,
+            'taxa_lento': lentos / total if total else 0.0,
+        }
+
+    def motivos(self, r):
+        """Limites ultrapassados pelo resumo `r` (lista vazia = sem alerta)."""
+        motivos = []
+        if r['p95_ms'] > self.limite_p95_ms:
+            motivos.append(f"p95 {r['p95_ms']:.0f}ms > {self.limite_p95_ms}ms")
+        if r['p99_ms'] > self.limite_p99_ms:
+            motivos.append(f"p99 {r['p99_ms']:.0f}ms > {self.limite_p99_ms}ms")
+        if r['taxa_erro'] > self.limite_taxa_erro:
+            motivos.append(f"erro {r['taxa_erro']:.1%} > {self.limite_taxa_erro:.0%}")
+        return motivos
+
+    def formatar(self, r, motivos):
+        linha = (f"{r['api']}: n={r['total']} p50={r['p50_ms']:.0f}ms p95={r['p95_ms']:.0f}ms "
+                 f"p99={r['p99_ms']:.0f}ms erro={r['taxa_erro']:.1%} lento={r['taxa_lento']:.1%} "
+                 f"(janela {self.janela_s}s)")
+        if motivos:
+            return f"[A] 🚨 ALERTA {linha} -> {'; '.join(motivos)}"
+        return f"[A] OK {linha}"
+
+    def _imprimir(self, resumo, motivos):
+        self.saida(self.formatar(resumo, motivos))
+
+    def emitir(self):
+        for api in sorted(self._por_api):
+            r = self.resumo(api)
+            if not r['total']:
+                continue
+            self.ao_emitir(r, self.motivos(r))
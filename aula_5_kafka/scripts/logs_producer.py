@@ -1,36 +1,164 @@
-import json
+import argparse
 import time
 import random
 from kafka import KafkaProducer
 from datetime import datetime
 
+import numpy as np
+
+from serde_logs import SerdeLogs
+
 KAFKA_BROKER = 'localhost:9092'
 TOPIC = 'logs.aplicacoes'
 
 APIS = ['api_login', 'api_pedidos', 'api_pagamentos', 'api_usuarios']
 STATUS = ['OK', 'ERRO', 'LENTO']
 
-producer = KafkaProducer(
-    bootstrap_servers=KAFKA_BROKER,
-    value_serializer=lambda v: json.dumps(v).encode('utf-8')
-)
-
-print("🚀 Enviando logs simulados de microsserviços...")
-
-try:
-    while True:
-        api = random.choice(APIS)
-        status = random.choice(STATUS)
-        log = {
-            "api": api,
-            "status": status,
-            "tempo_resposta_ms": random.randint(50, 3000), # 2000, 250
-            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        producer.send(TOPIC, value=log)
-        print(f"📡 Log enviado: {log}")
-        time.sleep(0.5)
-except KeyboardInterrupt:
-    print("\nEncerrando produtor...")
-finally:
-    producer.close()
\ No newline at end of file
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Produtor de logs simulados de microsserviços.")
+    parser.add_argument('--formato', default='json', choices=['json', 'binario'],
+                        help="Formato das mensagens: JSON legado ou binário compacto com schema.")
+    parser.add_argument('--versao-schema', type=int, default=None,
+                        help="Versão do schema binário (padrão: a negociada com os consumidores).")
+    parser.add_argument('--carga', action='store_true',
+                        help="Modo gerador de carga (alto volume, sem print por mensagem).")
+    parser.add_argument('--taxa', default='max',
+                        help="Mensagens/s alvo no modo carga, ou 'max' para enviar o mais rápido possível.")
+    parser.add_argument('--total', type=int, default=1_000_000,
+                        help="Total de mensagens a enviar no modo carga.")
+    parser.add_argument('--lote', type=int, default=10_000,
+                        help="Quantidade de mensagens geradas por vez (vetorizado).")
+    parser.add_argument('--batch-size', type=int, default=512 * 1024,
+                        help="batch.size do produtor, em bytes.")
+    parser.add_argument('--linger-ms', type=int, default=20,
+                        help="linger.ms do produtor.")
+    parser.add_argument('--compressao', default='lz4', choices=['none', 'gzip', 'snappy', 'lz4', 'zstd'],
+                        help="Codec de compressão dos batches.")
+    parser.add_argument('--acks', default='1', choices=['0', '1', 'all'])
+    parser.add_argument('--amostra-latencia', type=int, default=100,
+                        help="Mede a latência de entrega de 1 a cada N mensagens.")
+    return parser.parse_args()
+
+
+def modo_demo(serde):
+    """Modo original: um log legível a cada 0.5 s."""
+    producer = KafkaProducer(
+        bootstrap_servers=KAFKA_BROKER,
+        value_serializer=serde.serializar
+    )
+
+    print("🚀 Enviando logs simulados de microsserviços...")
+
+    try:
+        while True:
+            api = random.choice(APIS)
+            status = random.choice(STATUS)
+            log = {
+                "api": api,
+                "status": status,
+                "tempo_resposta_ms": random.randint(50, 3000), # 2000, 250
+                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            # Chave = API: todos os logs de uma API caem na mesma partição, em ordem
+            producer.send(TOPIC, key=api.encode(), value=log)
+            print(f"📡 Log enviado: {log}")
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print("\nEncerrando produtor...")
+    finally:
+        producer.close()
+
+
+def gerar_lote(rng, n, serde, n_apis, n_status):
+    """
+    Gera `n` logs de uma vez: os sorteios são feitos em numpy (um único sorteio por
+    campo para o lote inteiro) e os payloads saem direto dos códigos dos enums.
+    Devolve também os códigos de API, usados para escolher a chave de cada mensagem.
+    """
+    apis = rng.integers(0, n_apis, n).tolist()
+    payloads = serde.serializar_codigos(
+        apis,
+        rng.integers(0, n_status, n).tolist(),
+        rng.integers(50, 3001, n).tolist(),
+        int(time.time()),
+    )
+    return apis, payloads
+
+
+def modo_carga(args, serde):
+    """Gerador de carga: envia `--total` mensagens na taxa alvo e mede vazão e latência de entrega."""
+    taxa = None if args.taxa == 'max' else float(args.taxa)
+    producer = KafkaProducer(
+        bootstrap_servers=KAFKA_BROKER,
+        batch_size=args.batch_size,
+        linger_ms=args.linger_ms,
+        compression_type=None if args.compressao == 'none' else args.compressao,
+        acks=args.acks if args.acks == 'all' else int(args.acks),
+        buffer_memory=256 * 1024 * 1024,
+        max_request_size=4 * 1024 * 1024,
+    )
+
+    rng = np.random.default_rng()
+    chaves = [api.encode() for api in serde.simbolos('api')]
+    n_apis, n_status = len(chaves), len(serde.simbolos('status'))
+    latencias = []
+    erros = [0]
+
+    def registrar_latencia(enviado_em):
+        return lambda _md: latencias.append(time.perf_counter() - enviado_em)
+
+    def registrar_erro(_exc):
+        erros[0] += 1
+
+    print(f"🚀 Modo carga: {args.total} mensagens ({args.formato}), taxa={args.taxa}, lote={args.lote}, "
+          f"batch_size={args.batch_size}, linger_ms={args.linger_ms}, compressão={args.compressao}")
+
+    enviados = 0
+    inicio = time.perf_counter()
+    ultimo_relatorio, enviados_relatorio = inicio, 0
+    try:
+        while enviados < args.total:
+            apis, payloads = gerar_lote(rng, min(args.lote, args.total - enviados), serde, n_apis, n_status)
+            for i, (api, payload) in enumerate(zip(apis, payloads)):
+                future = producer.send(TOPIC, key=chaves[api], value=payload)
+                if i % args.amostra_latencia == 0:
+                    future.add_callback(registrar_latencia(time.perf_counter()))
+                    future.add_errback(registrar_erro)
+            enviados += len(payloads)
+
+            agora = time.perf_counter()
+            if taxa:
+                # Controle de taxa por lote: espera até o instante em que o lote "deveria" terminar
+                atraso = inicio + enviados / taxa - agora
+                if atraso > 0:
+                    time.sleep(atraso)
+                    agora = time.perf_counter()
+
+            if agora - ultimo_relatorio >= 1.0:
+                print(f"[produtor] {(enviados - enviados_relatorio) / (agora - ultimo_relatorio):,.0f} msgs/s "
+                      f"(total {enviados:,})")
+                ultimo_relatorio, enviados_relatorio = agora, enviados
+    except KeyboardInterrupt:
+        print("\nInterrompido, aguardando entregas pendentes...")
+    finally:
+        producer.flush()
+        duracao = time.perf_counter() - inicio
+        producer.close()
+
+    print("\n===== Resultado do gerador de carga =====")
+    print(f"Mensagens enviadas: {enviados:,} em {duracao:.2f} s -> {enviados / duracao:,.0f} msgs/s")
+    print(f"Falhas de entrega (amostradas): {erros[0]}")
+    if latencias:
+        p50, p95, p99, pmax = np.percentile(np.asarray(latencias) * 1000, [50, 95, 99, 100])
+        print(f"Latência de entrega (ms, {len(latencias):,} amostras): "
+              f"p50={p50:.1f} p95={p95:.1f} p99={p99:.1f} max={pmax:.1f}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    serde = SerdeLogs(formato=args.formato, versao=args.versao_schema)
+    if args.carga:
+        modo_carga(args, serde)
+    else:
+        modo_demo(serde)
@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from serde_logs import timestamp_epoch
+
+# -------------------------------
+# Métricas dos consumidores
+# -------------------------------
+# Instrumentação comum a todos os consumidores do runtime:
+#
+#   - kafka_consumidor_registros_total{particao}: registros processados (a vazão
+#     sai de rate() no Prometheus e do resumo periódico);
+#   - kafka_consumidor_lag{particao}: end offset - offset commitado do grupo;
+#   - kafka_consumidor_lote_segundos: histograma do tempo de processar_lote + commit;
+#   - kafka_consumidor_latencia_ponta_a_ponta_segundos: histograma de
+#     (instante do processamento - campo `timestamp` do registro).
+#
+# A exportação é no formato texto do Prometheus, por arquivo (textfile collector
+# do node_exporter, gravado de forma atômica) e/ou por HTTP em /metrics. O lag
+# exige uma ida ao broker, então só é atualizado a cada `intervalo_s`.
+
+LIMITES_LOTE_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_LATENCIA_S = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+
+def offsets_commitados(consumer, particoes):
+    """{partição: offset commitado} das partições com commit, numa única ida ao broker."""
+    coordenador = getattr(consumer, '_coordinator', None)
+    if coordenador is None:
+        # Fonte de replay (segmento_topico.FonteReplay): tudo em memória
+        commitados = {tp: consumer.committed(tp) for tp in particoes}
+        return {tp: offset for tp, offset in commitados.items() if offset is not None}
+    # KafkaConsumer.committed() faz um OffsetFetch por partição; o coordenador do
+    # grupo (que é quem committed() usa) aceita todas as partições num só pedido
+    return {tp: om.offset for tp, om in coordenador.fetch_committed_offsets(particoes).items()}
+
+
+class HistogramaFixo:
+    """Histograma com limites fixos (buckets `le` do Prometheus)."""
+
+    def __init__(self, limites):
+        self.limites = np.asarray(limites, dtype=np.float64)
+        self.contagens = np.zeros(len(limites) + 1, dtype=np.int64)  # último = +Inf
+        self.soma = 0.0
+
+    def adicionar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64)
+        if not valores.size:
+            return
+        idx = np.searchsorted(self.limites, valores, side='left')
+        self.contagens += np.bincount(idx, minlength=len(self.contagens))
+        self.soma += float(valores.sum())
+
+    @property
+    def total(self):
+        return int(self.contagens.sum())
+
+    def percentil(self, q, desde=None):
+        """Limite superior do bucket que contém o percentil `q` (opcionalmente só do delta `desde`)."""
+        contagens = self.contagens if desde is None else self.contagens - desde
+        total = contagens.sum()
+        if not total:
+            return float('nan')
+        i = int(np.searchsorted(np.cumsum(contagens), q / 100.0 * total, side='left'))
+        return float(self.limites[i]) if i < len(self.limites) else float('inf')
+
+    def linhas_prometheus(self, nome, rotulos):
+        linhas = []
+        acumulado = np.cumsum(self.contagens)
+        for limite, n in zip(self.limites, acumulado):
+            linhas.append(f'{nome}_bucket{{{rotulos},le="{limite:g}"}} {n}')
+        linhas.append(f'{nome}_bucket{{{rotulos},le="+Inf"}} {acumulado[-1]}')
+        linhas.append(f'{nome}_sum{{{rotulos}}} {self.soma}')
+        linhas.append(f'{nome}_count{{{rotulos}}} {acumulado[-1]}')
+        return linhas
+
+
+_CACHE_EPOCH = {}
+
+
+def epoch_do_registro(registro):
+    """
+    Epoch (s) do evento: campo `timestamp` do log quando existe; `ts_ms` para
+    envelopes do Debezium; senão o timestamp do próprio registro Kafka.
+    """
+    valor = registro.value
+    if isinstance(valor, dict):
+        ts = valor.get('timestamp')
+        if isinstance(ts, str):
+            epoch = _CACHE_EPOCH.get(ts)
+            if epoch is None:
+                if len(_CACHE_EPOCH) > 100_000:
+                    _CACHE_EPOCH.clear()
+                epoch = _CACHE_EPOCH[ts] = timestamp_epoch(valor)
+            return epoch
+        if ts is not None:
+            return ts
+        if 'ts_ms' in valor:
+            return valor['ts_ms'] / 1000
+    return registro.timestamp / 1000
+
+
+class _HandlerHTTP(BaseHTTPRequestHandler):
+    metricas = None
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        corpo = self.metricas.texto_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricasConsumidor:
+    """
+    Args:
+        grupo / topico: usados como rótulos das métricas.
+        porta (int): se informada, serve /metrics por HTTP nessa porta.
+        arquivo (str): se informado, grava o texto do Prometheus nesse caminho.
+        intervalo_s (float): intervalo de atualização do lag, do arquivo e do resumo.
+        resumo (bool): imprime uma linha de resumo a cada intervalo.
+        instancia: rótulo extra que distingue processos do mesmo grupo (runner paralelo).
+    """
+
+    def __init__(self, grupo, topico, porta=None, arquivo=None, intervalo_s=15, resumo=True, instancia=None):
+        self.grupo = grupo
+        self.topico = topico
+        self.arquivo = arquivo
+        self.intervalo_s = intervalo_s
+        self.resumo = resumo
+        self._rotulos = f'grupo="{grupo}",topico="{topico}"'
+        if instancia is not None:
+            self._rotulos += f',instancia="{instancia}"'
+        self._lock = threading.Lock()
+
+        self.registros = Counter()
+        self.lag = {}
+        self.lotes = HistogramaFixo(LIMITES_LOTE_S)
+        self.latencia = HistogramaFixo(LIMITES_LATENCIA_S)
+
+        self._ultima_exportacao = time.monotonic()
+        self._registros_anteriores = 0
+        self._lotes_anteriores = self.lotes.contagens.copy()
+        self._latencia_anterior = self.latencia.contagens.copy()
+
+        self._servidor = None
+        if porta:
+            handler = type('HandlerMetricas', (_HandlerHTTP,), {'metricas': self})
+            self._servidor = ThreadingHTTPServer(('0.0.0.0', porta), handler)
+            threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+            print(f"[métricas] servindo em http://localhost:{porta}/metrics")
+
+    def observar_lote(self, por_particao, duracao_s):
+        """Registra um lote do poll(): contagem por partição, tempo e latência ponta a ponta."""
+        agora = time.time()
+        with self._lock:
+            for tp, lote in por_particao.items():
+                self.registros[tp.partition] += len(lote)
+            self.lotes.adicionar([duracao_s])
+            self.latencia.adicionar([agora - epoch_do_registro(r) for lote in por_particao.values() for r in lote])
+
+    def atualizar_lag(self, consumer):
+        particoes = list(consumer.assignment())
+        if not particoes:
+            with self._lock:
+                self.lag = {}
+            return
+        fins = consumer.end_offsets(particoes)
+        commitados = offsets_commitados(consumer, particoes)
+        # Sem commit ainda, o consumidor começa do início retido do log, não do offset 0
+        sem_commit = [tp for tp in particoes if tp not in commitados]
+        if sem_commit:
+            commitados.update(consumer.beginning_offsets(sem_commit))
+        lag = {tp.partition: fins[tp] - commitados[tp] for tp in particoes}
+        with self._lock:
+            self.lag = lag
+
+    def talvez_exportar(self, consumer):
+        """Chamado a cada volta do loop; atualiza lag, arquivo e resumo quando o intervalo vence."""
+        agora = time.monotonic()
+        decorrido = agora - self._ultima_exportacao
+        if decorrido < self.intervalo_s:
+            return
+        self.atualizar_lag(consumer)
+        if self.arquivo:
+            self.gravar_arquivo()
+        if self.resumo:
+            self.imprimir_resumo(decorrido)
+        self._ultima_exportacao = agora
+
+    def texto_prometheus(self):
+        r = self._rotulos
+        with self._lock:
+            linhas = [
+                '# HELP kafka_consumidor_registros_total Registros processados por partição.',
+                '# TYPE kafka_consumidor_registros_total counter',
+                *(f'kafka_consumidor_registros_total{{{r},particao="{p}"}} {n}'
+                  for p, n in sorted(self.registros.items())),
+                '# HELP kafka_consumidor_lag End offset menos offset commitado.',
+                '# TYPE kafka_consumidor_lag gauge',
+                *(f'kafka_consumidor_lag{{{r},particao="{p}"}} {n}' for p, n in sorted(self.lag.items())),
+                '# HELP kafka_consumidor_lote_segundos Tempo de processamento de cada lote.',
+                '# TYPE kafka_consumidor_lote_segundos histogram',
+                *self.lotes.linhas_prometheus('kafka_consumidor_lote_segundos', r),
+                '# HELP kafka_consumidor_latencia_ponta_a_ponta_segundos Do timestamp do registro ao processamento.',
+                '# TYPE kafka_consumidor_latencia_ponta_a_ponta_segundos histogram',
+                *self.latencia.linhas_prometheus('kafka_consumidor_latencia_ponta_a_ponta_segundos', r),
+            ]
+        return '\n'.join(linhas) + '\n'
+
+    def gravar_arquivo(self):
+        tmp = f"{self.arquivo}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.texto_prometheus())
+        os.replace(tmp, self.arquivo)
+
+    def imprimir_resumo(self, decorrido):
+        with self._lock:
+            total = sum(self.registros.values())
+            vazao = (total - self._registros_anteriores) / decorrido
+            lote_p50 = self.lotes.percentil(50, self._lotes_anteriores)
+            lote_p99 = self.lotes.percentil(99, self._lotes_anteriores)
+            e2e_p50 = self.latencia.percentil(50, self._latencia_anterior)
+            e2e_p99 = self.latencia.percentil(99, self._latencia_anterior)
+            lag = dict(self.lag)
+            self._registros_anteriores = total
+            self._lotes_anteriores = self.lotes.contagens.copy()
+            self._latencia_anterior = self.latencia.contagens.copy()
+
+        lag_particoes = ' '.join(f"p{p}={n:,}" for p, n in sorted(lag.items()))
+        print(f"[métricas] {self.grupo}: {vazao:,.0f} reg/s | lag {sum(lag.values()):,} ({lag_particoes or '-'}) | "
+              f"lote p50≤{lote_p50 * 1000:g}ms p99≤{lote_p99 * 1000:g}ms | "
+              f"ponta a ponta p50≤{e2e_p50:g}s p99≤{e2e_p99:g}s")
+
+    def fechar(self):
+        if self.arquivo:
+            self.gravar_arquivo()
+        if self._servidor:
+            self._servidor.shutdown()
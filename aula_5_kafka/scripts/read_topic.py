@@ -1,11 +1,32 @@
+import argparse
+import csv
 import json
-from kafka import KafkaConsumer
+import os
+import time
 from datetime import datetime
+from io import StringIO
+
+import psycopg2
+from psycopg2.extras import execute_values
+from kafka import KafkaConsumer
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from decodificador_cdc import DecodificadorCDC
+from runtime_consumidor import adicionar_argumentos, runtime_de_args
 
 # --- Configurações ---
 KAFKA_BROKER = 'localhost:9092'  # Endereço do broker Kafka
 KAFKA_TOPIC = 'aeroporto.public.eventos_voo'
 CONSUMER_GROUP = 'monitor-python-grupo' # ID do grupo de consumidores
+REPLICA_GROUP = 'replica-eventos-voo'    # Grupo do modo réplica (offsets próprios)
+
+# Réplica de eventos_voo no PostgreSQL de destino
+TABELA_REPLICA = 'eventos_voo_replica'
+TABELA_CHECKPOINT = 'cdc_checkpoints'
+CHAVE_REPLICA = 'id'
+COLUNAS_REPLICA = ['id', 'voo_id', 'timestamp', 'evento', 'observacoes']
+# Usado quando o envelope vem sem schema; com schema, as colunas saem dele
+TIMESTAMPS_REPLICA = {'timestamp': 'us'}  # io.debezium.time.MicroTimestamp
 
 def formatar_timestamp(ts_micro):
     """Converte timestamp de microssegundos para uma string legível."""
@@ -76,7 +97,229 @@ def analisar_evento(payload):
     print("="*50 + "\n")
 
 
-if __name__ == "__main__":
+# -------------------------------
+# Motor de aplicação (modo réplica)
+# -------------------------------
+# Transforma os eventos c/u/d/r do Debezium em operações em lote numa tabela
+# réplica de outro PostgreSQL:
+#
+#   - dentro de um micro-lote, as mudanças de uma mesma chave são colapsadas na
+#     última (o Debezium particiona pela chave primária, então a ordem por chave
+#     é a ordem dos offsets na partição);
+#   - chaves cujo último evento é o snapshot inicial (op='r') vão por COPY para uma
+#     tabela temporária e entram na réplica com um único INSERT ... ON CONFLICT;
+#   - c/u viram um upsert com execute_values e d vira um DELETE ... = ANY;
+#   - na mesma transação, cdc_checkpoints guarda o último offset e o LSN de origem
+#     de cada partição. Ao receber partições o consumidor volta para o offset
+#     seguinte ao checkpoint, então reiniciar nunca reaplica nem pula eventos.
+
+DDL_REPLICA = f"""
+CREATE TABLE IF NOT EXISTS {TABELA_REPLICA} (
+    id INTEGER PRIMARY KEY,
+    voo_id INTEGER,
+    "timestamp" TIMESTAMP,
+    evento TEXT,
+    observacoes TEXT
+);
+CREATE TABLE IF NOT EXISTS {TABELA_CHECKPOINT} (
+    topico TEXT NOT NULL,
+    particao INTEGER NOT NULL,
+    ultimo_offset BIGINT NOT NULL,
+    lsn BIGINT,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (topico, particao)
+);
+"""
+
+def get_conn():
+    """Conexão psycopg2 com o PostgreSQL de destino (variáveis PG_*)."""
+    return psycopg2.connect(
+        host=os.getenv("PG_HOST", "localhost"),
+        port=os.getenv("PG_PORT", "5433"),
+        dbname=os.getenv("PG_DB", "mydb"),
+        user=os.getenv("PG_USER", "postgres1"),
+        password=os.getenv("PG_PASS", "postgres1"),
+    )
+
+
+_DECODIFICADOR_MONITOR = DecodificadorCDC()
+
+
+def desserializar_envelope(dados):
+    """Aceita envelopes com ou sem schema; tombstones (valor nulo) viram None."""
+    return _DECODIFICADOR_MONITOR.decodificar(dados)
+
+
+def linha_replica(after):
+    """Tupla na ordem de COLUNAS_REPLICA (timestamps já convertidos no lote)."""
+    return tuple(after.get(col) for col in COLUNAS_REPLICA)
+
+
+class AplicadorCDC:
+    """
+    Args:
+        conn: conexão psycopg2 com o banco de destino.
+        topico (str): tópico Debezium da tabela replicada.
+        max_eventos (int): eventos por micro-lote antes de aplicar.
+        max_idade_s (float): tempo máximo que um evento espera para ser aplicado.
+    """
+
+    def __init__(self, conn, topico=KAFKA_TOPIC, max_eventos=20_000, max_idade_s=0.2):
+        self.conn = conn
+        self.topico = topico
+        self.max_eventos = max_eventos
+        self.max_idade_s = max_idade_s
+        self._estado = {}             # chave -> (op, linha) da última mudança no lote
+        self._eventos = 0
+        self._ultimo_offset = {}      # particao -> (offset, lsn)
+        self._aplicado = {}           # particao -> último offset já aplicado
+        self._commit_pendente = {}
+        self._lote_desde = None
+        self.decodificador = DecodificadorCDC(
+            campos=('op', 'before', 'after', 'source'),
+            colunas=COLUNAS_REPLICA,
+            timestamps_padrao=TIMESTAMPS_REPLICA,
+        )
+
+        with self.conn.cursor() as cur:
+            cur.execute(DDL_REPLICA)
+        self.conn.commit()
+
+        colunas = ', '.join(f'"{c}"' for c in COLUNAS_REPLICA)
+        atualizacoes = ', '.join(f'"{c}" = EXCLUDED."{c}"' for c in COLUNAS_REPLICA if c != CHAVE_REPLICA)
+        self._sql_upsert = (f'INSERT INTO {TABELA_REPLICA} ({colunas}) VALUES %s '
+                            f'ON CONFLICT ("{CHAVE_REPLICA}") DO UPDATE SET {atualizacoes}')
+        self._sql_merge_snapshot = (f'INSERT INTO {TABELA_REPLICA} ({colunas}) SELECT {colunas} FROM _snapshot '
+                                    f'ON CONFLICT ("{CHAVE_REPLICA}") DO UPDATE SET {atualizacoes}')
+        self._colunas = colunas
+
+    def ao_atribuir(self, consumer, particoes):
+        """Reposiciona as partições logo após o último offset aplicado na réplica."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"SELECT particao, ultimo_offset FROM {TABELA_CHECKPOINT} WHERE topico = %s",
+                (self.topico,)
+            )
+            self._aplicado.update(dict(cur.fetchall()))
+        self.conn.commit()
+        for tp in particoes:
+            if tp.partition in self._aplicado:
+                consumer.seek(tp, self._aplicado[tp.partition] + 1)
+
+    def processar_lote(self, registros):
+        # Os valores chegam em bytes: o lote inteiro é decodificado de uma vez
+        registros = [r for r in registros if r.offset > self._aplicado.get(r.partition, -1)]
+        payloads = self.decodificador.decodificar_lote([r.value for r in registros])
+        self.decodificador.converter_timestamps([p['after'] for p in payloads if p and p['after']])
+
+        for r, payload in zip(registros, payloads):
+            if payload is not None:
+                op = payload['op']
+                if op == 'd':
+                    self._estado[payload['before'][CHAVE_REPLICA]] = ('d', None)
+                elif op in ('c', 'u', 'r'):
+                    after = payload['after']
+                    self._estado[after[CHAVE_REPLICA]] = (op, linha_replica(after))
+                self._eventos += 1
+            lsn = ((payload or {}).get('source') or {}).get('lsn')
+            self._ultimo_offset[r.partition] = (r.offset, lsn)
+
+        if self._lote_desde is None and self._ultimo_offset:
+            self._lote_desde = time.monotonic()
+        if self._eventos >= self.max_eventos:
+            self.flush()
+        else:
+            self.ocioso()
+
+    def ocioso(self):
+        if self._lote_desde is not None and time.monotonic() - self._lote_desde >= self.max_idade_s:
+            self.flush()
+
+    def _copiar_snapshot(self, cur, linhas):
+        buffer = StringIO()
+        csv.writer(buffer).writerows(
+            tuple('\\N' if v is None else v for v in linha) for linha in linhas
+        )
+        buffer.seek(0)
+        cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS _snapshot (LIKE {TABELA_REPLICA}) ON COMMIT DELETE ROWS")
+        cur.copy_expert(f"COPY _snapshot ({self._colunas}) FROM STDIN WITH CSV NULL '\\N'", buffer)
+        cur.execute(self._sql_merge_snapshot)
+
+    def flush(self):
+        """Aplica o micro-lote na réplica e grava o checkpoint na mesma transação."""
+        if not self._ultimo_offset:
+            return
+        inicio = time.perf_counter()
+        snapshot, upserts, deletes = [], [], []
+        for chave, (op, linha) in self._estado.items():
+            if op == 'd':
+                deletes.append(chave)
+            elif op == 'r':
+                snapshot.append(linha)
+            else:
+                upserts.append(linha)
+
+        try:
+            with self.conn.cursor() as cur:
+                if snapshot:
+                    self._copiar_snapshot(cur, snapshot)
+                if upserts:
+                    execute_values(cur, self._sql_upsert, upserts, page_size=5000)
+                if deletes:
+                    cur.execute(f'DELETE FROM {TABELA_REPLICA} WHERE "{CHAVE_REPLICA}" = ANY(%s)', (deletes,))
+                execute_values(
+                    cur,
+                    f"""INSERT INTO {TABELA_CHECKPOINT} (topico, particao, ultimo_offset, lsn) VALUES %s
+                        ON CONFLICT (topico, particao) DO UPDATE
+                        SET ultimo_offset = EXCLUDED.ultimo_offset,
+                            lsn = COALESCE(EXCLUDED.lsn, {TABELA_CHECKPOINT}.lsn),
+                            atualizado_em = NOW()""",
+                    [(self.topico, p, o, lsn) for p, (o, lsn) in self._ultimo_offset.items()]
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        for particao, (offset, _lsn) in self._ultimo_offset.items():
+            self._aplicado[particao] = offset
+            self._commit_pendente[TopicPartition(self.topico, particao)] = OffsetAndMetadata(offset + 1, '', -1)
+
+        atraso = time.monotonic() - self._lote_desde
+        print(f"[réplica] {self._eventos} eventos -> {len(snapshot)} snapshot, {len(upserts)} upserts, "
+              f"{len(deletes)} deletes em {time.perf_counter() - inicio:.3f}s (lote aberto há {atraso:.3f}s)")
+        self._estado.clear()
+        self._ultimo_offset.clear()
+        self._eventos = 0
+        self._lote_desde = None
+
+    def offsets_para_commit(self):
+        offsets, self._commit_pendente = self._commit_pendente, {}
+        return offsets
+
+
+def parse_args(argv=None):
+    parser = adicionar_argumentos(argparse.ArgumentParser(
+        description="Leitor do tópico CDC de eventos de voo: monitor ou réplica."))
+    parser.add_argument('--modo', default='monitor', choices=['monitor', 'replica'],
+                        help="monitor: imprime cada evento; replica: aplica os eventos na tabela réplica.")
+    parser.add_argument('--max-eventos', type=int, default=20_000, help="Eventos por micro-lote (réplica).")
+    parser.add_argument('--max-idade-ms', type=float, default=200,
+                        help="Tempo máximo de um micro-lote antes de aplicar (réplica).")
+    parser.set_defaults(timeout_ms=100, fetch_max_wait_ms=50)
+    return parser.parse_args(argv)
+
+
+def executar_replica(args):
+    aplicador = AplicadorCDC(get_conn(), max_eventos=args.max_eventos, max_idade_s=args.max_idade_ms / 1000)
+    # Sem value_deserializer: o AplicadorCDC decodifica cada lote de bytes de uma vez
+    runtime = runtime_de_args(args, KAFKA_TOPIC, REPLICA_GROUP, aplicador, 'earliest',
+                              desserializador=None)
+    print(f"Aplicando {KAFKA_TOPIC} em {TABELA_REPLICA} (checkpoint em {TABELA_CHECKPOINT})...")
+    runtime.executar()
+
+
+def executar_monitor():
     print("Iniciando consumidor Python para o tópico de voos...")
     print(f"Conectando ao broker: {KAFKA_BROKER}")
     print(f"Monitorando o tópico: {KAFKA_TOPIC}")
@@ -90,12 +333,12 @@ if __name__ == "__main__":
             bootstrap_servers=KAFKA_BROKER,
             auto_offset_reset='latest',  # Começa a ler a partir da última mensagem
             group_id=CONSUMER_GROUP,
-            value_deserializer=lambda m: json.loads(m.decode('utf-8'))
+            value_deserializer=desserializar_envelope
         )
 
         # O loop 'for' irá aguardar aqui até que uma nova mensagem chegue
         for message in consumer:
-            payload = message.value.get('payload')
+            payload = message.value
             if payload:
                 analisar_evento(payload)
 
@@ -106,4 +349,12 @@ if __name__ == "__main__":
     finally:
         if consumer:
             consumer.close()
-            print("Consumidor Kafka fechado.")
\ No newline at end of file
+            print("Consumidor Kafka fechado.")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.modo == 'replica':
+        executar_replica(args)
+    else:
+        executar_monitor()
@@ -0,0 +1,198 @@
+import operator
+import re
+import time
+
+from kafka import KafkaConsumer, KafkaProducer
+from kafka.structs import OffsetAndMetadata
+
+from runtime_consumidor import KAFKA_BROKER, adicionar_argumentos
+from serde_logs import anunciar_consumidor, desserializar
+
+# -------------------------------
+# Roteador de logs por severidade
+# -------------------------------
+# Consome logs.aplicacoes uma única vez e republica cada log (os mesmos bytes,
+# com a mesma chave) nos tópicos derivados cujas regras ele satisfaz, ex.:
+#
+#   logs.aplicacoes.erro   <- status=ERRO
+#   logs.aplicacoes.lento  <- status=LENTO | tempo_resposta_ms>2000
+#
+# Cada lote do poll() vira uma transação do Kafka: as mensagens roteadas e os
+# offsets consumidos são confirmados juntos (send_offsets_to_transaction). Se o
+# roteador cair no meio, a transação é abortada e o lote é reprocessado sem
+# duplicar nada para quem lê os tópicos derivados com isolation_level=read_committed
+# (padrão do RuntimeConsumidor).
+#
+# Regra: condições `campo<op>valor` separadas por `|` (OU). Operadores: = != > >= < <=.
+
+TOPIC = 'logs.aplicacoes'
+GROUP_ID = 'roteador-logs'
+
+ROTAS_PADRAO = [
+    'logs.aplicacoes.erro:status=ERRO',
+    'logs.aplicacoes.lento:status=LENTO|tempo_resposta_ms>2000',
+]
+
+_OPERADORES = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+}
+_CONDICAO = re.compile(r'^\s*(\w+)\s*(==|!=|>=|<=|=|>|<)\s*(.+?)\s*$')
+
+
+def _valor(texto):
+    try:
+        return int(texto)
+    except ValueError:
+        try:
+            return float(texto)
+        except ValueError:
+            return texto
+
+
+def compilar_regra(regra):
+    """'status=ERRO|tempo_resposta_ms>2000' -> função(log) -> bool."""
+    condicoes = []
+    for parte in regra.split('|'):
+        m = _CONDICAO.match(parte)
+        if not m:
+            raise ValueError(f"Condição inválida: '{parte}'")
+        campo, op, valor = m.groups()
+        condicoes.append((campo, _OPERADORES[op], _valor(valor)))
+
+    def predicado(log):
+        return any(campo in log and op(log[campo], valor) for campo, op, valor in condicoes)
+    return predicado
+
+
+def compilar_rotas(rotas):
+    """['topico:regra', ...] -> [(topico, predicado)]."""
+    compiladas = []
+    for rota in rotas:
+        topico, _, regra = rota.partition(':')
+        if not regra:
+            raise ValueError(f"Rota sem regra: '{rota}' (use topico:regra)")
+        compiladas.append((topico, compilar_regra(regra)))
+    return compiladas
+
+
+class RoteadorLogs:
+    """
+    Args:
+        rotas: lista de (topico_destino, predicado(log)).
+        id_transacional (str): transactional.id do produtor; precisa ser estável por
+            instância para que um roteador "zumbi" seja barrado (fencing) ao reiniciar.
+    """
+
+    def __init__(self, rotas, id_transacional, max_records=5000, timeout_ms=200,
+                 fetch_min_bytes=64 * 1024, fetch_max_wait_ms=100,
+                 max_partition_fetch_bytes=4 * 1024 * 1024, batch_size=512 * 1024,
+                 linger_ms=10, compressao='lz4', bootstrap_servers=KAFKA_BROKER):
+        self.rotas = rotas
+        self.max_records = max_records
+        self.timeout_ms = timeout_ms
+        # Valores em bytes: o log é decodificado só para avaliar as regras e
+        # republicado exatamente como chegou (JSON ou binário com schema).
+        self.consumer = KafkaConsumer(
+            TOPIC,
+            bootstrap_servers=bootstrap_servers,
+            group_id=GROUP_ID,
+            auto_offset_reset='earliest',
+            enable_auto_commit=False,
+            isolation_level='read_committed',
+            max_poll_records=max_records,
+            fetch_min_bytes=fetch_min_bytes,
+            fetch_max_wait_ms=fetch_max_wait_ms,
+            max_partition_fetch_bytes=max_partition_fetch_bytes,
+        )
+        self.producer = KafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            transactional_id=id_transacional,
+            enable_idempotence=True,
+            acks='all',
+            batch_size=batch_size,
+            linger_ms=linger_ms,
+            compression_type=None if compressao == 'none' else compressao,
+        )
+        self.producer.init_transactions()
+        self.lidos = 0
+        self.roteados = {topico: 0 for topico, _ in rotas}
+
+    def rotear_lote(self, por_particao):
+        """Roteia um lote e confirma mensagens + offsets numa única transação."""
+        self.producer.begin_transaction()
+        try:
+            for lote in por_particao.values():
+                for r in lote:
+                    log = desserializar(r.value)
+                    for topico, predicado in self.rotas:
+                        if predicado(log):
+                            self.producer.send(topico, key=r.key, value=r.value)
+                            self.roteados[topico] += 1
+            offsets = {tp: OffsetAndMetadata(lote[-1].offset + 1, '', -1) for tp, lote in por_particao.items()}
+            self.producer.send_offsets_to_transaction(offsets, GROUP_ID)
+            self.producer.commit_transaction()
+        except Exception:
+            self.producer.abort_transaction()
+            # Volta para o último offset confirmado: o lote abortado será relido
+            for tp in por_particao:
+                commitado = self.consumer.committed(tp)
+                if commitado is not None:
+                    self.consumer.seek(tp, commitado)
+            raise
+        self.lidos += sum(len(lote) for lote in por_particao.values())
+
+    def executar(self, relatorio_s=10):
+        inicio = ultimo = time.monotonic()
+        lidos_antes = 0
+        try:
+            while True:
+                por_particao = self.consumer.poll(timeout_ms=self.timeout_ms, max_records=self.max_records)
+                if por_particao:
+                    self.rotear_lote(por_particao)
+                agora = time.monotonic()
+                if relatorio_s and agora - ultimo >= relatorio_s:
+                    destinos = ', '.join(f"{t}={n:,}" for t, n in self.roteados.items())
+                    print(f"[roteador] {(self.lidos - lidos_antes) / (agora - ultimo):,.0f} logs/s | "
+                          f"lidos {self.lidos:,} | roteados: {destinos}")
+                    ultimo, lidos_antes = agora, self.lidos
+        except KeyboardInterrupt:
+            print("\nEncerrando roteador...")
+        finally:
+            self.producer.close()
+            self.consumer.close()
+            duracao = time.monotonic() - inicio
+            print(f"Roteador: {self.lidos:,} logs em {duracao:.1f}s.")
+
+
+def parse_args(argv=None):
+    parser = adicionar_argumentos()
+    parser.description = "Roteia logs.aplicacoes para tópicos derivados por severidade."
+    parser.add_argument('--rota', action='append', default=None,
+                        help="topico:regra (repetível). Ex.: logs.aplicacoes.erro:status=ERRO")
+    parser.add_argument('--id-transacional', default='roteador-logs-0',
+                        help="transactional.id do produtor (um por instância do roteador).")
+    parser.add_argument('--batch-size', type=int, default=512 * 1024)
+    parser.add_argument('--linger-ms', type=int, default=10)
+    parser.add_argument('--compressao', default='lz4', choices=['none', 'gzip', 'snappy', 'lz4', 'zstd'])
+    parser.set_defaults(max_records=5000, timeout_ms=200, relatorio_s=10)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    rotas = compilar_rotas(args.rota or ROTAS_PADRAO)
+    anunciar_consumidor(GROUP_ID)
+    roteador = RoteadorLogs(
+        rotas, args.id_transacional,
+        max_records=args.max_records,
+        timeout_ms=args.timeout_ms,
+        fetch_min_bytes=args.fetch_min_bytes,
+        fetch_max_wait_ms=args.fetch_max_wait_ms,
+        max_partition_fetch_bytes=args.max_partition_fetch_bytes,
+        batch_size=args.batch_size,
+        linger_ms=args.linger_ms,
+        compressao=args.compressao,
+    )
+    print(f"🔀 Roteador iniciado: {TOPIC} -> {', '.join(t for t, _ in rotas)}\n")
+    roteador.executar(args.relatorio_s)
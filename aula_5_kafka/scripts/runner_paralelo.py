@@ -0,0 +1,106 @@
+import argparse
+import importlib
+import multiprocessing as mp
+import os
+import signal
+
+from kafka import KafkaConsumer
+
+from logs_producer import APIS
+from runtime_consumidor import KAFKA_BROKER, runtime_de_args
+
+# -------------------------------
+# Runner paralelo por partição
+# -------------------------------
+# Sobe N processos do mesmo consumidor, todos no mesmo consumer group: o Kafka
+# distribui as partições entre eles e cada processo trabalha com seu próprio
+# GIL, então a vazão cresce com o número de partições. Por padrão N é o número
+# de partições do tópico (processos a mais ficariam ociosos).
+#
+# Qualquer módulo de consumidor que defina TOPIC, GROUP_ID, AUTO_OFFSET_RESET,
+# parse_args(argv) e criar_handler(args) pode ser usado:
+#
+#   python runner_paralelo.py consumidor_A_monitoramento --relatorio-s 5
+#   python runner_paralelo.py consumidor_C_persistencia -n 4 --max-idade-s 30
+#
+# Os argumentos que o runner não reconhece são repassados ao consumidor. Como o
+# produtor usa a API como chave, cada API fica inteira numa partição e, portanto,
+# num único processo: a ordem por API e as janelas do consumidor A continuam corretas.
+#
+# O outro lado disso: só há len(APIS) = 4 chaves, então no máximo 4 partições
+# recebem dados (menos, se o hash de duas APIs cair na mesma partição) e mais de 4
+# processos nunca aumentam a vazão. Uma chave composta (ex.: API + instância)
+# espalharia a carga, mas quebraria a ordem por API de que as janelas dependem.
+#
+# O tópico é o que o consumidor realmente assina (ex.: consumidor B com --roteado
+# lê TOPIC_ROTEADO), e não o TOPIC do módulo.
+
+
+def contar_particoes(topico, bootstrap_servers=KAFKA_BROKER):
+    consumer = KafkaConsumer(bootstrap_servers=bootstrap_servers)
+    try:
+        particoes = consumer.partitions_for_topic(topico)
+    finally:
+        consumer.close()
+    return len(particoes) if particoes else 1
+
+
+def _worker(nome_modulo, argv, indice):
+    modulo = importlib.import_module(nome_modulo)
+    args = modulo.parse_args(argv)
+    # Cada processo expõe as próprias métricas: porta deslocada pelo índice e
+    # arquivo com o índice no nome, além do rótulo `instancia`.
+    args.instancia = indice
+    if args.metricas_porta:
+        args.metricas_porta += indice
+    if args.metricas_arquivo:
+        base, ext = os.path.splitext(args.metricas_arquivo)
+        args.metricas_arquivo = f"{base}-{indice}{ext}"
+    topico = getattr(args, 'topico', modulo.TOPIC)
+    runtime = runtime_de_args(args, topico, modulo.GROUP_ID, modulo.criar_handler(args),
+                              modulo.AUTO_OFFSET_RESET)
+    print(f"[worker {indice}] {nome_modulo} no grupo '{modulo.GROUP_ID}'")
+    runtime.executar()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Executa N processos de um consumidor no mesmo grupo.")
+    parser.add_argument('consumidor', help="Módulo do consumidor (ex.: consumidor_A_monitoramento).")
+    parser.add_argument('-n', '--processos', type=int, default=None,
+                        help="Número de processos (padrão: número de partições do tópico).")
+    return parser.parse_known_args()
+
+
+if __name__ == "__main__":
+    args, argv_consumidor = parse_args()
+    modulo = importlib.import_module(args.consumidor)
+    topico = getattr(modulo.parse_args(argv_consumidor), 'topico', modulo.TOPIC)
+    n_particoes = contar_particoes(topico)
+    n = args.processos or n_particoes
+    if n > n_particoes:
+        print(f"⚠️ {n} processos para {n_particoes} partições: {n - n_particoes} ficarão ociosos.")
+    elif n > len(APIS):
+        print(f"⚠️ {n} processos, mas só {len(APIS)} chaves (APIs): no máximo {len(APIS)} recebem dados.")
+
+    # 'spawn' evita herdar sockets e estado do processo pai
+    ctx = mp.get_context('spawn')
+    workers = [
+        ctx.Process(target=_worker, args=(args.consumidor, argv_consumidor, i), name=f"worker-{i}")
+        for i in range(n)
+    ]
+    print(f"🧩 Iniciando {n} processo(s) de {args.consumidor} ({n_particoes} partições em {topico})\n")
+    for w in workers:
+        w.start()
+
+    try:
+        for w in workers:
+            w.join()
+    except KeyboardInterrupt:
+        # O Ctrl+C chega a todo o grupo de processos: cada worker faz flush e commit
+        # no próprio finally; aqui só esperamos eles terminarem.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for w in workers:
+            w.join(timeout=30)
+            if w.is_alive():
+                w.terminate()
+    print("Runner encerrado.")
@@ -0,0 +1,244 @@
+import asyncio
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from kafka import KafkaConsumer, ConsumerRebalanceListener
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from runtime_consumidor import KAFKA_BROKER
+from serde_logs import anunciar_consumidor, desserializar
+
+# -------------------------------
+# Runtime assíncrono dos consumidores de monitoramento
+# -------------------------------
+# O poll() continua no kafka-python (síncrono), mas roda numa thread dedicada
+# (executor de 1 thread: o KafkaConsumer não é thread-safe, então poll, commit,
+# pause e resume passam todos por ela). O loop asyncio fica livre para as
+# corrotinas lentas (enriquecer e entregar alertas), com concorrência limitada.
+#
+# Um handler assíncrono tem:
+#   - processar_lote(registros): síncrono e rápido; devolve uma lista de
+#     (registro, corrotina) com o trabalho lento associado a cada registro;
+#   - ocioso() (opcional): idem, chamado quando um poll() volta vazio (ex.: fechar
+#     janelas de tempo num tópico parado), como no runtime síncrono;
+#   - flush() (opcional): idem, chamado ao encerrar (ex.: últimos alertas).
+#
+# Commits em ordem: por partição, só se commita até o menor offset cujo trabalho
+# ainda não terminou; um alerta lento nunca é "pulado" por um commit.
+# Backpressure: com `max_em_voo` trabalhos pendentes as partições são pausadas
+# (o poll continua, mantendo o consumidor no grupo) e retomadas abaixo da metade.
+
+
+class _Pendentes:
+    """Offsets com trabalho em andamento numa partição, em ordem de chegada."""
+
+    def __init__(self):
+        self._ordem = deque()
+        self._abertos = Counter()
+        self.consumido = None   # próximo offset após o último registro lido
+
+    def registrar(self, offset):
+        if not self._ordem or self._ordem[-1] != offset:
+            self._ordem.append(offset)
+        self._abertos[offset] += 1
+
+    def concluir(self, offset):
+        self._abertos[offset] -= 1
+        if not self._abertos[offset]:
+            del self._abertos[offset]
+
+    def commitavel(self):
+        while self._ordem and self._ordem[0] not in self._abertos:
+            self._ordem.popleft()
+        return self._ordem[0] if self._ordem else self.consumido
+
+    def vazio(self):
+        return not self._abertos
+
+
+class _ListenerAsync(ConsumerRebalanceListener):
+    """Roda na thread do consumidor, dentro do poll()."""
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+
+    def on_partitions_revoked(self, revoked):
+        if not revoked:
+            return
+        # Espera o trabalho das partições revogadas terminar (no loop asyncio,
+        # que está livre enquanto o poll roda) e commita antes de entregá-las.
+        futuro = asyncio.run_coroutine_threadsafe(self.runtime.drenar(revoked), self.runtime.loop)
+        try:
+            futuro.result(timeout=self.runtime.timeout_drenagem_s)
+        except Exception as e:
+            print(f"[async] Trabalho pendente não terminou antes do rebalanceamento: {e!r}")
+        self.runtime._commitar(self.runtime.offsets_commitaveis(revoked))
+        for tp in revoked:
+            self.runtime.pendentes.pop(tp, None)
+            self.runtime._commitados.pop(tp, None)
+
+    def on_partitions_assigned(self, assigned):
+        self.runtime.pausado = False
+
+
+class RuntimeAsync:
+    """
+    Args:
+        topico / grupo / auto_offset_reset: como no RuntimeConsumidor.
+        handler: handler assíncrono (ver cabeçalho do módulo).
+        concorrencia (int): máximo de corrotinas do handler executando ao mesmo tempo.
+        max_em_voo (int): trabalhos pendentes que disparam a pausa das partições.
+        commit_intervalo_s (float): intervalo entre commits.
+    """
+
+    def __init__(self, topico, grupo, handler, auto_offset_reset='latest', concorrencia=64,
+                 max_em_voo=10_000, commit_intervalo_s=1.0, max_records=1000, timeout_ms=100,
+                 timeout_drenagem_s=30, desserializador=desserializar, bootstrap_servers=KAFKA_BROKER):
+        self.topico = topico
+        self.grupo = grupo
+        self.handler = handler
+        self.concorrencia = concorrencia
+        self.max_em_voo = max_em_voo
+        self.commit_intervalo_s = commit_intervalo_s
+        self.max_records = max_records
+        self.timeout_ms = timeout_ms
+        self.timeout_drenagem_s = timeout_drenagem_s
+
+        self.pendentes = {}          # TopicPartition -> _Pendentes
+        self.em_voo = 0
+        self.pausado = False
+        self.loop = None
+        self._tarefas = set()
+        self._commitados = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='kafka-consumer')
+        self._criar_consumer = partial(
+            KafkaConsumer,
+            bootstrap_servers=bootstrap_servers,
+            group_id=grupo,
+            value_deserializer=desserializador,
+            auto_offset_reset=auto_offset_reset,
+            enable_auto_commit=False,
+            isolation_level='read_committed',
+            max_poll_records=max_records,
+        )
+        self.consumer = None
+
+    async def _no_consumer(self, funcao, *args, **kwargs):
+        return await self.loop.run_in_executor(self._executor, partial(funcao, *args, **kwargs))
+
+    async def executar(self):
+        self.loop = asyncio.get_running_loop()
+        self._semaforo = asyncio.Semaphore(self.concorrencia)
+        self._abaixo_do_limite = asyncio.Event()
+        ultimo_commit = time.monotonic()
+        try:
+            self.consumer = await self._no_consumer(self._criar_consumer)
+            await self._no_consumer(self.consumer.subscribe, [self.topico], listener=_ListenerAsync(self))
+            while True:
+                por_particao = await self._no_consumer(
+                    self.consumer.poll, timeout_ms=self.timeout_ms, max_records=self.max_records)
+                for tp, lote in por_particao.items():
+                    self.pendentes.setdefault(tp, _Pendentes()).consumido = lote[-1].offset + 1
+                registros = [r for lote in por_particao.values() for r in lote]
+                if registros:
+                    self._agendar(self.handler.processar_lote(registros))
+                elif hasattr(self.handler, 'ocioso'):
+                    self._agendar(self.handler.ocioso() or [])
+                await self._controlar_fluxo()
+
+                if time.monotonic() - ultimo_commit >= self.commit_intervalo_s:
+                    await self._no_consumer(self._commitar, self.offsets_commitaveis())
+                    ultimo_commit = time.monotonic()
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print("\nEncerrando consumidor assíncrono...")
+        finally:
+            if hasattr(self.handler, 'flush'):
+                self._agendar(self.handler.flush() or [])
+            if self._tarefas:
+                print(f"[async] Aguardando {len(self._tarefas)} trabalho(s) pendente(s)...")
+                await asyncio.wait(self._tarefas, timeout=self.timeout_drenagem_s)
+            if self.consumer is not None:
+                await self._no_consumer(self._commitar, self.offsets_commitaveis())
+                await self._no_consumer(self.consumer.close)
+            self._executor.shutdown()
+
+    def _agendar(self, trabalhos):
+        for registro, corrotina in trabalhos:
+            tp = TopicPartition(registro.topic, registro.partition)
+            self.pendentes.setdefault(tp, _Pendentes()).registrar(registro.offset)
+            self.em_voo += 1
+            tarefa = asyncio.create_task(self._executar(tp, registro.offset, corrotina))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar(self, tp, offset, corrotina):
+        try:
+            async with self._semaforo:
+                await corrotina
+        except Exception as e:
+            print(f"[async] Falha no trabalho do offset {tp.partition}:{offset}: {e!r}")
+        finally:
+            pendentes = self.pendentes.get(tp)
+            if pendentes is not None:
+                pendentes.concluir(offset)
+            self.em_voo -= 1
+            if self.em_voo <= self.max_em_voo // 2:
+                self._abaixo_do_limite.set()
+
+    async def _controlar_fluxo(self):
+        if not self.pausado and self.em_voo >= self.max_em_voo:
+            self.pausado = True
+            self._abaixo_do_limite.clear()
+            await self._no_consumer(lambda: self.consumer.pause(*self.consumer.assignment()))
+            print(f"[async] ⏸️ {self.em_voo} trabalhos em voo: partições pausadas")
+        elif self.pausado and self._abaixo_do_limite.is_set():
+            self.pausado = False
+            await self._no_consumer(lambda: self.consumer.resume(*self.consumer.paused()))
+            print(f"[async] ▶️ {self.em_voo} trabalhos em voo: partições retomadas")
+
+    async def drenar(self, particoes):
+        """Espera terminar o trabalho pendente das partições informadas."""
+        while any(tp in self.pendentes and not self.pendentes[tp].vazio() for tp in particoes):
+            await asyncio.sleep(0.01)
+
+    def offsets_commitaveis(self, particoes=None):
+        offsets = {}
+        for tp, pendentes in self.pendentes.items():
+            if particoes is not None and tp not in particoes:
+                continue
+            offset = pendentes.commitavel()
+            if offset is not None and offset != self._commitados.get(tp):
+                offsets[tp] = offset
+        return offsets
+
+    def _commitar(self, offsets):
+        """Só na thread do consumidor."""
+        if not offsets:
+            return
+        self.consumer.commit({tp: OffsetAndMetadata(o, '', -1) for tp, o in offsets.items()})
+        self._commitados.update(offsets)
+
+
+def adicionar_argumentos_async(parser):
+    parser.add_argument('--assincrono', action='store_true',
+                        help="Usa o runtime asyncio (alertas enriquecidos e entregues em paralelo).")
+    parser.add_argument('--concorrencia', type=int, default=64, help="Corrotinas de alerta simultâneas.")
+    parser.add_argument('--max-em-voo', type=int, default=10_000,
+                        help="Trabalhos pendentes que pausam o consumo (backpressure).")
+    parser.add_argument('--webhook', default=None, help="URL que recebe os alertas (POST JSON).")
+    parser.add_argument('--atraso-entrega-ms', type=float, default=0,
+                        help="Latência artificial na entrega (simula um destino lento).")
+    return parser
+
+
+def runtime_async_de_args(args, topico, grupo, handler, auto_offset_reset):
+    anunciar_consumidor(grupo)
+    return RuntimeAsync(
+        topico, grupo, handler,
+        auto_offset_reset=auto_offset_reset,
+        concorrencia=args.concorrencia,
+        max_em_voo=args.max_em_voo,
+        max_records=args.max_records,
+    )
@@ -0,0 +1,241 @@
+import argparse
+import os
+import time
+from collections import Counter
+
+from kafka import KafkaConsumer, ConsumerRebalanceListener
+
+from metricas_consumidor import MetricasConsumidor
+from serde_logs import anunciar_consumidor, desserializar
+
+# -------------------------------
+# Runtime compartilhado dos consumidores
+# -------------------------------
+# Em vez de `for msg in consumer` (um registro por vez + auto-commit), o runtime
+# faz poll() em lotes, entrega o lote inteiro ao handler e só então faz o commit
+# manual dos offsets, uma vez por lote.
+#
+# Um handler é qualquer objeto com:
+#   - processar_lote(registros): recebe a lista de ConsumerRecord do poll;
+#   - ocioso() (opcional): chamado quando um poll() volta vazio;
+#   - flush() (opcional): chamado antes de encerrar o consumidor;
+#   - offsets_para_commit() (opcional): para handlers que acumulam dados antes de
+#     gravar (sinks). Quando existe, o runtime commita apenas os offsets devolvidos
+#     por ele (o que já está durável), e não tudo o que foi lido;
+#   - ao_atribuir(consumer, particoes) (opcional): chamado quando o grupo entrega
+#     partições a este consumidor (ex.: para posicionar com seek());
+#   - ao_revogar(particoes) (opcional): chamado quando o grupo retira partições,
+#     depois do flush() e do commit (ex.: para descartar estado em memória).
+
+KAFKA_BROKER = 'localhost:9092'
+
+
+class SaidaLimitada:
+    """
+    Print com limite de linhas por intervalo. Linhas excedentes são descartadas e
+    contadas; ao fim do intervalo é impresso um resumo do que foi suprimido.
+    """
+
+    def __init__(self, ativa=True, max_linhas=20, intervalo_s=1.0):
+        self.ativa = ativa
+        self.max_linhas = max_linhas
+        self.intervalo_s = intervalo_s
+        self._inicio = time.monotonic()
+        self._linhas = 0
+        self._suprimidas = 0
+
+    def __call__(self, texto):
+        if not self.ativa:
+            return
+        agora = time.monotonic()
+        if agora - self._inicio >= self.intervalo_s:
+            if self._suprimidas:
+                print(f"... {self._suprimidas} linhas suprimidas no último {self.intervalo_s:.0f}s")
+            self._inicio, self._linhas, self._suprimidas = agora, 0, 0
+        if self._linhas < self.max_linhas:
+            self._linhas += 1
+            print(texto)
+        else:
+            self._suprimidas += 1
+
+
+class _ListenerRebalance(ConsumerRebalanceListener):
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+
+    def on_partitions_revoked(self, revoked):
+        # Antes de perder as partições, grava o que está no buffer e commita,
+        # para o próximo dono não reprocessar (nem duplicar) esses registros.
+        if not revoked:
+            return
+        if hasattr(self.runtime.handler, 'flush'):
+            self.runtime.handler.flush()
+        self.runtime.commit()
+        if hasattr(self.runtime.handler, 'ao_revogar'):
+            self.runtime.handler.ao_revogar(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        if hasattr(self.runtime.handler, 'ao_atribuir'):
+            self.runtime.handler.ao_atribuir(self.runtime.consumer, assigned)
+
+
+class RuntimeConsumidor:
+    """
+    Loop de consumo em lotes com commit manual.
+
+    Args:
+        topico (str): tópico assinado.
+        grupo (str): consumer group.
+        handler: objeto com processar_lote(registros) (ver cabeçalho do módulo).
+        max_records (int): máximo de registros por poll().
+        timeout_ms (int): espera máxima do poll() quando não há dados.
+        fetch_min_bytes / fetch_max_wait_ms: o broker segura o fetch até juntar
+            esse volume (ou estourar o tempo), gerando menos requisições maiores.
+        max_partition_fetch_bytes (int): volume máximo por partição em cada fetch.
+        relatorio_s (float): intervalo do relatório de vazão por partição (0 desliga).
+        metricas (MetricasConsumidor): instrumentação opcional (lag, vazão, tempos).
+        consumer: consumidor já construído (ex.: FonteReplay, para rodar sem broker);
+            quando informado, os parâmetros de conexão e de fetch são ignorados.
+    """
+
+    def __init__(self, topico, grupo, handler, auto_offset_reset='latest',
+                 max_records=1000, timeout_ms=500, fetch_min_bytes=64 * 1024,
+                 fetch_max_wait_ms=100, max_partition_fetch_bytes=4 * 1024 * 1024,
+                 desserializador=desserializar, bootstrap_servers=KAFKA_BROKER, relatorio_s=0,
+                 metricas=None, consumer=None):
+        self.topico = topico
+        self.grupo = grupo
+        self.handler = handler
+        self.max_records = max_records
+        self.timeout_ms = timeout_ms
+        self.relatorio_s = relatorio_s
+        self.metricas = metricas
+        self._por_particao = Counter()
+        self._ultimo_relatorio = time.monotonic()
+        self.consumer = consumer or KafkaConsumer(
+            bootstrap_servers=bootstrap_servers,
+            group_id=grupo,
+            value_deserializer=desserializador,
+            auto_offset_reset=auto_offset_reset,
+            enable_auto_commit=False,
+            # Ignora mensagens de transações abortadas (ex.: tópicos do roteador_logs)
+            isolation_level='read_committed',
+            max_poll_records=max_records,
+            fetch_min_bytes=fetch_min_bytes,
+            fetch_max_wait_ms=fetch_max_wait_ms,
+            max_partition_fetch_bytes=max_partition_fetch_bytes,
+        )
+        self.consumer.subscribe([topico], listener=_ListenerRebalance(self))
+
+    def executar(self):
+        try:
+            while True:
+                por_particao = self.consumer.poll(timeout_ms=self.timeout_ms, max_records=self.max_records)
+                if not por_particao:
+                    if hasattr(self.handler, 'ocioso'):
+                        self.handler.ocioso()
+                        self.commit()
+                    self.relatar()
+                    if self.metricas:
+                        self.metricas.talvez_exportar(self.consumer)
+                    if getattr(self.consumer, 'esgotado', False):
+                        break   # replay de segmento chegou ao fim
+                    continue
+                inicio = time.perf_counter()
+                registros = [r for lote in por_particao.values() for r in lote]
+                self.handler.processar_lote(registros)
+                self.commit()
+                if self.metricas:
+                    self.metricas.observar_lote(por_particao, time.perf_counter() - inicio)
+                    self.metricas.talvez_exportar(self.consumer)
+                if self.relatorio_s:
+                    for tp, lote in por_particao.items():
+                        self._por_particao[tp.partition] += len(lote)
+                    self.relatar()
+        except KeyboardInterrupt:
+            print("\nEncerrando consumidor...")
+        finally:
+            if hasattr(self.handler, 'flush'):
+                self.handler.flush()
+                self.commit()
+            if self.metricas:
+                self.metricas.fechar()
+            self.consumer.close()
+
+    def relatar(self):
+        """Imprime a vazão (registros/s) de cada partição desde o último relatório."""
+        if not self.relatorio_s:
+            return
+        agora = time.monotonic()
+        decorrido = agora - self._ultimo_relatorio
+        if decorrido < self.relatorio_s:
+            return
+        atribuidas = sorted(tp.partition for tp in self.consumer.assignment())
+        vazoes = ' '.join(f"p{p}={self._por_particao[p] / decorrido:,.0f}/s" for p in atribuidas)
+        total = sum(self._por_particao.values()) / decorrido
+        print(f"[pid {os.getpid()}] {self.grupo}: {vazoes or 'sem partições'} (total {total:,.0f}/s)")
+        self._por_particao.clear()
+        self._ultimo_relatorio = agora
+
+    def commit(self):
+        if not hasattr(self.handler, 'offsets_para_commit'):
+            self.consumer.commit()
+            return
+        offsets = self.handler.offsets_para_commit()
+        if offsets:
+            self.consumer.commit(offsets)
+
+
+def adicionar_argumentos(parser=None):
+    """Argumentos de linha de comando comuns a todos os consumidores."""
+    parser = parser or argparse.ArgumentParser()
+    parser.add_argument('--max-records', type=int, default=1000, help="Registros por poll().")
+    parser.add_argument('--timeout-ms', type=int, default=500, help="Timeout do poll().")
+    parser.add_argument('--fetch-min-bytes', type=int, default=64 * 1024)
+    parser.add_argument('--fetch-max-wait-ms', type=int, default=100)
+    parser.add_argument('--max-partition-fetch-bytes', type=int, default=4 * 1024 * 1024)
+    parser.add_argument('--silencioso', action='store_true', help="Desliga a saída no console.")
+    parser.add_argument('--max-linhas-s', type=int, default=20,
+                        help="Máximo de linhas impressas por segundo.")
+    parser.add_argument('--relatorio-s', type=float, default=0,
+                        help="Intervalo do relatório de vazão por partição (0 desliga).")
+    parser.add_argument('--metricas-porta', type=int, default=None,
+                        help="Serve as métricas no formato Prometheus em http://<host>:<porta>/metrics.")
+    parser.add_argument('--metricas-arquivo', default=None,
+                        help="Grava as métricas no formato Prometheus nesse arquivo (textfile collector).")
+    parser.add_argument('--metricas-intervalo-s', type=float, default=15,
+                        help="Intervalo de atualização do lag e da linha de resumo das métricas (0 desliga).")
+    return parser
+
+
+def saida_de_args(args):
+    return SaidaLimitada(ativa=not args.silencioso, max_linhas=args.max_linhas_s)
+
+
+def runtime_de_args(args, topico, grupo, handler, auto_offset_reset, desserializador=desserializar):
+    if desserializador is desserializar:
+        # Lê logs com schema: anuncia as versões que decodifica antes de consumir
+        anunciar_consumidor(grupo)
+    metricas = None
+    if args.metricas_intervalo_s or args.metricas_porta or args.metricas_arquivo:
+        metricas = MetricasConsumidor(
+            grupo, topico,
+            porta=args.metricas_porta,
+            arquivo=args.metricas_arquivo,
+            intervalo_s=args.metricas_intervalo_s or 15,
+            resumo=bool(args.metricas_intervalo_s),
+            instancia=getattr(args, 'instancia', None),
+        )
+    return RuntimeConsumidor(
+        topico, grupo, handler,
+        auto_offset_reset=auto_offset_reset,
+        desserializador=desserializador,
+        max_records=args.max_records,
+        timeout_ms=args.timeout_ms,
+        fetch_min_bytes=args.fetch_min_bytes,
+        fetch_max_wait_ms=args.fetch_max_wait_ms,
+        max_partition_fetch_bytes=args.max_partition_fetch_bytes,
+        relatorio_s=args.relatorio_s,
+        metricas=metricas,
+    )
@@ -0,0 +1,239 @@
+import argparse
+import struct
+import time
+from collections import defaultdict
+
+import zstandard
+from kafka import KafkaConsumer
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import TopicPartition
+
+from runtime_consumidor import KAFKA_BROKER
+
+# -------------------------------
+# Gravação e replay de tópicos em arquivo
+# -------------------------------
+# Um segmento guarda os registros de um tópico exatamente como chegaram do broker
+# (bytes da chave e do valor, sem desserializar), num único arquivo comprimido com zstd:
+#
+#   cabeçalho: b'KSEG' + versão (1 byte) + tamanho do nome do tópico (2 bytes) + nome
+#   registro:  partição (i) offset (q) timestamp_ms (q) tam_chave (i) tam_valor (i)
+#              + chave + valor          (tamanho -1 = None, ex.: tombstones do CDC)
+#
+# A FonteReplay lê o segmento e imita o KafkaConsumer (poll/commit/assignment...),
+# então o RuntimeConsumidor e os handlers rodam sem alteração e sem broker, na
+# velocidade máxima ou respeitando os intervalos originais (escalados).
+
+MAGIC = b'KSEG'
+VERSAO = 1
+_REGISTRO = struct.Struct('>iqqii')
+
+
+class GravadorSegmento:
+    """Escreve registros num segmento (use como context manager)."""
+
+    def __init__(self, arquivo, topico, nivel_zstd=3):
+        self._arquivo = open(arquivo, 'wb')
+        self._escrita = zstandard.ZstdCompressor(level=nivel_zstd).stream_writer(self._arquivo)
+        nome = topico.encode()
+        self._escrita.write(MAGIC + bytes([VERSAO]) + struct.pack('>H', len(nome)) + nome)
+        self.total = 0
+
+    def gravar(self, particao, offset, timestamp_ms, chave, valor):
+        self._escrita.write(_REGISTRO.pack(
+            particao, offset, timestamp_ms,
+            -1 if chave is None else len(chave),
+            -1 if valor is None else len(valor),
+        ))
+        if chave:
+            self._escrita.write(chave)
+        if valor:
+            self._escrita.write(valor)
+        self.total += 1
+
+    def fechar(self):
+        self._escrita.close()   # fecha também o arquivo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def ler_segmento(arquivo):
+    """Devolve (topico, registros) com os registros brutos: (particao, offset, ts_ms, chave, valor)."""
+    with open(arquivo, 'rb') as f:
+        dados = zstandard.ZstdDecompressor().stream_reader(f).read()
+    if dados[:4] != MAGIC or dados[4] != VERSAO:
+        raise ValueError(f"{arquivo} não é um segmento versão {VERSAO}")
+    (tam_nome,) = struct.unpack_from('>H', dados, 5)
+    pos = 7 + tam_nome
+    topico = dados[7:pos].decode()
+
+    registros = []
+    fim = len(dados)
+    while pos < fim:
+        particao, offset, ts, tam_chave, tam_valor = _REGISTRO.unpack_from(dados, pos)
+        pos += _REGISTRO.size
+        chave = None
+        if tam_chave >= 0:
+            chave = dados[pos:pos + tam_chave]
+            pos += tam_chave
+        valor = None
+        if tam_valor >= 0:
+            valor = dados[pos:pos + tam_valor]
+            pos += tam_valor
+        registros.append((particao, offset, ts, chave, valor))
+    return topico, registros
+
+
+def gravar_do_broker(topico, arquivo, max_mensagens=None, ocioso_s=5.0, bootstrap_servers=KAFKA_BROKER):
+    """Lê o tópico desde o início (sem consumer group) até `max_mensagens` ou `ocioso_s` sem dados."""
+    consumer = KafkaConsumer(
+        topico,
+        bootstrap_servers=bootstrap_servers,
+        group_id=None,
+        auto_offset_reset='earliest',
+        enable_auto_commit=False,
+    )
+    ultimo_dado = time.monotonic()
+    try:
+        with GravadorSegmento(arquivo, topico) as gravador:
+            while max_mensagens is None or gravador.total < max_mensagens:
+                por_particao = consumer.poll(timeout_ms=500)
+                if not por_particao:
+                    if time.monotonic() - ultimo_dado >= ocioso_s:
+                        break
+                    continue
+                ultimo_dado = time.monotonic()
+                registros = [r for lote in por_particao.values() for r in lote]
+                if max_mensagens is not None:
+                    registros = registros[:max_mensagens - gravador.total]
+                for r in registros:
+                    gravador.gravar(r.partition, r.offset, r.timestamp, r.key, r.value)
+            total = gravador.total
+    finally:
+        consumer.close()
+    print(f"📼 {total:,} registros de {topico} gravados em {arquivo}")
+    return total
+
+
+class FonteReplay:
+    """
+    Substituto do KafkaConsumer que entrega os registros de um segmento.
+
+    Args:
+        arquivo (str): segmento gravado com GravadorSegmento.
+        desserializador: mesma função usada como value_deserializer no consumidor real.
+        velocidade (float): None para velocidade máxima; 1.0 respeita os intervalos
+            originais entre timestamps; 10.0 reproduz 10x mais rápido, etc.
+        max_records (int): máximo de registros por poll() (como max_poll_records).
+    """
+
+    def __init__(self, arquivo, desserializador=None, velocidade=None, max_records=1000):
+        self.topico, self._brutos = ler_segmento(arquivo)
+        self.desserializador = desserializador
+        self.velocidade = velocidade
+        self.max_records = max_records
+        self._pos = 0
+        self._inicio = None
+        self._ts_inicial = self._brutos[0][2] if self._brutos else 0
+        self._particoes = {TopicPartition(self.topico, p) for p, *_ in self._brutos}
+        self._comeco = {}
+        self._fim = {}
+        for p, offset, *_ in self._brutos:
+            tp = TopicPartition(self.topico, p)
+            self._comeco[tp] = min(self._comeco.get(tp, offset), offset)
+            self._fim[tp] = max(self._fim.get(tp, 0), offset + 1)
+        self._commitados = {}
+        self._minimo = {}
+
+    def __len__(self):
+        return len(self._brutos)
+
+    @property
+    def esgotado(self):
+        return self._pos >= len(self._brutos)
+
+    def subscribe(self, topicos, listener=None):
+        if listener is not None:
+            listener.on_partitions_assigned(self.assignment())
+
+    def reiniciar(self):
+        self._pos = 0
+        self._inicio = None
+        self._commitados = {}
+        self._minimo = {}
+
+    def poll(self, timeout_ms=0, max_records=None):
+        if self.esgotado:
+            return {}
+        limite = min(self._pos + (max_records or self.max_records), len(self._brutos))
+        if self.velocidade:
+            if self._inicio is None:
+                self._inicio = time.monotonic()
+            # Entrega só o que já "aconteceu" no relógio escalado
+            agora_ts = self._ts_inicial + (time.monotonic() - self._inicio) * 1000 * self.velocidade
+            ate = self._pos
+            while ate < limite and self._brutos[ate][2] <= agora_ts:
+                ate += 1
+            if ate == self._pos:
+                espera = (self._brutos[self._pos][2] - agora_ts) / 1000 / self.velocidade
+                time.sleep(min(max(espera, 0), timeout_ms / 1000))
+                return {}
+            limite = ate
+
+        desserializar = self.desserializador
+        minimo = self._minimo
+        por_particao = defaultdict(list)
+        for particao, offset, ts, chave, bruto in self._brutos[self._pos:limite]:
+            if minimo and offset < minimo.get(particao, -1):
+                continue
+            valor = bruto
+            if desserializar is not None and bruto is not None:
+                valor = desserializar(bruto)
+            por_particao[TopicPartition(self.topico, particao)].append(ConsumerRecord(
+                self.topico, particao, -1, offset, ts, 0, chave, valor, [], None,
+                -1 if chave is None else len(chave), -1 if bruto is None else len(bruto), 0,
+            ))
+        self._pos = limite
+        return dict(por_particao)
+
+    def assignment(self):
+        return set(self._particoes)
+
+    def seek(self, tp, offset):
+        # Só faz sentido para frente: registros da partição antes do offset são pulados
+        self._minimo[tp.partition] = offset
+
+    def commit(self, offsets=None):
+        if offsets:
+            self._commitados.update({tp: om.offset for tp, om in offsets.items()})
+
+    def committed(self, tp):
+        return self._commitados.get(tp)
+
+    def beginning_offsets(self, particoes):
+        return {tp: self._comeco.get(tp, 0) for tp in particoes}
+
+    def end_offsets(self, particoes):
+        return {tp: self._fim.get(tp, 0) for tp in particoes}
+
+    def close(self):
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Grava um tópico Kafka num segmento para replay.")
+    parser.add_argument('--topico', default='logs.aplicacoes')
+    parser.add_argument('--arquivo', required=True, help="Arquivo de saída (ex.: logs.kseg).")
+    parser.add_argument('--max', type=int, default=None, help="Máximo de mensagens gravadas.")
+    parser.add_argument('--ocioso-s', type=float, default=5.0,
+                        help="Encerra após esse tempo sem mensagens novas.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    gravar_do_broker(args.topico, args.arquivo, args.max, args.ocioso_s)
@@ -0,0 +1,232 @@
+import json
+import os
+import struct
+from datetime import datetime
+
+import orjson
+
+# -------------------------------
+# Serialização dos logs de aplicação
+# -------------------------------
+# Dois formatos convivem no tópico logs.aplicacoes:
+#
+#   - JSON (legado): o objeto com os quatro campos, como sempre foi enviado;
+#   - binário: 1 byte mágico (0x00) + id do schema (4 bytes, big-endian) +
+#     os campos na ordem do schema em largura fixa (struct). `api` e `status` viram
+#     o índice do símbolo no enum (1 byte) e `timestamp` vira epoch em segundos.
+#     Um log ocupa 15 bytes contra ~100 em JSON e é lido com um único unpack.
+#
+# O consumidor detecta o formato pelo primeiro byte, então produtores antigos e
+# novos podem publicar no mesmo tópico durante a migração. Os schemas ficam num
+# registro local em arquivo (schema_registry/registry.json), que faz o papel de um
+# Schema Registry: o consumidor resolve qualquer versão pelo id que vem na mensagem.
+#
+# Negociação de versão: ao subir, cada consumer group anuncia no registro as versões
+# que sabe decodificar (as registradas naquele momento cujos tipos de campo ele
+# conhece), em "consumidores" -> subject -> grupo. O produtor escreve na maior versão
+# aceita por todos os grupos anunciados (a mais recente, se nenhum anunciou), então
+# uma versão nova acrescentada à mão no registry.json só passa a ser usada depois que
+# todos os consumidores reiniciaram. --versao-schema continua fixando uma versão.
+# Um grupo desativado deve ser removido de "consumidores" à mão para não segurar
+# a negociação numa versão antiga.
+
+SUBJECT_LOGS = 'logs.aplicacoes-value'
+MAGIC_BYTE = 0
+REGISTRY_PATH = os.path.join(os.path.dirname(__file__), '..', 'schema_registry', 'registry.json')
+FORMATO_TIMESTAMP = '%Y-%m-%d %H:%M:%S'
+
+_CABECALHO = struct.Struct('>bI')
+
+# Tipo do campo no schema -> código struct (big-endian)
+TIPOS_STRUCT = {'enum': 'B', 'int': 'i', 'epoch_s': 'I'}
+
+
+class RegistroSchemasLocal:
+    """Registro de schemas em arquivo JSON, com cache em memória por id."""
+
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = os.path.abspath(path)
+        self._dados = {'schemas': []}
+        self._por_id = {}
+        self._carregar()
+
+    def _carregar(self):
+        if not os.path.exists(self.path):
+            self._dados = {'schemas': []}
+        else:
+            with open(self.path, encoding='utf-8') as f:
+                self._dados = json.load(f)
+        self._por_id = {s['id']: s for s in self._dados['schemas']}
+
+    def _salvar(self):
+        # Escreve num temporário e troca: quem lê ao mesmo tempo nunca vê o arquivo pela metade
+        temporario = f'{self.path}.{os.getpid()}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self._dados, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.path)
+
+    def por_id(self, schema_id):
+        if schema_id not in self._por_id:
+            # Pode ter sido acrescentado ao arquivo depois que o carregamos
+            self._carregar()
+        if schema_id not in self._por_id:
+            raise KeyError(f"Schema id {schema_id} não encontrado em {self.path}")
+        return self._por_id[schema_id]
+
+    def schemas(self, subject):
+        versoes = [s for s in self._por_id.values() if s['subject'] == subject]
+        if not versoes:
+            raise KeyError(f"Nenhum schema registrado para '{subject}'")
+        return versoes
+
+    def ultimo(self, subject):
+        return max(self.schemas(subject), key=lambda s: s['version'])
+
+    def versao(self, subject, versao):
+        for s in self._por_id.values():
+            if s['subject'] == subject and s['version'] == versao:
+                return s
+        raise KeyError(f"Versão {versao} de '{subject}' não registrada")
+
+    def anunciar(self, subject, grupo, versoes):
+        """Registra as versões de `subject` que o consumer group `grupo` sabe decodificar."""
+        self._carregar()
+        self._dados.setdefault('consumidores', {}).setdefault(subject, {})[grupo] = sorted(versoes)
+        self._salvar()
+
+    def versao_negociada(self, subject):
+        """Schema da maior versão aceita por todos os grupos anunciados (o mais recente se nenhum anunciou)."""
+        self._carregar()
+        aceitas = {s['version'] for s in self.schemas(subject)}
+        for grupo, versoes in self._dados.get('consumidores', {}).get(subject, {}).items():
+            aceitas &= set(versoes)
+            if not aceitas:
+                raise ValueError(f"Nenhuma versão de '{subject}' é aceita por todos os consumidores "
+                                 f"(o grupo '{grupo}' aceita {versoes})")
+        return self.versao(subject, max(aceitas))
+
+
+def timestamp_epoch(log):
+    """Epoch em segundos do campo `timestamp`, qualquer que seja o formato de origem."""
+    ts = log['timestamp']
+    if isinstance(ts, str):
+        return datetime.strptime(ts, FORMATO_TIMESTAMP).timestamp()
+    return ts
+
+
+class _Codec:
+    """Codificador/decodificador de uma versão de schema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.cabecalho = _CABECALHO.pack(MAGIC_BYTE, schema['id'])
+        self.layout = struct.Struct('>' + ''.join(TIPOS_STRUCT[f['type']] for f in schema['fields']))
+        self.nomes = tuple(f['name'] for f in schema['fields'])
+        self.simbolos = tuple((f['name'], tuple(f['symbols'])) for f in schema['fields'] if f['type'] == 'enum')
+        self.codigos = {nome: {s: i for i, s in enumerate(simbolos)} for nome, simbolos in self.simbolos}
+        self.epoch = {f['name'] for f in schema['fields'] if f['type'] == 'epoch_s'}
+
+    def codificar(self, log):
+        valores = []
+        for nome in self.nomes:
+            valor = log[nome]
+            if nome in self.codigos:
+                valor = self.codigos[nome][valor]
+            elif nome in self.epoch and isinstance(valor, str):
+                valor = int(datetime.strptime(valor, FORMATO_TIMESTAMP).timestamp())
+            valores.append(valor)
+        return self.cabecalho + self.layout.pack(*valores)
+
+    def decodificar(self, dados):
+        log = dict(zip(self.nomes, self.layout.unpack_from(dados, _CABECALHO.size)))
+        for nome, simbolos in self.simbolos:
+            log[nome] = simbolos[log[nome]]
+        return log
+
+
+class SerdeLogs:
+    """
+    Serializador dos logs de aplicação.
+
+    Args:
+        formato (str): 'json' (legado) ou 'binario' (com schema) para escrita.
+            A leitura aceita sempre os dois formatos.
+        registro (RegistroSchemasLocal): registro de schemas; por padrão o arquivo local.
+        versao (int): versão do schema usada na escrita. Por padrão a negociada com
+            os consumidores (RegistroSchemasLocal.versao_negociada); informar uma
+            versão fixa ignora a negociação.
+    """
+
+    def __init__(self, formato='binario', registro=None, subject=SUBJECT_LOGS, versao=None):
+        self.formato = formato
+        self.subject = subject
+        self.registro = registro or RegistroSchemasLocal()
+        self._codecs = {}
+        self._escrita = None
+        if formato == 'binario':
+            if versao is None:
+                schema = self.registro.versao_negociada(subject)
+            else:
+                schema = self.registro.versao(subject, versao)
+            self._escrita = self._codec(schema['id'])
+
+    def _codec(self, schema_id):
+        codec = self._codecs.get(schema_id)
+        if codec is None:
+            codec = self._codecs[schema_id] = _Codec(self.registro.por_id(schema_id))
+        return codec
+
+    def serializar(self, log):
+        if self._escrita is None:
+            return orjson.dumps(log)
+        return self._escrita.codificar(log)
+
+    def serializar_codigos(self, api_codigos, status_codigos, tempos, epoch):
+        """
+        Caminho rápido do gerador de carga: recebe os índices dos enums já sorteados
+        (listas de int) e um único epoch para o lote, evitando dicionários intermediários.
+        """
+        if self._escrita is None:
+            apis, status = self.simbolos('api'), self.simbolos('status')
+            ts = datetime.fromtimestamp(epoch).strftime(FORMATO_TIMESTAMP)
+            return [
+                orjson.dumps({"api": apis[a], "status": status[s], "tempo_resposta_ms": t, "timestamp": ts})
+                for a, s, t in zip(api_codigos, status_codigos, tempos)
+            ]
+        cabecalho, pack = self._escrita.cabecalho, self._escrita.layout.pack
+        return [cabecalho + pack(a, s, t, epoch) for a, s, t in zip(api_codigos, status_codigos, tempos)]
+
+    def simbolos(self, campo):
+        """Símbolos do enum `campo` no schema de escrita (ou no mais recente, em JSON)."""
+        schema = self._escrita.schema if self._escrita else self.registro.ultimo(self.subject)
+        return next(f['symbols'] for f in schema['fields'] if f['name'] == campo)
+
+    def desserializar(self, dados):
+        if dados[0] == 123:  # '{' -> JSON legado
+            return orjson.loads(dados)
+        magic, schema_id = _CABECALHO.unpack_from(dados)
+        if magic != MAGIC_BYTE:
+            raise ValueError(f"Byte mágico desconhecido: {magic}")
+        codec = self._codecs.get(schema_id) or self._codec(schema_id)
+        return codec.decodificar(dados)
+
+
+# Instância usada pelos consumidores: lê JSON e qualquer versão binária registrada
+_SERDE_LEITURA = SerdeLogs(formato='json')
+
+
+def desserializar(dados):
+    """Desserializador para value_deserializer do KafkaConsumer (aceita JSON e binário)."""
+    return _SERDE_LEITURA.desserializar(dados)
+
+
+def versoes_decodificaveis(registro, subject=SUBJECT_LOGS):
+    """Versões registradas de `subject` cujos tipos de campo este módulo sabe decodificar."""
+    return sorted(s['version'] for s in registro.schemas(subject)
+                  if all(f['type'] in TIPOS_STRUCT for f in s['fields']))
+
+
+def anunciar_consumidor(grupo, subject=SUBJECT_LOGS, registro=None):
+    """Anuncia no registro, em nome do consumer group, as versões que `desserializar` lê."""
+    registro = registro or RegistroSchemasLocal()
+    registro.anunciar(subject, grupo, versoes_decodificaveis(registro, subject))
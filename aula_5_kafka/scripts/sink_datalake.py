@@ -0,0 +1,184 @@
+import os
+import re
+import time
+from collections import defaultdict
+
+import orjson
+import zstandard
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+# -------------------------------
+# Sink de Data Lake para os consumidores de persistência
+# -------------------------------
+# Os registros são acumulados em memória e gravados em arquivos NDJSON
+# comprimidos com zstd, particionados pela hora do registro (timestamp do Kafka, UTC):
+#
+#   <diretorio>/<topico>/dt=YYYY-MM-DD/hour=HH/part-p<particao>-<primeiro>-<ultimo>.ndjson.zst
+#
+# Um flush acontece quando o buffer passa de `max_bytes` ou quando o registro mais
+# antigo do buffer passa de `max_idade_s`. Cada arquivo é escrito com nome
+# temporário, sincronizado em disco (fsync) e só então renomeado (os.replace é
+# atômico). Os offsets só são entregues para commit depois disso.
+#
+# Como o nome do arquivo carrega a faixa de offsets, na retomada após uma queda o
+# sink descobre, por partição e por diretório de hora, até onde já gravou e descarta
+# os registros reenviados pelo Kafka: nada é duplicado nem perdido. Os offsets
+# descartados também avançam o commit, senão seriam relidos a cada reinício.
+#
+# O que se sabe sobre o disco fica em cache por (partição, hora) enquanto a hora
+# está aberta. Uma hora `horas_atraso` horas mais antiga que a mais recente da
+# partição é considerada fechada e sai do cache; um registro ainda mais atrasado
+# continua correto, só relê o diretório da hora dele.
+
+_PADRAO_ARQUIVO = re.compile(r'^part-p(\d+)-(\d+)-(\d+)\.ndjson\.zst$')
+
+
+class SinkDataLake:
+    """
+    Args:
+        diretorio (str): raiz do data lake local.
+        topico (str): tópico consumido (vira o primeiro nível de diretório).
+        max_bytes (int): tamanho do buffer (bytes não comprimidos) que dispara o flush.
+        max_idade_s (float): idade máxima de um registro no buffer antes do flush.
+        nivel_zstd (int): nível de compressão zstd.
+        horas_atraso (int): horas, atrás da mais recente de cada partição, que
+            continuam no cache de offsets gravados.
+    """
+
+    def __init__(self, diretorio, topico, max_bytes=64 * 1024 * 1024, max_idade_s=60, nivel_zstd=3,
+                 horas_atraso=2):
+        self.diretorio = diretorio
+        self.topico = topico
+        self.max_bytes = max_bytes
+        self.max_idade_s = max_idade_s
+        self.horas_atraso = horas_atraso
+        self._compressor = zstandard.ZstdCompressor(level=nivel_zstd)
+
+        self._buffers = defaultdict(list)    # (particao, hora epoch) -> [(offset, linha)]
+        self._bytes = 0
+        self._buffer_desde = None
+        self._ultimo_offset = {}              # particao -> maior offset lido (no buffer ou já em disco)
+        self._gravado = {}                    # (particao, hora epoch) -> maior offset já em disco
+        self._hora_recente = {}               # particao -> hora epoch mais recente vista
+        self._commit_pendente = {}
+        self._horas = {}                      # hora epoch -> diretório da hora
+
+    def _diretorio_hora(self, hora_epoch):
+        pasta = self._horas.get(hora_epoch)
+        if pasta is None:
+            t = time.gmtime(hora_epoch * 3600)
+            pasta = self._horas[hora_epoch] = os.path.join(
+                self.diretorio, self.topico, f"dt={time.strftime('%Y-%m-%d', t)}", f"hour={t.tm_hour:02d}")
+        return pasta
+
+    def _offset_gravado(self, particao, hora_epoch):
+        """Maior offset da partição já gravado no diretório da hora (-1 se nenhum)."""
+        chave = (particao, hora_epoch)
+        if chave not in self._gravado:
+            maior = -1
+            pasta = self._diretorio_hora(hora_epoch)
+            if os.path.isdir(pasta):
+                for nome in os.listdir(pasta):
+                    m = _PADRAO_ARQUIVO.match(nome)
+                    if m and int(m.group(1)) == particao:
+                        maior = max(maior, int(m.group(3)))
+            self._gravado[chave] = maior
+        return self._gravado[chave]
+
+    def descartar_cache(self, particoes=None):
+        """Esquece o que se sabe sobre o disco (ex.: após receber partições de outro consumidor)."""
+        if particoes is None:
+            self._gravado.clear()
+        else:
+            self._gravado = {k: v for k, v in self._gravado.items() if k[0] not in particoes}
+
+    def ao_atribuir(self, consumer, particoes):
+        # Outro processo do grupo pode ter gravado essas partições enquanto eram dele
+        self.descartar_cache({tp.partition for tp in particoes})
+
+    def processar_lote(self, registros):
+        for r in registros:
+            hora_epoch = r.timestamp // 3_600_000
+            if hora_epoch > self._hora_recente.get(r.partition, -1):
+                self._hora_recente[r.partition] = hora_epoch
+            self._ultimo_offset[r.partition] = max(r.offset, self._ultimo_offset.get(r.partition, -1))
+            if r.offset <= self._offset_gravado(r.partition, hora_epoch):
+                continue  # reenvio de algo que já está no data lake
+            linha = orjson.dumps(r.value)
+            self._buffers[(r.partition, hora_epoch)].append((r.offset, linha))
+            self._bytes += len(linha) + 1
+
+        if not self._buffers:
+            # Só reenvios (já em disco): os offsets podem ser commitados direto
+            self._liberar_offsets()
+            self._descartar_horas_fechadas()
+        if self._buffer_desde is None and self._bytes:
+            self._buffer_desde = time.monotonic()
+        if self._bytes >= self.max_bytes:
+            self.flush()
+        else:
+            self.ocioso()
+
+    def ocioso(self):
+        if self._buffer_desde is not None and time.monotonic() - self._buffer_desde >= self.max_idade_s:
+            self.flush()
+
+    def _gravar_arquivo(self, pasta, particao, itens):
+        os.makedirs(pasta, exist_ok=True)
+        primeiro, ultimo = itens[0][0], itens[-1][0]
+        nome = f"part-p{particao}-{primeiro:020d}-{ultimo:020d}.ndjson.zst"
+        tmp = os.path.join(pasta, f".{nome}.tmp")
+        conteudo = b"\n".join(linha for _, linha in itens) + b"\n"
+        with open(tmp, 'wb') as f:
+            f.write(self._compressor.compress(conteudo))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(pasta, nome))
+        return ultimo
+
+    def flush(self):
+        """Grava todo o buffer em disco de forma durável e libera os offsets para commit."""
+        if not self._buffers:
+            self._liberar_offsets()
+            return
+        pastas = set()
+        for (particao, hora_epoch), itens in self._buffers.items():
+            pasta = self._diretorio_hora(hora_epoch)
+            ultimo = self._gravar_arquivo(pasta, particao, itens)
+            self._gravado[(particao, hora_epoch)] = ultimo
+            pastas.add(pasta)
+
+        # fsync dos diretórios garante que os renames sobrevivem a uma queda de energia
+        for pasta in pastas:
+            fd = os.open(pasta, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        print(f"[sink] {sum(len(i) for i in self._buffers.values())} registros gravados "
+              f"em {len(self._buffers)} arquivo(s).")
+        self._buffers.clear()
+        self._bytes = 0
+        self._buffer_desde = None
+        self._liberar_offsets()
+        self._descartar_horas_fechadas()
+
+    def _liberar_offsets(self):
+        for particao, offset in self._ultimo_offset.items():
+            self._commit_pendente[TopicPartition(self.topico, particao)] = OffsetAndMetadata(offset + 1, '', -1)
+        self._ultimo_offset.clear()
+
+    def _descartar_horas_fechadas(self):
+        """Tira do cache as horas fechadas de cada partição (chamado sem nada no buffer)."""
+        if not self._hora_recente:
+            return
+        limites = {p: h - self.horas_atraso for p, h in self._hora_recente.items()}
+        self._gravado = {k: v for k, v in self._gravado.items() if k[1] >= limites.get(k[0], k[1])}
+        menor = min(limites.values())
+        self._horas = {h: pasta for h, pasta in self._horas.items() if h >= menor}
+
+    def offsets_para_commit(self):
+        """Offsets já duráveis em disco e ainda não commitados."""
+        offsets, self._commit_pendente = self._commit_pendente, {}
+        return offsets
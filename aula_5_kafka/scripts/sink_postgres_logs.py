@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from runtime_consumidor import adicionar_argumentos, runtime_de_args
+
+# df_to_postgres e o registro de fontes vêm do pipeline médico (aula 4)
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.append(str(BASE_DIR / "aula_4_airflow" / "custom_packages"))
+from plu_medical import STREAM_TABLES  # noqa: E402
+from plu_medical.layers import df_to_postgres  # noqa: E402
+
+# -------------------------------
+# Sink Kafka -> PostgreSQL (camada bronze)
+# -------------------------------
+# Leva os logs de logs.aplicacoes para a tabela bronze_logs_aplicacoes em
+# micro-lotes limitados por quantidade de linhas e por tempo. Cada micro-lote é
+# carregado com o df_to_postgres do plu_medical (COPY, if_exists="append",
+# commit=False) e, na MESMA transação, a tabela bronze_logs_offsets registra até
+# qual offset de cada partição já foi carregado. Na atribuição de partições o
+# consumidor volta exatamente para o offset seguinte ao registrado no banco, então
+# reprocessamentos não duplicam linhas, mesmo que o commit no Kafka tenha se perdido.
+#
+# O destino é o banco do pipeline médico (PG_* do .env na raiz do projeto, o mesmo
+# dos scripts da aula 1): logs_aplicacoes está em plu_medical.STREAM_TABLES e a
+# DAG new_pipeline_dag constrói silver_logs_aplicacoes a partir desta tabela.
+
+TOPIC = 'logs.aplicacoes'
+GROUP_ID = 'bronze-logs-postgres'
+AUTO_OFFSET_RESET = 'earliest'
+
+TABELA_LOGS = f'bronze_{STREAM_TABLES[0]}'
+COLUNAS_LOGS = ['api', 'status', 'tempo_resposta_ms', 'timestamp',
+                'kafka_particao', 'kafka_offset', 'execution_date']
+TABELA_OFFSETS = 'bronze_logs_offsets'
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS {TABELA_LOGS} (
+    api TEXT,
+    status TEXT,
+    tempo_resposta_ms INTEGER,
+    "timestamp" TIMESTAMP,
+    kafka_particao INTEGER NOT NULL,
+    kafka_offset BIGINT NOT NULL,
+    execution_date TEXT
+);
+CREATE TABLE IF NOT EXISTS {TABELA_OFFSETS} (
+    topico TEXT NOT NULL,
+    particao INTEGER NOT NULL,
+    ultimo_offset BIGINT NOT NULL,
+    atualizado_em TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (topico, particao)
+);
+"""
+
+
+def get_conn():
+    """Conexão psycopg2 com o banco do pipeline médico (PG_* do .env do projeto)."""
+    load_dotenv(BASE_DIR / ".env")
+    return psycopg2.connect(
+        host=os.getenv("PG_HOST", "localhost"),
+        port=os.getenv("PG_PORT", "5432"),
+        dbname=os.getenv("PG_DB"),
+        user=os.getenv("PG_USER"),
+        password=os.getenv("PG_PASS"),
+    )
+
+
+class SinkPostgresLogs:
+    """
+    Args:
+        conn: conexão psycopg2 (autocommit desligado).
+        max_linhas (int): tamanho máximo do micro-lote.
+        max_idade_s (float): tempo máximo que uma linha espera no buffer.
+    """
+
+    def __init__(self, conn, topico=TOPIC, max_linhas=50_000, max_idade_s=2.0):
+        self.conn = conn
+        self.topico = topico
+        self.max_linhas = max_linhas
+        self.max_idade_s = max_idade_s
+        self._linhas = []
+        self._ultimo_offset = {}
+        self._carregado = {}          # particao -> último offset já no banco
+        self._commit_pendente = {}
+        self._buffer_desde = None
+        self._ts_texto = {}
+        self._execution_date = datetime.today().strftime('%Y-%m-%d')
+
+        with self.conn.cursor() as cur:
+            cur.execute(DDL)
+        self.conn.commit()
+
+    def ao_atribuir(self, consumer, particoes):
+        """Reposiciona cada partição recebida logo após o último offset gravado no banco."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                f"SELECT particao, ultimo_offset FROM {TABELA_OFFSETS} WHERE topico = %s",
+                (self.topico,)
+            )
+            self._carregado.update(dict(cur.fetchall()))
+        self.conn.commit()
+        for tp in particoes:
+            if tp.partition in self._carregado:
+                consumer.seek(tp, self._carregado[tp.partition] + 1)
+
+    def _timestamp(self, ts):
+        if isinstance(ts, str):
+            return ts
+        texto = self._ts_texto.get(ts)
+        if texto is None:
+            if len(self._ts_texto) > 100_000:
+                self._ts_texto.clear()
+            texto = self._ts_texto[ts] = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+        return texto
+
+    def processar_lote(self, registros):
+        for r in registros:
+            if r.offset <= self._carregado.get(r.partition, -1):
+                continue
+            log = r.value
+            self._linhas.append((
+                log['api'], log['status'], log['tempo_resposta_ms'], self._timestamp(log['timestamp']),
+                r.partition, r.offset, self._execution_date,
+            ))
+            self._ultimo_offset[r.partition] = r.offset
+
+        if self._buffer_desde is None and self._linhas:
+            self._buffer_desde = time.monotonic()
+        if len(self._linhas) >= self.max_linhas:
+            self.flush()
+        else:
+            self.ocioso()
+
+    def ocioso(self):
+        if self._buffer_desde is not None and time.monotonic() - self._buffer_desde >= self.max_idade_s:
+            self.flush()
+
+    def flush(self):
+        if not self._linhas:
+            return
+        inicio = time.perf_counter()
+        df = pd.DataFrame(self._linhas, columns=COLUNAS_LOGS)
+
+        try:
+            df_to_postgres(df, TABELA_LOGS, self.conn, if_exists="append", commit=False)
+            with self.conn.cursor() as cur:
+                cur.executemany(
+                    f"""INSERT INTO {TABELA_OFFSETS} (topico, particao, ultimo_offset)
+                        VALUES (%s, %s, %s)
+                        ON CONFLICT (topico, particao)
+                        DO UPDATE SET ultimo_offset = GREATEST({TABELA_OFFSETS}.ultimo_offset,
+                                                               EXCLUDED.ultimo_offset),
+                                      atualizado_em = NOW()""",
+                    [(self.topico, p, o) for p, o in self._ultimo_offset.items()]
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        self._carregado.update(self._ultimo_offset)
+        for particao, offset in self._ultimo_offset.items():
+            self._commit_pendente[TopicPartition(self.topico, particao)] = OffsetAndMetadata(offset + 1, '', -1)
+        duracao = time.perf_counter() - inicio
+        print(f"[bronze] {len(self._linhas)} linhas carregadas em {duracao:.3f}s "
+              f"({len(self._linhas) / duracao:,.0f} linhas/s)")
+        self._linhas = []
+        self._ultimo_offset = {}
+        self._buffer_desde = None
+
+    def offsets_para_commit(self):
+        """Offsets já commitados no banco. O banco é a fonte da verdade; o commit no
+        Kafka serve para o monitoramento de lag e para o primeiro start sem registro."""
+        offsets, self._commit_pendente = self._commit_pendente, {}
+        return offsets
+
+
+def parse_args(argv=None):
+    parser = adicionar_argumentos()
+    parser.add_argument('--max-linhas', type=int, default=50_000, help="Linhas por micro-lote.")
+    parser.add_argument('--max-idade-s', type=float, default=2.0, help="Tempo máximo de um micro-lote.")
+    return parser.parse_args(argv)
+
+
+def criar_handler(args):
+    return SinkPostgresLogs(get_conn(), max_linhas=args.max_linhas, max_idade_s=args.max_idade_s)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runtime = runtime_de_args(args, TOPIC, GROUP_ID, criar_handler(args), AUTO_OFFSET_RESET)
+    print(f"🧩 Sink bronze iniciado: {TOPIC} -> {TABELA_LOGS}\n")
+    runtime.executar()
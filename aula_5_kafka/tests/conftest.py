@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os scripts do Kafka são módulos soltos (importados pelo nome, como nos consumidores)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
@@ -0,0 +1,135 @@
+import json
+
+import pytest
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+import read_topic
+from read_topic import AplicadorCDC, TABELA_CHECKPOINT
+
+TOPICO = read_topic.KAFKA_TOPIC
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("DELETE"):
+            self.conn.deletes.extend(params[0])
+        elif sql.startswith("SELECT particao"):
+            self.conn.lido = list(self.conn.checkpoint.items())
+
+    def copy_expert(self, sql, buffer):
+        self.conn.snapshot.extend(buffer.read().splitlines())
+
+    def fetchall(self):
+        return self.conn.lido
+
+
+class _Conexao:
+    def __init__(self, checkpoint=None):
+        self.checkpoint = checkpoint or {}
+        self.lido = []
+        self.deletes, self.upserts, self.snapshot = [], [], []
+        self.commits = self.rollbacks = 0
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    conexao = _Conexao()
+
+    def execute_values(cur, sql, linhas, page_size=100):
+        if TABELA_CHECKPOINT in sql:
+            cur.conn.gravado = sorted(linhas)
+        else:
+            cur.conn.upserts.extend(linhas)
+
+    monkeypatch.setattr(read_topic, "execute_values", execute_values)
+    return conexao
+
+
+def _evento(offset, op, chave, evento="pouso", particao=0, lsn=None):
+    after = None if op == "d" else {"id": chave, "voo_id": 1, "timestamp": 1_760_000_000_000_000,
+                                    "evento": evento, "observacoes": None}
+    before = {"id": chave} if op == "d" else None
+    payload = {"op": op, "before": before, "after": after, "source": {"lsn": lsn or 1000 + offset}}
+    valor = json.dumps({"schema": None, "payload": payload}).encode()
+    return ConsumerRecord(TOPICO, particao, -1, offset, 0, 0, None, valor, [], None, -1, len(valor), 0)
+
+
+def _tombstone(offset, particao=0):
+    return ConsumerRecord(TOPICO, particao, -1, offset, 0, 0, None, None, [], None, -1, -1, 0)
+
+
+def test_lote_colapsa_para_a_ultima_mudanca_por_chave(conn):
+    aplicador = AplicadorCDC(conn, max_eventos=10_000, max_idade_s=3600)
+    aplicador.processar_lote([
+        _evento(0, "c", 1, "embarque"), _evento(1, "u", 1, "decolagem"), _evento(2, "u", 1, "pouso"),
+        _evento(3, "c", 2), _evento(4, "d", 2), _tombstone(5),
+        _evento(6, "d", 3), _evento(7, "c", 3, "atraso"),
+        _evento(8, "r", 4, "snapshot"),
+    ])
+    assert conn.upserts == [] and conn.commits == 1   # só o DDL até o flush
+
+    aplicador.flush()
+    upserts = {linha[0]: linha[3] for linha in conn.upserts}
+    assert upserts == {1: "pouso", 3: "atraso"}
+    assert conn.deletes == [2]
+    assert len(conn.snapshot) == 1 and conn.snapshot[0].startswith("4,")
+    # Checkpoint do último offset (inclusive o tombstone) e do LSN do último evento com source
+    assert conn.gravado == [(TOPICO, 0, 8, 1008)]
+    assert conn.commits == 2
+    assert aplicador.offsets_para_commit() == {TopicPartition(TOPICO, 0): OffsetAndMetadata(9, "", -1)}
+
+
+def test_delete_depois_de_upsert_em_outro_lote(conn):
+    aplicador = AplicadorCDC(conn, max_eventos=10_000, max_idade_s=3600)
+    aplicador.processar_lote([_evento(0, "c", 1)])
+    aplicador.flush()
+    aplicador.processar_lote([_evento(1, "u", 1, "atraso"), _evento(2, "d", 1)])
+    aplicador.flush()
+    assert [linha[0] for linha in conn.upserts] == [1]
+    assert conn.deletes == [1]
+
+
+def test_retomada_pula_o_que_ja_foi_aplicado(conn):
+    conn.checkpoint = {0: 4}
+    aplicador = AplicadorCDC(conn, max_eventos=10_000, max_idade_s=3600)
+    seeks = {}
+    consumer = type("Consumer", (), {"seek": lambda self, tp, o: seeks.__setitem__(tp.partition, o)})()
+    aplicador.ao_atribuir(consumer, {TopicPartition(TOPICO, 0)})
+    assert seeks == {0: 5}
+
+    aplicador.processar_lote([_evento(o, "c", o) for o in range(3, 7)])
+    aplicador.flush()
+    assert sorted(linha[0] for linha in conn.upserts) == [5, 6]
+
+
+def test_falha_desfaz_e_mantem_offsets(conn, monkeypatch):
+    aplicador = AplicadorCDC(conn, max_eventos=10_000, max_idade_s=3600)
+
+    def falhar(*_args, **_kwargs):
+        raise RuntimeError("conexão perdida")
+
+    monkeypatch.setattr(read_topic, "execute_values", falhar)
+    aplicador.processar_lote([_evento(0, "c", 1)])
+    with pytest.raises(RuntimeError):
+        aplicador.flush()
+    assert conn.rollbacks == 1
+    assert aplicador.offsets_para_commit() == {}
@@ -0,0 +1,88 @@
+import datetime
+
+import orjson
+import pytest
+
+from decodificador_cdc import DecodificadorCDC
+
+SCHEMA_V1 = {
+    "type": "struct", "name": "dbserver.public.pedidos.Envelope",
+    "fields": [
+        {"field": "before", "type": "struct", "fields": [{"field": "id", "type": "int32"}]},
+        {"field": "after", "type": "struct", "fields": [
+            {"field": "id", "type": "int32"},
+            {"field": "valor", "type": "double"},
+            {"field": "criado_em", "type": "int64", "name": "io.debezium.time.MicroTimestamp"},
+        ]},
+        {"field": "op", "type": "string"},
+    ],
+}
+SCHEMA_V2 = {**SCHEMA_V1, "fields": SCHEMA_V1["fields"] + [{"field": "ts_ms", "type": "int64"}]}
+
+
+def _envelope(payload, schema=SCHEMA_V1):
+    return orjson.dumps({"schema": schema, "payload": payload})
+
+
+def _payload(i, op="u"):
+    return {
+        "op": op,
+        "before": {"id": i, "valor": 1.5, "criado_em": 1_700_000_000_000_000} if op != "c" else None,
+        "after": {"id": i, "valor": i * 2.5, "criado_em": 1_700_000_000_000_000 + i,
+                  "nota": 'com "aspas" e } chaves {'} if op != "d" else None,
+        "source": {"lsn": 1000 + i, "table": "pedidos"},
+        "ts_ms": 1_700_000_000_000 + i,
+    }
+
+
+def _referencia(dados, campos, colunas=None):
+    valor = orjson.loads(dados)
+    payload = valor["payload"] if "schema" in valor and "payload" in valor else valor
+    if payload is None:
+        return None
+    saida = {c: payload.get(c) for c in campos}
+    if colunas:
+        for campo in ("before", "after"):
+            if saida.get(campo):
+                saida[campo] = {c: saida[campo].get(c) for c in colunas}
+    return saida
+
+
+MENSAGENS = [
+    _envelope(_payload(1, "c")),
+    _envelope(_payload(2)),                         # mesmo schema: caminho do prefixo
+    _envelope(_payload(3, "d")),
+    _envelope(_payload(4), SCHEMA_V2),              # nova versão de schema
+    _envelope(_payload(5), SCHEMA_V2),
+    orjson.dumps(_payload(6)),                      # sem schema (schemas.enable=false)
+    _envelope(_payload(7)) + b"\n",                 # volta à versão 1, com espaço no fim
+    _envelope(None),                                # payload nulo
+]
+
+
+@pytest.mark.parametrize("campos,colunas", [
+    (("op", "before", "after", "source"), None),
+    (("op", "after", "ts_ms"), ("id", "valor")),
+])
+def test_igual_ao_orjson(campos, colunas):
+    decodificador = DecodificadorCDC(campos=campos, colunas=colunas)
+    for dados in MENSAGENS:
+        assert decodificador.decodificar(dados) == _referencia(dados, campos, colunas)
+    assert decodificador.decodificar(None) is None
+
+
+def test_schema_sob_demanda_e_timestamps():
+    decodificador = DecodificadorCDC()
+    decodificador.decodificar(_envelope(_payload(1)))
+    assert decodificador.schema() == SCHEMA_V1
+    assert decodificador.colunas_timestamp() == {"criado_em": "us"}
+
+    linhas = [decodificador.decodificar(_envelope(_payload(i)))["after"] for i in (1, 2)]
+    linhas.append({"id": 3, "criado_em": None})
+    decodificador.converter_timestamps(linhas)
+    base = datetime.datetime(1970, 1, 1) + datetime.timedelta(microseconds=1_700_000_000_000_000)
+    assert [linha["criado_em"] for linha in linhas] == [
+        base + datetime.timedelta(microseconds=1), base + datetime.timedelta(microseconds=2), None]
+
+    decodificador.decodificar(_envelope(_payload(4), SCHEMA_V2))
+    assert decodificador.schema() == SCHEMA_V2
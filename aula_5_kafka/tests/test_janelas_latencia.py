@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pytest
+
+from janelas_latencia import AgregadorJanelas, HistogramaLatencia
+
+
+@pytest.mark.parametrize("erro_relativo", [0.01, 0.05])
+def test_percentis_dentro_do_erro_relativo(erro_relativo):
+    valores = np.random.default_rng(7).lognormal(mean=5, sigma=1.2, size=50_000) + 1
+    hist = HistogramaLatencia(erro_relativo)
+    hist.adicionar(valores)
+
+    qs = [50, 90, 95, 99, 99.9]
+    estimados = hist.percentis(qs)
+    exatos = np.percentile(valores, qs, method="inverted_cdf")
+    for q, estimado, exato in zip(qs, estimados, exatos):
+        assert abs(estimado - exato) / exato <= erro_relativo + 1e-9, f"p{q}"
+    assert hist.total == len(valores)
+
+
+def test_mesclar_equivale_a_adicionar_tudo():
+    a, b, junto = HistogramaLatencia(), HistogramaLatencia(), HistogramaLatencia()
+    a.adicionar([10, 20, 30])
+    b.adicionar([1500, 2500])
+    junto.adicionar([10, 20, 30, 1500, 2500])
+    a.mesclar(b)
+    assert (a.contagens == junto.contagens).all()
+    assert a.percentis([50, 99]) == junto.percentis([50, 99])
+
+
+def test_histograma_vazio_e_limites():
+    hist = HistogramaLatencia(max_ms=1000)
+    assert all(math.isnan(p) for p in hist.percentis([50, 99]))
+    hist.adicionar([0.2, 10_000_000])   # abaixo de 1 ms e acima de max_ms
+    assert hist.total == 2
+    assert hist.contagens[0] == 1 and hist.contagens[-1] == 1
+
+
+def _logs(n, status="OK", tempo=100, api="api_login"):
+    return [{"api": api, "status": status, "tempo_resposta_ms": tempo} for _ in range(n)]
+
+
+def test_rotacao_da_janela_deslizante():
+    agora = [0.0]
+    emitidos = []
+    agregador = AgregadorJanelas(janela_s=30, passo_s=10, relogio=lambda: agora[0],
+                                 ao_emitir=lambda r, motivos: emitidos.append((r, motivos)))
+
+    agregador.adicionar_lote(_logs(10, status="ERRO"))
+    agora[0] = 10
+    agregador.adicionar_lote(_logs(5))          # fecha o 1º passo antes de acumular
+    for t in (20, 30, 40):
+        agora[0] = t
+        agregador.emitir_se_devido()
+
+    # O 1º lote fica na janela por 3 passos (30 s); o 2º entra no passo seguinte
+    assert [r["total"] for r, _ in emitidos] == [10, 15, 15, 5]
+    assert [r["taxa_erro"] for r, _ in emitidos] == [1.0, 10 / 15, 10 / 15, 0.0]
+    assert emitidos[0][1] and not emitidos[-1][1]   # alerta de erro só enquanto os ERRO estão na janela
+
+    # Vários passos vencidos de uma vez: fecha todos, e APIs sem dados não emitem
+    emitidos.clear()
+    agora[0] = 75
+    agregador.emitir_se_devido()
+    assert emitidos == []
+    agregador.adicionar_lote(_logs(1))
+    agora[0] = 80
+    agregador.emitir_se_devido()
+    assert [r["total"] for r, _ in emitidos] == [1]
+
+
+def test_motivos_por_percentil():
+    agregador = AgregadorJanelas(janela_s=10, passo_s=10, limite_p95_ms=2000, limite_p99_ms=2800,
+                                 relogio=lambda: 0.0, ao_emitir=lambda r, m: None)
+    agregador.adicionar_lote(_logs(90, tempo=100) + _logs(10, tempo=3000))
+    r = agregador.resumo("api_login")
+    assert r["taxa_lento"] == pytest.approx(0.10)
+    motivos = agregador.motivos(r)
+    assert any(m.startswith("p95") for m in motivos)
+    assert any(m.startswith("p99") for m in motivos)
+    assert "ALERTA" in agregador.formatar(r, motivos)
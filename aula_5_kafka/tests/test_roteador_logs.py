@@ -0,0 +1,48 @@
+import pytest
+
+from roteador_logs import ROTAS_PADRAO, compilar_regra, compilar_rotas
+
+ERRO = {"api": "api_login", "status": "ERRO", "tempo_resposta_ms": 120}
+LENTO = {"api": "api_pedidos", "status": "OK", "tempo_resposta_ms": 2500}
+OK = {"api": "api_pedidos", "status": "OK", "tempo_resposta_ms": 2000}
+
+
+def test_condicoes_em_ou():
+    regra = compilar_regra("status=LENTO | tempo_resposta_ms>2000")
+    assert regra(LENTO)
+    assert regra({**OK, "status": "LENTO"})
+    assert not regra(OK)   # 2000 não é > 2000
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("tempo_resposta_ms>=2000", True),
+    ("tempo_resposta_ms<2000", False),
+    ("tempo_resposta_ms<=2000", True),
+    ("tempo_resposta_ms==2000", True),
+    ("status!=OK", False),
+    ("tempo_resposta_ms>1999.5", True),   # número com casas decimais
+])
+def test_operadores(texto, esperado):
+    assert compilar_regra(texto)(OK) is esperado
+
+
+def test_campo_ausente_nao_casa():
+    assert not compilar_regra("regiao=sa")(OK)
+
+
+def test_regra_invalida():
+    with pytest.raises(ValueError):
+        compilar_regra("status~ERRO")
+    with pytest.raises(ValueError):
+        compilar_rotas(["logs.aplicacoes.erro"])
+
+
+def test_rotas_padrao():
+    rotas = compilar_rotas(ROTAS_PADRAO)
+    destinos = {log["status"] + str(log["tempo_resposta_ms"]): [t for t, p in rotas if p(log)]
+                for log in (ERRO, LENTO, OK)}
+    assert destinos == {
+        "ERRO120": ["logs.aplicacoes.erro"],
+        "OK2500": ["logs.aplicacoes.lento"],
+        "OK2000": [],
+    }
@@ -0,0 +1,46 @@
+from kafka.structs import TopicPartition
+
+from runtime_async import RuntimeAsync, _Pendentes
+
+
+def test_commit_para_no_trabalho_aberto_mais_antigo():
+    pendentes = _Pendentes()
+    for offset in (3, 5, 5, 7):   # o offset 5 gerou dois trabalhos
+        pendentes.registrar(offset)
+    pendentes.consumido = 8
+    assert pendentes.commitavel() == 3
+
+    pendentes.concluir(7)          # terminar fora de ordem não adianta o commit
+    assert pendentes.commitavel() == 3
+    pendentes.concluir(3)
+    assert pendentes.commitavel() == 5
+    pendentes.concluir(5)
+    assert pendentes.commitavel() == 5 and not pendentes.vazio()
+    pendentes.concluir(5)
+    assert pendentes.commitavel() == 8 and pendentes.vazio()
+
+
+def test_sem_trabalho_commita_o_consumido():
+    pendentes = _Pendentes()
+    assert pendentes.commitavel() is None
+    pendentes.consumido = 42
+    assert pendentes.commitavel() == 42
+
+
+def test_offsets_commitaveis_so_o_que_mudou():
+    runtime = RuntimeAsync("logs.aplicacoes", "teste", handler=None)
+    try:
+        tp0, tp1 = TopicPartition("logs.aplicacoes", 0), TopicPartition("logs.aplicacoes", 1)
+        runtime.pendentes = {tp0: _Pendentes(), tp1: _Pendentes()}
+        runtime.pendentes[tp0].registrar(10)
+        runtime.pendentes[tp0].consumido = 12
+        runtime.pendentes[tp1].consumido = 4
+        assert runtime.offsets_commitaveis() == {tp0: 10, tp1: 4}
+        assert runtime.offsets_commitaveis({tp1}) == {tp1: 4}
+
+        runtime._commitados = {tp0: 10, tp1: 4}
+        assert runtime.offsets_commitaveis() == {}
+        runtime.pendentes[tp0].concluir(10)
+        assert runtime.offsets_commitaveis() == {tp0: 12}
+    finally:
+        runtime._executor.shutdown()
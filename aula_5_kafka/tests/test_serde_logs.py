@@ -0,0 +1,91 @@
+import json
+
+import orjson
+import pytest
+
+from serde_logs import (RegistroSchemasLocal, SerdeLogs, anunciar_consumidor, timestamp_epoch,
+                        versoes_decodificaveis)
+
+LOGS = [
+    {"api": "api_login", "status": "OK", "tempo_resposta_ms": 120, "timestamp": "2025-10-01 12:00:00"},
+    {"api": "api_pagamentos", "status": "ERRO", "tempo_resposta_ms": 2999, "timestamp": "2025-10-01 12:00:01"},
+    {"api": "api_usuarios", "status": "LENTO", "tempo_resposta_ms": 0, "timestamp": 1759320000},
+]
+
+
+@pytest.mark.parametrize("log", LOGS)
+def test_ida_e_volta_binario(log):
+    serde = SerdeLogs(formato="binario")
+    dados = serde.serializar(log)
+    assert dados[0] == 0 and len(dados) == 15
+
+    lido = serde.desserializar(dados)
+    assert lido == {**log, "timestamp": int(timestamp_epoch(log))}
+
+
+@pytest.mark.parametrize("log", LOGS)
+def test_ida_e_volta_json_legado(log):
+    serde = SerdeLogs(formato="json")
+    dados = serde.serializar(log)
+    assert dados == orjson.dumps(log)
+    assert serde.desserializar(dados) == log
+
+
+def test_leitor_json_le_binario_de_outro_produtor():
+    dados = SerdeLogs(formato="binario", versao=1).serializar(LOGS[1])
+    assert SerdeLogs(formato="json").desserializar(dados)["status"] == "ERRO"
+
+
+def test_caminho_rapido_igual_ao_serializar():
+    serde = SerdeLogs(formato="binario")
+    apis, status = serde.simbolos("api"), serde.simbolos("status")
+    epoch = 1759320000
+    rapidos = serde.serializar_codigos([0, 2], [1, 0], [50, 700], epoch)
+    lentos = [
+        serde.serializar({"api": apis[0], "status": status[1], "tempo_resposta_ms": 50, "timestamp": epoch}),
+        serde.serializar({"api": apis[2], "status": status[0], "tempo_resposta_ms": 700, "timestamp": epoch}),
+    ]
+    assert rapidos == lentos
+
+
+def test_erros_de_schema():
+    serde = SerdeLogs(formato="binario")
+    with pytest.raises(ValueError):
+        serde.desserializar(b"\x07" + bytes(14))
+    with pytest.raises(KeyError):
+        serde.desserializar(b"\x00\x00\x00\x03\xe7" + bytes(10))   # id 999 não registrado
+    with pytest.raises(KeyError):
+        RegistroSchemasLocal().versao("logs.aplicacoes-value", 999)
+
+
+def _registro_com_duas_versoes(tmp_path):
+    schema = RegistroSchemasLocal().versao("logs.aplicacoes-value", 1)
+    v2 = {**schema, "id": 2, "version": 2,
+          "fields": schema["fields"] + [{"name": "regiao", "type": "enum", "symbols": ["sa", "us"]}]}
+    path = tmp_path / "registry.json"
+    path.write_text(json.dumps({"schemas": [schema, v2]}), encoding="utf-8")
+    return RegistroSchemasLocal(str(path))
+
+
+def test_negociacao_de_versao(tmp_path):
+    registro = _registro_com_duas_versoes(tmp_path)
+    # Ninguém anunciou: a mais recente
+    assert registro.versao_negociada("logs.aplicacoes-value")["version"] == 2
+
+    anunciar_consumidor("grupo-antigo", registro=RegistroSchemasLocal(registro.path))
+    assert versoes_decodificaveis(registro) == [1, 2]
+    registro.anunciar("logs.aplicacoes-value", "grupo-antigo", [1])
+    anunciar_consumidor("grupo-novo", registro=RegistroSchemasLocal(registro.path))
+
+    # O produtor usa a maior versão aceita por todos os grupos
+    serde = SerdeLogs(formato="binario", registro=RegistroSchemasLocal(registro.path))
+    assert serde.serializar(LOGS[0])[1:5] == b"\x00\x00\x00\x01"
+    # --versao-schema continua fixando uma versão
+    assert SerdeLogs(formato="binario", registro=registro, versao=2)._escrita.schema["id"] == 2
+
+    registro.anunciar("logs.aplicacoes-value", "grupo-antigo", [1, 2])
+    assert registro.versao_negociada("logs.aplicacoes-value")["version"] == 2
+
+    registro.anunciar("logs.aplicacoes-value", "grupo-isolado", [3])
+    with pytest.raises(ValueError):
+        registro.versao_negociada("logs.aplicacoes-value")
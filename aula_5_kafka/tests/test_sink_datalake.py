@@ -0,0 +1,89 @@
+import os
+
+import orjson
+import zstandard
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from sink_datalake import SinkDataLake
+
+TOPICO = "logs.aplicacoes"
+HORA_MS = 3_600_000
+T0 = 1_760_000_000_000 // HORA_MS * HORA_MS   # início de uma hora
+
+
+def _registro(particao, offset, ts_ms):
+    valor = {"api": "api_login", "status": "OK", "offset": offset}
+    return ConsumerRecord(TOPICO, particao, -1, offset, ts_ms, 0, None, valor, [], None, -1, 0, 0)
+
+
+def _arquivos(diretorio):
+    return sorted(
+        os.path.relpath(os.path.join(raiz, nome), diretorio)
+        for raiz, _, nomes in os.walk(diretorio) for nome in nomes
+    )
+
+
+def _ler(caminho):
+    with open(caminho, "rb") as f:
+        dados = zstandard.ZstdDecompressor().stream_reader(f).read()
+    return [orjson.loads(linha) for linha in dados.splitlines()]
+
+
+def _sink(diretorio, **kwargs):
+    return SinkDataLake(str(diretorio), TOPICO, max_bytes=10**9, max_idade_s=3600, **kwargs)
+
+
+def test_flush_particiona_por_hora_e_so_entao_libera_offsets(tmp_path):
+    sink = _sink(tmp_path)
+    sink.processar_lote([_registro(0, 0, T0), _registro(0, 1, T0 + HORA_MS), _registro(1, 5, T0 + 10)])
+    assert sink.offsets_para_commit() == {}
+    assert _arquivos(tmp_path) == []
+
+    sink.flush()
+    arquivos = _arquivos(tmp_path)
+    assert len(arquivos) == 3
+    assert all(a.startswith(os.path.join(TOPICO, "dt=")) and "/hour=" in a for a in arquivos)
+    assert not any(os.path.basename(a).startswith(".") for a in arquivos)   # nenhum temporário
+
+    offsets = {tp.partition: om.offset for tp, om in sink.offsets_para_commit().items()}
+    assert offsets == {0: 2, 1: 6}
+    lidos = sorted(r["offset"] for a in arquivos for r in _ler(tmp_path / a))
+    assert lidos == [0, 1, 5]
+
+
+def test_retomada_descarta_reenvios_e_commita_os_offsets(tmp_path):
+    primeiro = _sink(tmp_path)
+    primeiro.processar_lote([_registro(0, o, T0 + o) for o in range(3)])
+    primeiro.flush()
+    antes = _arquivos(tmp_path)
+
+    # Queda antes do commit: o Kafka reenvia 0..2 para um processo novo
+    sink = _sink(tmp_path)
+    sink.processar_lote([_registro(0, o, T0 + o) for o in range(3)])
+    assert sink.offsets_para_commit() == {TopicPartition(TOPICO, 0): OffsetAndMetadata(3, "", -1)}
+    assert _arquivos(tmp_path) == antes
+
+    sink.processar_lote([_registro(0, o, T0 + o) for o in range(2, 5)])
+    sink.flush()
+    novos = sorted(set(_arquivos(tmp_path)) - set(antes))
+    assert len(novos) == 1
+    assert [r["offset"] for r in _ler(tmp_path / novos[0])] == [3, 4]
+
+
+def test_horas_fechadas_saem_do_cache_sem_perder_a_deduplicacao(tmp_path):
+    sink = _sink(tmp_path, horas_atraso=1)
+    sink.processar_lote([_registro(0, 0, T0)])
+    sink.flush()
+    hora_inicial = T0 // HORA_MS
+    assert (0, hora_inicial) in sink._gravado
+
+    sink.processar_lote([_registro(0, 1, T0 + 3 * HORA_MS)])
+    sink.flush()
+    assert (0, hora_inicial) not in sink._gravado
+    assert hora_inicial not in sink._horas
+
+    # Registro atrasado da hora fechada: relê o diretório e continua sem duplicar
+    sink.processar_lote([_registro(0, 0, T0)])
+    sink.flush()
+    assert len(_arquivos(tmp_path)) == 2
@@ -0,0 +1,125 @@
+import pytest
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+pytest.importorskip("dotenv")
+import sink_postgres_logs  # noqa: E402
+from sink_postgres_logs import COLUNAS_LOGS, TABELA_LOGS, SinkPostgresLogs  # noqa: E402
+
+TOPICO = "logs.aplicacoes"
+
+
+class _Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.eventos.append(("execute", sql.split()[0]))
+
+    def executemany(self, sql, linhas):
+        self.conn.eventos.append(("offsets", sorted(linhas)))
+
+    def fetchall(self):
+        return list(self.conn.offsets_no_banco.items())
+
+
+class _Conexao:
+    def __init__(self, offsets_no_banco=None):
+        self.offsets_no_banco = offsets_no_banco or {}
+        self.eventos = []
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.eventos.append(("commit",))
+
+    def rollback(self):
+        self.eventos.append(("rollback",))
+
+
+class _Consumer:
+    def __init__(self):
+        self.seeks = {}
+
+    def seek(self, tp, offset):
+        self.seeks[tp.partition] = offset
+
+
+def _registro(particao, offset, ts=1_760_000_000):
+    log = {"api": "api_login", "status": "OK", "tempo_resposta_ms": 10 + offset, "timestamp": ts}
+    return ConsumerRecord(TOPICO, particao, -1, offset, 0, 0, None, log, [], None, -1, 15, 0)
+
+
+@pytest.fixture
+def cargas(monkeypatch):
+    carregados = []
+
+    def carregar(df, table_name, conn, if_exists="replace", commit=True):
+        assert (table_name, if_exists, commit) == (TABELA_LOGS, "append", False)
+        conn.eventos.append(("copy", len(df)))
+        carregados.append(df)
+
+    monkeypatch.setattr(sink_postgres_logs, "df_to_postgres", carregar)
+    return carregados
+
+
+def test_flush_grava_linhas_e_offsets_na_mesma_transacao(cargas):
+    conn = _Conexao()
+    sink = SinkPostgresLogs(conn, max_linhas=100, max_idade_s=3600)
+    conn.eventos.clear()
+
+    sink.processar_lote([_registro(0, 0), _registro(0, 1), _registro(1, 7)])
+    assert cargas == [] and sink.offsets_para_commit() == {}
+
+    sink.flush()
+    assert conn.eventos == [("copy", 3), ("offsets", [(TOPICO, 0, 1), (TOPICO, 1, 7)]), ("commit",)]
+    df = cargas[0]
+    assert list(df.columns) == COLUNAS_LOGS
+    assert df["timestamp"].str.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$").all()
+    assert sink.offsets_para_commit() == {
+        TopicPartition(TOPICO, 0): OffsetAndMetadata(2, "", -1),
+        TopicPartition(TOPICO, 1): OffsetAndMetadata(8, "", -1),
+    }
+
+    sink.flush()   # buffer vazio: nada a fazer
+    assert len(cargas) == 1
+
+
+def test_micro_lote_cheio_dispara_flush(cargas):
+    sink = SinkPostgresLogs(_Conexao(), max_linhas=2, max_idade_s=3600)
+    sink.processar_lote([_registro(0, o) for o in range(3)])
+    assert [len(df) for df in cargas] == [3]
+
+
+def test_falha_desfaz_e_nao_libera_offsets(monkeypatch):
+    conn = _Conexao()
+    sink = SinkPostgresLogs(conn, max_idade_s=3600)
+
+    def falhar(*_args, **_kwargs):
+        raise RuntimeError("COPY interrompido")
+
+    monkeypatch.setattr(sink_postgres_logs, "df_to_postgres", falhar)
+    sink.processar_lote([_registro(0, 0)])
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert conn.eventos[-1] == ("rollback",)
+    assert sink.offsets_para_commit() == {}
+
+
+def test_atribuicao_volta_ao_offset_do_banco_e_ignora_reenvios(cargas):
+    conn = _Conexao(offsets_no_banco={0: 4})
+    sink = SinkPostgresLogs(conn, max_idade_s=3600)
+    consumer = _Consumer()
+    sink.ao_atribuir(consumer, {TopicPartition(TOPICO, 0), TopicPartition(TOPICO, 1)})
+    assert consumer.seeks == {0: 5}
+
+    sink.processar_lote([_registro(0, o) for o in range(3, 7)] + [_registro(1, 0)])
+    sink.flush()
+    assert sorted(zip(cargas[0]["kafka_particao"], cargas[0]["kafka_offset"])) == [(0, 5), (0, 6), (1, 0)]
@@ -5,6 +5,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.exc import SQLAlchemyError
 from pathlib import Path
 import numpy as np
+import sys
+from encounter_cube import create_encounter_cube
 
 # -------------------------------
 # Variáveis e Funções de Conexão
@@ -18,6 +20,10 @@ print("Loading ENV from:", env_path)
 load_dotenv(BASE_DIR / ".env", override=True)
 env_path = BASE_DIR / ".env"
 
+# Registro de versão da gold, compartilhado com os demais pipelines (scripts/gold_version.py)
+sys.path.append(str(BASE_DIR / "scripts"))
+from gold_version import register_gold_version
+
 print("PG_USER:", os.getenv("PG_USER"))
 print("PG_PORT:", os.getenv("PG_PORT"))
 
@@ -153,6 +159,9 @@ def load_gold():
         # Criação das tabelas de resumo
         patient_summary_df = create_patient_summary(patients, encounters)
         encounter_summary_df = create_encounter_summary(encounters)
+
+        # Cubo pré-agregado (classe x ano x mês x gênero x raça x etnia)
+        encounter_cube_df = create_encounter_cube(obt_df)
         
         print("\nTransformações para a camada gold concluídas.")
 
@@ -166,6 +175,8 @@ def load_gold():
         obt_df.to_sql("gold_obt_encounters", eng, if_exists="replace", index=False)
         patient_summary_df.to_sql("gold_patient_summary", eng, if_exists="replace", index=False)
         encounter_summary_df.to_sql("gold_encounter_summary", eng, if_exists="replace", index=False)
+        encounter_cube_df.to_sql("gold_encounter_cube", eng, if_exists="replace", index=False)
+        register_gold_version(eng, "aula_1_banco")
 
         print("Dados inseridos com sucesso no banco na camada gold.")
         
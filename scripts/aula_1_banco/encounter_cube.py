@@ -0,0 +1,174 @@
+import itertools
+import pandas as pd
+from sqlalchemy import text
+
+# -------------------------------
+# Definição do cubo de encontros
+# -------------------------------
+# Dimensões disponíveis no cubo, na ordem usada para calcular o grouping_id
+# (mesma convenção do GROUPING() do PostgreSQL: o primeiro bit é a primeira dimensão).
+CUBE_DIMENSIONS = [
+    "encounterclass", "encounter_year", "encounter_month",
+    "gender", "race", "ethnicity"
+]
+
+# Métricas numéricas agregadas com medidas "mergeáveis": a partir delas é possível
+# reagregar qualquer fatia sem voltar à OBT (contagem, soma, soma dos quadrados, min e max).
+CUBE_MEASURES = ["total_claim_cost", "duration_hours"]
+
+
+def cube(*dims):
+    """Equivalente ao CUBE(a, b, c): todas as combinações das dimensões."""
+    return [
+        combo
+        for size in range(len(dims), -1, -1)
+        for combo in itertools.combinations(dims, size)
+    ]
+
+
+# Por padrão o cubo completo das seis dimensões (64 agrupamentos).
+DEFAULT_GROUPING_SETS = cube(*CUBE_DIMENSIONS)
+
+
+def grouping_id(group_by):
+    """
+    Máscara de bits com 1 para cada dimensão agregada (ausente do agrupamento).
+
+    Numa célula, dimensão agregada ("todos") e valor NULL real são ambos NULL; só o
+    grouping_id diferencia os dois. Por isso toda leitura do cubo filtra primeiro
+    pelo grouping_id do agrupamento escolhido: dentro dele, NULL numa dimensão
+    agrupada é sempre um valor NULL real.
+    """
+    gid = 0
+    n = len(CUBE_DIMENSIONS)
+    for i, dim in enumerate(CUBE_DIMENSIONS):
+        if dim not in group_by:
+            gid |= 1 << (n - 1 - i)
+    return gid
+
+
+def _merge_aggregations():
+    """Como combinar as medidas de células mais finas numa célula mais grossa."""
+    aggs = {"encounter_count": ("encounter_count", "sum")}
+    for m in CUBE_MEASURES:
+        aggs[f"{m}_count"] = (f"{m}_count", "sum")
+        aggs[f"{m}_sum"] = (f"{m}_sum", "sum")
+        aggs[f"{m}_sumsq"] = (f"{m}_sumsq", "sum")
+        aggs[f"{m}_min"] = (f"{m}_min", "min")
+        aggs[f"{m}_max"] = (f"{m}_max", "max")
+    return aggs
+
+
+def _merge_cells(cells, group_by):
+    """Reagrega células do cubo para o nível `group_by` combinando as medidas."""
+    aggs = _merge_aggregations()
+    if not group_by:
+        return cells.assign(_total=0).groupby("_total").agg(**aggs).reset_index(drop=True)
+    return cells.groupby(list(group_by), dropna=False).agg(**aggs).reset_index()
+
+
+def create_encounter_cube(obt_df, grouping_sets=DEFAULT_GROUPING_SETS):
+    """
+    Cria o cubo pré-agregado de encontros a partir da OBT.
+
+    A OBT é lida uma única vez para montar as células no grão mais fino (todas as
+    dimensões); cada agrupamento solicitado é derivado dessas células combinando as
+    medidas, sem novas varreduras da OBT.
+    """
+    print("Criando cubo de encontros...")
+    df = obt_df.copy()
+    start = pd.to_datetime(df["encounter_start_date"], errors="coerce")
+    df["encounter_year"] = start.dt.year.astype("Int64")
+    df["encounter_month"] = start.dt.month.astype("Int64")
+
+    base_aggs = {"encounter_count": ("encounter_id", "size")}
+    for m in CUBE_MEASURES:
+        df[m] = pd.to_numeric(df[m], errors="coerce")
+        df[f"{m}_sq"] = df[m] ** 2
+        base_aggs[f"{m}_count"] = (m, "count")
+        base_aggs[f"{m}_sum"] = (m, "sum")
+        base_aggs[f"{m}_sumsq"] = (f"{m}_sq", "sum")
+        base_aggs[f"{m}_min"] = (m, "min")
+        base_aggs[f"{m}_max"] = (m, "max")
+
+    base = df.groupby(CUBE_DIMENSIONS, dropna=False).agg(**base_aggs).reset_index()
+
+    partes = []
+    for group_by in grouping_sets:
+        parte = _merge_cells(base, group_by)
+        for dim in CUBE_DIMENSIONS:
+            if dim not in group_by:
+                parte[dim] = None
+        parte["grouping_id"] = grouping_id(group_by)
+        partes.append(parte)
+
+    cube_df = pd.concat(partes, ignore_index=True)
+    return cube_df[["grouping_id"] + CUBE_DIMENSIONS + list(_merge_aggregations())]
+
+
+def _add_derived_measures(df):
+    """Calcula média e desvio padrão a partir das medidas mergeáveis."""
+    for m in CUBE_MEASURES:
+        n = df[f"{m}_count"]
+        df[f"{m}_avg"] = df[f"{m}_sum"] / n.where(n > 0)
+        var = (df[f"{m}_sumsq"] - df[f"{m}_sum"] ** 2 / n.where(n > 0)) / (n - 1).where(n > 1)
+        df[f"{m}_std"] = var.clip(lower=0) ** 0.5
+    return df
+
+
+def _choose_grouping_set(dims, grouping_sets):
+    """Escolhe o menor agrupamento suportado que contém todas as dimensões pedidas."""
+    candidatos = [g for g in grouping_sets if set(dims) <= set(g)]
+    if not candidatos:
+        raise ValueError(f"Nenhum agrupamento do cubo cobre as dimensões {sorted(dims)}.")
+    return min(candidatos, key=len)
+
+
+def slice_cube(cube_df, group_by, filters=None, grouping_sets=DEFAULT_GROUPING_SETS):
+    """
+    Responde uma fatia do cubo já carregado em memória.
+
+    Args:
+        cube_df (pd.DataFrame): conteúdo de gold_encounter_cube.
+        group_by (list): dimensões do resultado, ex.: ["encounterclass", "gender"].
+        filters (dict): filtros de igualdade por dimensão, ex.: {"encounter_year": 2020};
+            None seleciona o valor NULL real da dimensão.
+    """
+    filters = filters or {}
+    group_by = list(group_by)
+    source = _choose_grouping_set(set(group_by) | set(filters), grouping_sets)
+
+    cells = cube_df[cube_df["grouping_id"] == grouping_id(source)]
+    for dim, value in filters.items():
+        mascara = cells[dim].isna() if value is None else cells[dim].eq(value).fillna(False).astype(bool)
+        cells = cells[mascara]
+
+    result = _merge_cells(cells, group_by)
+    return _add_derived_measures(result)
+
+
+def query_encounter_cube(eng, group_by, filters=None, grouping_sets=DEFAULT_GROUPING_SETS):
+    """
+    Consulta uma fatia de gold_encounter_cube no PostgreSQL.
+
+    Lê apenas as células do agrupamento que atende à consulta (filtrando por
+    grouping_id e pelos filtros no banco) e faz a reagregação final em pandas.
+    """
+    filters = filters or {}
+    unknown = (set(group_by) | set(filters)) - set(CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Dimensões inexistentes no cubo: {sorted(unknown)}")
+
+    source = _choose_grouping_set(set(group_by) | set(filters), grouping_sets)
+    where = ["grouping_id = :grouping_id"]
+    params = {"grouping_id": grouping_id(source)}
+    for i, (dim, value) in enumerate(filters.items()):
+        if value is None:
+            where.append(f'"{dim}" IS NULL')   # NULL real: o grouping_id já excluiu os "todos"
+            continue
+        where.append(f'"{dim}" = :f{i}')
+        params[f"f{i}"] = value
+
+    query = text(f"SELECT * FROM gold_encounter_cube WHERE {' AND '.join(where)}")
+    cells = pd.read_sql(query, eng, params=params)
+    return _add_derived_measures(_merge_cells(cells, list(group_by)))
@@ -1,9 +1,15 @@
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, inspect, text
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
+from pathlib import Path
 import os
+import sys
+
+# Registro de versão da gold, compartilhado com os demais pipelines (scripts/gold_version.py)
+sys.path.append(str(Path(__file__).resolve().parents[3] / "scripts"))
+from gold_version import register_gold_version
 
 # -------------------------------
 # Conexão com o banco
@@ -21,27 +27,249 @@ def get_engine(echo=False):
 # -------------------------------
 # Funções de construção das tabelas Gold
 # -------------------------------
-def create_dim_tempo(datas):
-    datas = pd.to_datetime(datas.dropna().unique())
-    idx = pd.date_range(datas.min(), datas.max())
-    df = pd.DataFrame({'data': idx})
+# Calendário persistente: gerado uma única vez num intervalo amplo e só
+# estendido quando aparecem datas fora dele. A chave é determinística (yyyymmdd),
+# então as SKs nunca mudam entre execuções.
+DIM_TEMPO_INICIO = pd.Timestamp("2000-01-01")
+DIM_TEMPO_FIM = pd.Timestamp("2035-12-31")
+
+DIAS_SEMANA_PT = np.array([
+    'Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira',
+    'Sexta-feira', 'Sábado', 'Domingo'
+])
+
+# Feriados nacionais de data fixa, indexados por mes * 100 + dia
+FERIADOS_FIXOS = {
+    101: 'Confraternização Universal',
+    421: 'Tiradentes',
+    501: 'Dia do Trabalho',
+    907: 'Independência do Brasil',
+    1012: 'Nossa Senhora Aparecida',
+    1102: 'Finados',
+    1115: 'Proclamação da República',
+    1120: 'Dia da Consciência Negra',
+    1225: 'Natal',
+}
+
+# Feriados fixos que só valem a partir de um ano (Consciência Negra: Lei 14.759/2023)
+FERIADOS_DESDE = {1120: 2024}
+
+def data_para_tempo_sk(datas):
+    """Converte datas na chave inteira yyyymmdd usada em gold_dim_tempo."""
+    datas = pd.to_datetime(datas, errors='coerce')
+    return (datas.dt.year * 10000 + datas.dt.month * 100 + datas.dt.day).astype('Int64')
+
+def calcular_pascoa(ano):
+    """Domingo de Páscoa pelo algoritmo de Meeus/Jones/Butcher."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return pd.Timestamp(year=ano, month=mes, day=dia + 1)
+
+def feriados_moveis(anos):
+    feriados = {}
+    for ano in anos:
+        pascoa = calcular_pascoa(int(ano))
+        feriados[pascoa - pd.Timedelta(days=48)] = 'Carnaval (segunda-feira)'
+        feriados[pascoa - pd.Timedelta(days=47)] = 'Carnaval (terça-feira)'
+        feriados[pascoa - pd.Timedelta(days=2)] = 'Sexta-feira Santa'
+        feriados[pascoa + pd.Timedelta(days=60)] = 'Corpus Christi'
+    return pd.Series(feriados, dtype='object')
+
+def create_dim_tempo(inicio, fim):
+    """
+    Gera o calendário entre `inicio` e `fim` (inclusive) com todos os atributos
+    pré-calculados. Não depende de locale do sistema operacional.
+    """
+    df = pd.DataFrame({'data': pd.date_range(inicio, fim, freq='D')})
+    df.insert(0, 'tempo_sk', data_para_tempo_sk(df['data']).astype('int64'))
     df['ano'] = df['data'].dt.year
     df['mes'] = df['data'].dt.month
     df['dia'] = df['data'].dt.day
-    df['dia_semana'] = df['data'].dt.day_name(locale='pt_BR')
+    df['dia_semana'] = DIAS_SEMANA_PT[df['data'].dt.dayofweek.to_numpy()]
     df['trimestre'] = df['data'].dt.quarter
-    df.insert(0, 'tempo_sk', np.arange(1, len(df)+1))
+    df['semestre'] = np.where(df['mes'] <= 6, 1, 2)
+    df['ano_mes'] = df['ano'] * 100 + df['mes']
+    df['fim_de_semana_flag'] = df['data'].dt.dayofweek >= 5
+
+    mes_dia = df['mes'] * 100 + df['dia']
+    fixos = mes_dia.map(FERIADOS_FIXOS).where(df['ano'] >= mes_dia.map(FERIADOS_DESDE).fillna(0))
+    moveis = df['data'].map(feriados_moveis(df['ano'].unique()))
+    df['nome_feriado'] = fixos.fillna(moveis).to_numpy()
+    df['feriado_flag'] = df['nome_feriado'].notna()
+    df['dia_util_flag'] = ~(df['fim_de_semana_flag'] | df['feriado_flag'])
     return df
 
+def carregar_dim_tempo(eng, datas):
+    """
+    Garante que gold_dim_tempo cubra todas as `datas`. Na primeira execução
+    (ou se a tabela ainda estiver no formato antigo, com SK sequencial) gera o
+    intervalo completo; depois apenas acrescenta os dias que faltarem.
+    `eng` pode ser um engine ou a conexão da transação da carga gold.
+    """
+    datas = pd.to_datetime(datas, errors='coerce').dropna()
+    inicio, fim = DIM_TEMPO_INICIO, DIM_TEMPO_FIM
+    if not datas.empty:
+        inicio = min(inicio, datas.min().normalize())
+        fim = max(fim, datas.max().normalize())
+
+    insp = inspect(eng)
+    colunas = {c['name'] for c in insp.get_columns('gold_dim_tempo')} if insp.has_table('gold_dim_tempo') else set()
+    if 'feriado_flag' not in colunas:
+        print("Gerando calendário completo de gold_dim_tempo...")
+        create_dim_tempo(inicio, fim).to_sql("gold_dim_tempo", eng, if_exists="replace", index=False)
+        return
+
+    atual = pd.read_sql("SELECT MIN(data) AS inicio, MAX(data) AS fim FROM gold_dim_tempo", eng).iloc[0]
+    atual_inicio, atual_fim = pd.Timestamp(atual['inicio']), pd.Timestamp(atual['fim'])
+    faltantes = []
+    if inicio < atual_inicio:
+        faltantes.append(create_dim_tempo(inicio, atual_inicio - pd.Timedelta(days=1)))
+    if fim > atual_fim:
+        faltantes.append(create_dim_tempo(atual_fim + pd.Timedelta(days=1), fim))
+
+    if faltantes:
+        extensao = pd.concat(faltantes, ignore_index=True)
+        print(f"Estendendo gold_dim_tempo com {len(extensao)} dias.")
+        extensao.to_sql("gold_dim_tempo", eng, if_exists="append", index=False)
+
 def create_dim_forma_pagamento(faturamento_df):
     df = faturamento_df[['forma_pagamento']].dropna().drop_duplicates().copy()
     df['forma_pagamento'] = df['forma_pagamento'].str.lower().str.strip()
     df.insert(0, 'forma_pagamento_sk', np.arange(1, len(df)+1))
     return df
 
+# -------------------------------
+# Dimensões SCD Tipo 2 com detecção de mudança por hash
+# -------------------------------
+# Atributos rastreados por dimensão: uma mudança em qualquer um deles gera uma
+# nova versão da linha; os demais campos não entram no hash.
+DIMENSOES_SCD2 = {
+    "gold_dim_paciente": {
+        "sk": "paciente_sk", "chave": "id",
+        "atributos": ["nome", "sexo", "nascimento", "cidade", "estado", "faixa_etaria", "regiao"],
+    },
+    "gold_dim_medico": {
+        "sk": "medico_sk", "chave": "id",
+        "atributos": ["nome", "especialidade", "crm", "estado_crm"],
+    },
+    "gold_dim_clinica": {
+        "sk": "clinica_sk", "chave": "id",
+        "atributos": ["nome", "cidade", "estado", "regiao"],
+    },
+}
+
+# valid_to das versões vigentes
+FIM_VIGENCIA = pd.Timestamp("9999-12-31")
+
+def calcular_row_hash(df, atributos):
+    """Hash vetorizado (int64) dos atributos rastreados de cada linha."""
+    hashes = pd.util.hash_pandas_object(df[atributos].astype(str), index=False)
+    return hashes.to_numpy().view('int64')
+
+def planejar_dimensao_scd2(eng, df, tabela, sk, chave, atributos, carga_ts):
+    """
+    Compara a silver com a dimensão SCD Tipo 2 armazenada, sem gravar nada.
+
+    Compara o hash dos atributos de cada linha da silver com o hash da versão
+    vigente: linhas novas ou alteradas ganham uma nova versão (SK nova), a versão
+    anterior das alteradas é encerrada, e chaves que sumiram da silver também têm
+    a versão vigente encerrada. Retorna o plano, aplicado depois por
+    aplicar_dimensao_scd2 na transação da carga, com o histórico de versões (sk,
+    chave natural e valid_from) já como ficará depois da carga, usado para achar a
+    versão vigente na data de cada fato (sk_vigente_em).
+    """
+    df = df.copy()
+    df['row_hash'] = calcular_row_hash(df, atributos)
+
+    insp = inspect(eng)
+    colunas = {c['name'] for c in insp.get_columns(tabela)} if insp.has_table(tabela) else set()
+    if 'row_hash' not in colunas:
+        # Primeira carga (ou tabela no formato antigo, sem histórico): carga completa
+        print(f"Carga inicial de {tabela} ({len(df)} linhas).")
+        df.insert(0, sk, np.arange(1, len(df)+1))
+        df['valid_from'] = carga_ts
+        df['valid_to'] = FIM_VIGENCIA
+        df['is_current'] = True
+        return {"tabela": tabela, "sk": sk, "inicial": True, "versoes": df,
+                "encerrar": [], "historico": df[[sk, chave, 'valid_from']]}
+
+    atuais = pd.read_sql(f'SELECT "{sk}", "{chave}", row_hash FROM {tabela} WHERE is_current', eng)
+    comparacao = df.merge(atuais, on=chave, how='left', suffixes=('', '_atual'))
+    novos = comparacao[sk].isna()
+    alterados = comparacao[sk].notna() & (comparacao['row_hash'] != comparacao['row_hash_atual'])
+    removidos = ~atuais[chave].isin(df[chave])
+
+    versoes = comparacao.loc[novos | alterados, df.columns].copy()
+    proximo_sk = pd.read_sql(f'SELECT COALESCE(MAX("{sk}"), 0) + 1 AS sk FROM {tabela}', eng).iloc[0, 0]
+    versoes.insert(0, sk, np.arange(proximo_sk, proximo_sk + len(versoes)))
+    versoes['valid_from'] = carga_ts
+    versoes['valid_to'] = FIM_VIGENCIA
+    versoes['is_current'] = True
+
+    encerrar = (comparacao.loc[alterados, sk].astype('int64').tolist()
+                + atuais.loc[removidos, sk].astype('int64').tolist())
+    print(f"{tabela}: {int(novos.sum())} novas, {int(alterados.sum())} alteradas, "
+          f"{int(removidos.sum())} encerradas (fora da silver).")
+
+    historico = pd.read_sql(f'SELECT "{sk}", "{chave}", valid_from FROM {tabela}', eng)
+    return {"tabela": tabela, "sk": sk, "inicial": False, "versoes": versoes, "encerrar": encerrar,
+            "historico": pd.concat([historico, versoes[[sk, chave, 'valid_from']]], ignore_index=True)}
+
+def aplicar_dimensao_scd2(conn, plano, carga_ts):
+    """Grava o plano de planejar_dimensao_scd2 na transação `conn` da carga gold."""
+    tabela, sk = plano["tabela"], plano["sk"]
+    if plano["inicial"]:
+        plano["versoes"].to_sql(tabela, conn, if_exists="replace", index=False)
+        return
+    if plano["encerrar"]:
+        conn.execute(
+            text(f'UPDATE {tabela} SET valid_to = :ts, is_current = FALSE WHERE "{sk}" IN :sks')
+            .bindparams(bindparam("sks", expanding=True)),
+            {"ts": carga_ts.to_pydatetime(), "sks": plano["encerrar"]}
+        )
+    if not plano["versoes"].empty:
+        plano["versoes"].to_sql(tabela, conn, if_exists="append", index=False)
+
+def sk_vigente_em(chaves, datas, historico, sk, chave):
+    """
+    SK da versão da dimensão vigente em cada data (valid_from <= data < valid_to).
+
+    As versões de uma chave são contíguas (a nova começa quando a anterior é
+    encerrada), então basta a última versão com valid_from <= data (merge_asof por
+    chave natural). Datas anteriores à primeira versão usam a primeira (o histórico
+    começa na primeira carga gold); datas nulas usam a versão mais recente.
+    """
+    historico = historico[[sk, chave, 'valid_from']].copy()
+    historico['valid_from'] = pd.to_datetime(historico['valid_from'])
+    historico = historico.sort_values(['valid_from', sk])
+    linhas = pd.DataFrame({chave: chaves.to_numpy(), '_data': pd.to_datetime(datas, errors='coerce').to_numpy(),
+                           '_pos': np.arange(len(chaves))})
+
+    resultado = pd.Series(np.nan, index=linhas['_pos'])
+    com_data = linhas.dropna(subset=['_data', chave]).sort_values('_data')
+    if not com_data.empty and not historico.empty:
+        asof = pd.merge_asof(com_data, historico, left_on='_data', right_on='valid_from',
+                             by=chave, direction='backward')
+        resultado[asof['_pos'].to_numpy()] = asof[sk].to_numpy()
+
+    primeira = historico.drop_duplicates(chave, keep='first').set_index(chave)[sk]
+    ultima = historico.drop_duplicates(chave, keep='last').set_index(chave)[sk]
+    sem_versao = resultado.isna().to_numpy()
+    reserva = np.where(linhas['_data'].isna(), linhas[chave].map(ultima), linhas[chave].map(primeira))
+    resultado[sem_versao] = reserva[sem_versao]
+    return pd.Series(resultado.to_numpy(), index=chaves.index).astype('Int64')
+
 def create_fato_consulta(consulta_df, agenda_df, faturamento_df,
                          dim_paciente, dim_medico, dim_clinica,
-                         dim_tempo, dim_forma_pagamento):
+                         dim_forma_pagamento):
 
     # Renomeia para permitir merge por 'id'
     agenda_df = agenda_df.rename(columns={'consulta_id': 'id'})
@@ -50,13 +278,16 @@ def create_fato_consulta(consulta_df, agenda_df, faturamento_df,
     df = consulta_df.merge(agenda_df, on='id', how='left')
     df = df.merge(faturamento_df, on='id', how='left')
 
-    # Mapeamento de SKs
-    df['paciente_sk'] = df['paciente_id'].map(dict(zip(dim_paciente['id'], dim_paciente['paciente_sk'])))
-    df['medico_sk'] = df['medico_id'].map(dict(zip(dim_medico['id'], dim_medico['medico_sk'])))
-    df['clinica_sk'] = df['clinica_id'].map(dict(zip(dim_clinica['id'], dim_clinica['clinica_sk'])))
+    # Mapeamento de SKs: a versão de cada dimensão vigente na data da consulta, para
+    # que a fato reconstruída continue apontando para o histórico (SCD2)
+    for coluna, dim, sk in [('paciente_id', dim_paciente, 'paciente_sk'),
+                            ('medico_id', dim_medico, 'medico_sk'),
+                            ('clinica_id', dim_clinica, 'clinica_sk')]:
+        df[sk] = sk_vigente_em(df[coluna], df['data_consulta'], dim, sk, 'id')
 
-    df['tempo_agendamento_sk'] = pd.to_datetime(df['data_agendamento']).map(dict(zip(dim_tempo['data'], dim_tempo['tempo_sk'])))
-    df['tempo_consulta_sk'] = pd.to_datetime(df['data_consulta']).map(dict(zip(dim_tempo['data'], dim_tempo['tempo_sk'])))
+    # A SK de tempo é a própria data (yyyymmdd): não precisa de lookup na dimensão
+    df['tempo_agendamento_sk'] = data_para_tempo_sk(df['data_agendamento'])
+    df['tempo_consulta_sk'] = data_para_tempo_sk(df['data_consulta'])
     
     df['forma_pagamento_sk'] = df['forma_pagamento'].str.lower().str.strip().map(
         dict(zip(dim_forma_pagamento['forma_pagamento'], dim_forma_pagamento['forma_pagamento_sk']))
@@ -103,30 +334,29 @@ def load_gold():
 
     try:
         print("Construindo dimensões...")
-        dim_paciente = paciente_df.copy()
-        # np.arange(1, len(dim_paciente)+1) -> se temos 10 pacientes retorna ids de 1, 2, 3, ... a 10.
-        # dim_paciente.insert(0, 'paciente_sk', ...) -> insere a sequencia [1, 2, 3, ..., 10] numa coluna nova 'paciente_sk' na primeira coluna, posição 0
-        dim_paciente.insert(0, 'paciente_sk', np.arange(1, len(dim_paciente)+1))
-
-        dim_medico = medico_df.copy()
-        dim_medico.insert(0, 'medico_sk', np.arange(1, len(dim_medico)+1))
-
-        dim_clinica = clinica_df.copy()
-        dim_clinica.insert(0, 'clinica_sk', np.arange(1, len(dim_clinica)+1))
-
         dim_forma_pagamento = create_dim_forma_pagamento(faturamento_df)
 
         datas = pd.concat([
             pd.to_datetime(consulta_df['data_consulta'], errors='coerce'),
             pd.to_datetime(agenda_df['data_agendamento'], errors='coerce')
         ])
-        dim_tempo = create_dim_tempo(datas)
+
+        # Só o planejamento (leitura) das dimensões SCD2: o histórico de versões sai
+        # daqui para a fato, e a gravação fica na transação da carga
+        print("Comparando dimensões SCD2...")
+        carga_ts = pd.Timestamp.now().floor('s')
+        planos = [
+            planejar_dimensao_scd2(eng, df, tabela, carga_ts=carga_ts, **DIMENSOES_SCD2[tabela])
+            for df, tabela in [(paciente_df, "gold_dim_paciente"), (medico_df, "gold_dim_medico"),
+                               (clinica_df, "gold_dim_clinica")]
+        ]
+        dim_paciente, dim_medico, dim_clinica = (plano["historico"] for plano in planos)
 
         print("Construindo tabela fato...")
         fato_consulta = create_fato_consulta(
             consulta_df, agenda_df, faturamento_df,
             dim_paciente, dim_medico, dim_clinica,
-            dim_tempo, dim_forma_pagamento
+            dim_forma_pagamento
         )
 
         print("Transformações concluídas.")
@@ -135,13 +365,16 @@ def load_gold():
         return
 
     try:
+        # Uma transação só: se qualquer gravação falhar, dimensões e fato ficam
+        # como estavam (nenhuma versão SCD2 avança sem a fato correspondente)
         print("Carregando dados na camada Gold...")
-        dim_paciente.to_sql("gold_dim_paciente", eng, if_exists="replace", index=False)
-        dim_medico.to_sql("gold_dim_medico", eng, if_exists="replace", index=False)
-        dim_clinica.to_sql("gold_dim_clinica", eng, if_exists="replace", index=False)
-        dim_forma_pagamento.to_sql("gold_dim_forma_pagamento", eng, if_exists="replace", index=False)
-        dim_tempo.to_sql("gold_dim_tempo", eng, if_exists="replace", index=False)
-        fato_consulta.to_sql("gold_fato_consulta", eng, if_exists="replace", index=False)
+        with eng.begin() as conn:
+            dim_forma_pagamento.to_sql("gold_dim_forma_pagamento", conn, if_exists="replace", index=False)
+            carregar_dim_tempo(conn, datas)
+            for plano in planos:
+                aplicar_dimensao_scd2(conn, plano, carga_ts)
+            fato_consulta.to_sql("gold_fato_consulta", conn, if_exists="replace", index=False)
+        register_gold_version(eng, "aula_3_modelagem")
         print("Carga concluída com sucesso.")
     except SQLAlchemyError as e:
         print(f"Erro ao carregar dados na camada Gold: {e}")
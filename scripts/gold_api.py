@@ -0,0 +1,214 @@
+import time
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from gold_version import VERSION_TABLE
+
+# -------------------------------
+# API de leitura da camada Gold
+# -------------------------------
+# Consultas tipadas e parametrizadas sobre as tabelas gold, com projeção de colunas
+# e cache LRU em memória. Cada carga gold registra uma nova versão em
+# gold_load_version (gold_version.register_gold_version); a versão faz parte da
+# chave do cache, então uma nova carga invalida automaticamente todos os resultados
+# antigos.
+#
+# A tabela de versões é consultada no máximo a cada `version_check_seconds`
+# (padrão 5 s). Dentro dessa janela o leitor não toca o banco para leituras em
+# cache, então por até esse tempo depois de uma carga gold ele ainda pode devolver
+# resultados da versão anterior. Com version_check_seconds=0 a versão é conferida
+# em toda leitura (uma consulta a mais por chamada, nenhum resultado defasado).
+#
+# Uso:
+#     reader = GoldReader(get_engine())
+#     reader.patient_summary(columns=["patient_id", "total_claim_cost"], gender="F")
+
+
+class ResultCache:
+    """Cache LRU de DataFrames limitado por número de entradas e por bytes."""
+
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, df):
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (df, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class GoldReader:
+    """
+    Leitura das tabelas gold com cache por versão de carga.
+
+    Args:
+        engine: engine SQLAlchemy do banco onde estão as tabelas gold.
+        version_check_seconds (float): intervalo mínimo entre consultas à
+            tabela de versões; dentro dele as leituras repetidas não tocam o banco
+            e podem devolver dados da carga anterior por até esse tempo depois de
+            uma nova carga gold. 0 confere a versão em toda leitura.
+        max_entries / max_bytes: limites do cache LRU.
+    """
+
+    def __init__(self, engine, version_check_seconds=5.0, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.engine = engine
+        self.version_check_seconds = version_check_seconds
+        self.cache = ResultCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._version = None
+        self._version_checked_at = 0.0
+        self._columns = {}
+
+    # -------------------------------
+    # Versão e metadados
+    # -------------------------------
+    def current_version(self):
+        """Versão da última carga gold concluída (0 se nunca houve registro)."""
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.version_check_seconds:
+            return self._version
+
+        with self.engine.connect() as conn:
+            if not inspect(conn).has_table(VERSION_TABLE):
+                version = 0
+            else:
+                version = conn.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {VERSION_TABLE}")).scalar()
+
+        if version != self._version:
+            # Nova carga gold: descarta resultados e metadados da versão anterior
+            self.cache.clear()
+            self._columns.clear()
+            self._version = version
+        self._version_checked_at = now
+        return version
+
+    def _table_columns(self, table):
+        if table not in self._columns:
+            self._columns[table] = [c["name"] for c in inspect(self.engine).get_columns(table)]
+        return self._columns[table]
+
+    # -------------------------------
+    # Consulta genérica
+    # -------------------------------
+    def select(self, table, columns=None, where=None, order_by=None, limit=None):
+        """
+        Executa um SELECT parametrizado com cache.
+
+        Args:
+            table (str): tabela gold.
+            columns (list): colunas projetadas (None = todas).
+            where (list): tuplas (coluna, operador, valor); valores None são ignorados.
+            order_by (list): colunas de ordenação.
+            limit (int): limite de linhas.
+        """
+        version = self.current_version()
+        existing = self._table_columns(table)
+        columns = list(columns) if columns else existing
+        where = [(col, op, value) for col, op, value in (where or []) if value is not None]
+        order_by = list(order_by or [])
+
+        unknown = (set(columns) | {c for c, _, _ in where} | set(order_by)) - set(existing)
+        if unknown:
+            raise ValueError(f"Colunas inexistentes em {table}: {sorted(unknown)}")
+        if any(op not in ("=", "<>", "<", "<=", ">", ">=", "IN") for _, op, _ in where):
+            raise ValueError("Operador não suportado.")
+
+        key = (version, table, tuple(columns), tuple((c, op, tuple(v) if op == "IN" else v) for c, op, v in where),
+               tuple(order_by), limit)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.copy()
+
+        cols_sql = ", ".join(f'"{c}"' for c in columns)
+        sql = f'SELECT {cols_sql} FROM "{table}"'
+        params = {}
+        if where:
+            clauses = []
+            for i, (col, op, value) in enumerate(where):
+                if op == "IN":
+                    clauses.append(f'"{col}" = ANY(:p{i})')
+                    params[f"p{i}"] = list(value)
+                else:
+                    clauses.append(f'"{col}" {op} :p{i}')
+                    params[f"p{i}"] = value
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            sql += " ORDER BY " + ", ".join(f'"{c}"' for c in order_by)
+        if limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = int(limit)
+
+        df = pd.read_sql(text(sql), self.engine, params=params)
+        self.cache.put(key, df)
+        return df.copy()
+
+    # -------------------------------
+    # Consultas tipadas por tabela
+    # -------------------------------
+    def patient_summary(self, columns=None, patient_ids: list = None, gender: str = None,
+                        race: str = None, min_encounters: int = None, limit: int = None):
+        return self.select(
+            "gold_patient_summary", columns,
+            where=[
+                ("patient_id", "IN", patient_ids),
+                ("gender", "=", gender),
+                ("race", "=", race),
+                ("total_encounters", ">=", None if min_encounters is None else int(min_encounters)),
+            ],
+            order_by=["patient_id"], limit=limit,
+        )
+
+    def encounter_summary(self, columns=None, encounterclass: str = None):
+        return self.select(
+            "gold_encounter_summary", columns,
+            where=[("encounterclass", "=", encounterclass)],
+            order_by=["encounterclass"],
+        )
+
+    def fato_consulta(self, columns=None, data_inicio: date = None, data_fim: date = None,
+                      status: str = None, medico_sk: int = None, clinica_sk: int = None,
+                      limit: int = None):
+        """Consultas de gold_fato_consulta (aula 3); datas filtram tempo_consulta_sk (yyyymmdd)."""
+        def to_sk(d):
+            return None if d is None else int(pd.Timestamp(d).strftime("%Y%m%d"))
+
+        return self.select(
+            "gold_fato_consulta", columns,
+            where=[
+                ("tempo_consulta_sk", ">=", to_sk(data_inicio)),
+                ("tempo_consulta_sk", "<=", to_sk(data_fim)),
+                ("status", "=", status),
+                ("medico_sk", "=", None if medico_sk is None else int(medico_sk)),
+                ("clinica_sk", "=", None if clinica_sk is None else int(clinica_sk)),
+            ],
+            order_by=["consulta_sk"], limit=limit,
+        )
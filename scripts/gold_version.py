@@ -0,0 +1,46 @@
+# -------------------------------
+# Versão das cargas da camada Gold
+# -------------------------------
+# Toda carga gold bem-sucedida (scripts das aulas 1 e 3 e a DAG new_pipeline_dag)
+# registra uma linha em gold_load_version. Leitores com cache (gold_api.GoldReader)
+# comparam a maior versão com a que usaram para montar o cache.
+#
+# Sem dependências além de uma conexão DB-API, para poder ser importado tanto
+# pelos scripts (engine SQLAlchemy) quanto pelo plu_medical (psycopg2 puro).
+
+VERSION_TABLE = "gold_load_version"
+
+VERSION_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+    "version BIGSERIAL PRIMARY KEY, source TEXT NOT NULL, "
+    "finished_at TIMESTAMP NOT NULL DEFAULT NOW())"
+)
+
+# Caches são invalidados por esta linha: ela nunca pode se perder numa queda, mesmo
+# que a sessão da carga use synchronous_commit=off (plu_medical.SESSION_SETTINGS)
+SYNC_COMMIT = "SET LOCAL synchronous_commit = on"
+
+
+def register_gold_version(conn, source):
+    """
+    Registra uma nova versão da camada gold ao fim de uma carga bem-sucedida.
+
+    Args:
+        conn: conexão DB-API (psycopg2) ou engine SQLAlchemy.
+        source (str): quem fez a carga (ex.: "aula_1_banco", "new_pipeline_dag").
+    """
+    insert = f"INSERT INTO {VERSION_TABLE} (source) VALUES (%s)"
+    if hasattr(conn, "raw_connection"):
+        # Engine SQLAlchemy: erros chegam como SQLAlchemyError, como no resto dos scripts
+        with conn.begin() as c:
+            c.exec_driver_sql(SYNC_COMMIT)
+            c.exec_driver_sql(VERSION_DDL)
+            c.exec_driver_sql(insert, (source,))
+        return
+
+    cursor = conn.cursor()
+    cursor.execute(SYNC_COMMIT)
+    cursor.execute(VERSION_DDL)
+    cursor.execute(insert, (source,))
+    conn.commit()
+    cursor.close()
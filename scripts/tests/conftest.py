@@ -0,0 +1,5 @@
+import os
+import sys
+
+# encounter_cube é importado pelo nome, como no 3_gold_layer_construction.py
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aula_1_banco"))
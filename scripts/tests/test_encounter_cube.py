@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from encounter_cube import CUBE_DIMENSIONS, create_encounter_cube, grouping_id, slice_cube
+
+
+@pytest.fixture(scope="module")
+def obt():
+    rng = np.random.default_rng(3)
+    n = 2_000
+    custo = rng.gamma(2.0, 500.0, n).round(2)
+    custo[rng.random(n) < 0.05] = np.nan           # medidas ausentes não entram em count/sum
+    return pd.DataFrame({
+        "encounter_id": [f"e{i}" for i in range(n)],
+        "encounter_start_date": pd.Timestamp("2019-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D"),
+        "encounterclass": rng.choice(["ambulatory", "emergency", "inpatient", "wellness"], n),
+        "gender": rng.choice(["F", "M"], n),
+        "race": rng.choice(["white", "black", "asian"], n),
+        "ethnicity": rng.choice(["hispanic", "nonhispanic"], n),
+        "total_claim_cost": custo,
+        "duration_hours": rng.exponential(3.0, n).round(3),
+    })
+
+
+def _group_by_direto(obt, group_by, filters=None):
+    df = obt.copy()
+    inicio = pd.to_datetime(df["encounter_start_date"])
+    df["encounter_year"] = inicio.dt.year.astype("Int64")
+    df["encounter_month"] = inicio.dt.month.astype("Int64")
+    for dim, valor in (filters or {}).items():
+        df = df[df[dim] == valor]
+    return df.groupby(group_by).agg(
+        encounter_count=("encounter_id", "size"),
+        total_claim_cost_count=("total_claim_cost", "count"),
+        total_claim_cost_sum=("total_claim_cost", "sum"),
+        total_claim_cost_min=("total_claim_cost", "min"),
+        total_claim_cost_max=("total_claim_cost", "max"),
+        total_claim_cost_avg=("total_claim_cost", "mean"),
+        total_claim_cost_std=("total_claim_cost", "std"),
+        duration_hours_sum=("duration_hours", "sum"),
+        duration_hours_avg=("duration_hours", "mean"),
+    ).reset_index()
+
+
+def _comparar(fatia, esperado, group_by):
+    fatia = fatia.sort_values(group_by).reset_index(drop=True)
+    esperado = esperado.sort_values(group_by).reset_index(drop=True)
+    for dim in group_by:
+        assert fatia[dim].astype(str).tolist() == esperado[dim].astype(str).tolist()
+    for coluna in esperado.columns.difference(group_by):
+        np.testing.assert_allclose(fatia[coluna].astype(float), esperado[coluna].astype(float),
+                                   rtol=1e-9, err_msg=coluna)
+
+
+@pytest.mark.parametrize("group_by,filters", [
+    (["encounterclass"], None),
+    (["encounterclass", "gender"], None),
+    (["encounter_year", "encounter_month"], {"race": "asian"}),
+    (["race", "ethnicity"], {"encounter_year": 2020, "encounterclass": "emergency"}),
+])
+def test_fatia_igual_ao_group_by(obt, group_by, filters):
+    cubo = create_encounter_cube(obt)
+    _comparar(slice_cube(cubo, group_by, filters), _group_by_direto(obt, group_by, filters), group_by)
+
+
+def test_total_geral(obt):
+    cubo = create_encounter_cube(obt)
+    total = slice_cube(cubo, [])
+    assert total["encounter_count"].item() == len(obt)
+    assert total["total_claim_cost_sum"].item() == pytest.approx(obt["total_claim_cost"].sum())
+    assert (cubo.groupby("grouping_id")["encounter_count"].sum() == len(obt)).all()
+
+
+def test_rollup_reagrega_o_nivel_mais_fino(obt):
+    # ROLLUP(encounterclass, encounter_year, encounter_month)
+    conjuntos = [("encounterclass", "encounter_year", "encounter_month"),
+                 ("encounterclass", "encounter_year"), ("encounterclass",), ()]
+    cubo = create_encounter_cube(obt, grouping_sets=conjuntos)
+    assert cubo["grouping_id"].nunique() == len(conjuntos) == 4
+
+    fatia = slice_cube(cubo, ["encounter_month"], {"encounterclass": "wellness"}, grouping_sets=conjuntos)
+    esperado = _group_by_direto(obt, ["encounter_month"], {"encounterclass": "wellness"})
+    _comparar(fatia, esperado, ["encounter_month"])
+
+    with pytest.raises(ValueError):
+        slice_cube(cubo, ["gender"], grouping_sets=conjuntos)
+    assert set(CUBE_DIMENSIONS) <= set(cubo.columns)
+
+
+def test_null_real_diferente_de_todos(obt):
+    com_null = obt.copy()
+    com_null.loc[:99, "race"] = None
+    com_null.loc[100:109, "encounter_start_date"] = pd.NaT    # ano/mês NULL (Int64 <NA>)
+    cubo = create_encounter_cube(com_null)
+
+    # Célula "todas as raças" e raça NULL real têm race NULL; o grouping_id separa
+    por_raca = slice_cube(cubo, ["race"])
+    assert por_raca["encounter_count"].sum() == len(obt)
+    assert por_raca.loc[por_raca["race"].isna(), "encounter_count"].item() == 100
+
+    so_null = slice_cube(cubo, ["gender"], {"race": None})
+    assert so_null["encounter_count"].sum() == 100
+    assert (cubo.loc[cubo["grouping_id"] == grouping_id(CUBE_DIMENSIONS), "race"].isna().sum()
+            < cubo["race"].isna().sum())
+    assert slice_cube(cubo, ["encounter_year"], {"encounter_year": None})["encounter_count"].item() == 10
+    esperado = _group_by_direto(com_null, ["gender"], {"encounter_year": 2020})
+    _comparar(slice_cube(cubo, ["gender"], {"encounter_year": 2020}), esperado, ["gender"])
@@ -0,0 +1,70 @@
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+pytest.importorskip("dotenv")
+
+# O script de carga tem nome iniciado por dígito: importado pelo caminho
+_CAMINHO = os.path.join(os.path.dirname(__file__), "..", "aula_3_modelagem", "scripts", "3_gold_layer_construction.py")
+_spec = importlib.util.spec_from_file_location("gold_aula_3", _CAMINHO)
+gold = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gold)
+
+ATRIBUTOS = ["nome", "cidade"]
+T1, T2 = pd.Timestamp("2025-01-10"), pd.Timestamp("2025-03-01")
+
+
+def _carga(eng, df, carga_ts):
+    plano = gold.planejar_dimensao_scd2(eng, df, "gold_dim_paciente", "paciente_sk", "id", ATRIBUTOS, carga_ts)
+    with eng.begin() as conn:
+        gold.aplicar_dimensao_scd2(conn, plano, carga_ts)
+    return plano
+
+
+@pytest.fixture
+def eng(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'gold.db'}")
+
+
+@pytest.fixture
+def duas_cargas(eng):
+    _carga(eng, pd.DataFrame({"id": [1, 2, 3], "nome": ["Ana", "Bia", "Caio"],
+                              "cidade": ["Recife", "Natal", "Belém"]}), T1)
+    # Bia mudou de cidade, Caio saiu da silver, Davi é novo
+    plano = _carga(eng, pd.DataFrame({"id": [1, 2, 4], "nome": ["Ana", "Bia", "Davi"],
+                                      "cidade": ["Recife", "Salvador", "Manaus"]}), T2)
+    return plano
+
+
+def test_plano_e_aplicacao(eng, duas_cargas):
+    assert sorted(duas_cargas["encerrar"]) == [2, 3]
+    assert duas_cargas["versoes"][["paciente_sk", "id"]].values.tolist() == [[4, 2], [5, 4]]
+
+    dim = pd.read_sql("SELECT * FROM gold_dim_paciente ORDER BY paciente_sk", eng)
+    assert dim["id"].tolist() == [1, 2, 3, 2, 4]
+    assert dim["is_current"].astype(bool).tolist() == [True, False, False, True, True]
+    encerradas = pd.to_datetime(dim.loc[~dim["is_current"].astype(bool), "valid_to"])
+    assert (encerradas == T2).all()
+    assert dim.loc[dim["paciente_sk"] == 4, "cidade"].item() == "Salvador"
+
+
+def test_carga_sem_mudancas_nao_gera_versoes(eng, duas_cargas):
+    plano = _carga(eng, pd.DataFrame({"id": [1, 2, 4], "nome": ["Ana", "Bia", "Davi"],
+                                      "cidade": ["Recife", "Salvador", "Manaus"]}), pd.Timestamp("2025-04-01"))
+    assert plano["versoes"].empty and plano["encerrar"] == []
+    assert len(pd.read_sql("SELECT * FROM gold_dim_paciente", eng)) == 5
+
+
+def test_fato_aponta_para_a_versao_vigente_na_data(duas_cargas):
+    consultas = pd.DataFrame({
+        "id":   [2, 2, 2, 1, 3, 4, 2],
+        "data": ["2024-06-01", "2025-02-28", "2025-03-02", "2025-05-01", "2025-05-01", "2025-05-01", None],
+    })
+    sks = gold.sk_vigente_em(consultas["id"], consultas["data"], duas_cargas["historico"], "paciente_sk", "id")
+    # antes da 1ª carga -> 1ª versão; antes/depois da mudança de Bia -> SK 2 / SK 4;
+    # Caio (encerrado) continua na última versão dele; data nula -> versão mais recente
+    assert sks.tolist() == [2, 2, 4, 1, 3, 5, 4]
+    assert (sks.index == consultas.index).all()